@@ -1,14 +1,17 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import csv
-from datetime import datetime
 import os
+from datetime import datetime
+
+from qc_core import (AQL_ENGINE, tests_by_type, build_inspection_plan, format_inspection_plan,
+                     append_inspection_record, search_inspection_records, update_conformity_record,
+                     CertificateCache, ChangeFeed, measure, inspected_lots, render_certificate_pdfs,
+                     SupplierSwitching, SupplierScorecard, defect_text, InspectionIndex, BackgroundWriter,
+                     RejectedRecord, PartlySaved, run_after_save, write_recovery_file, RECOVERY_FILE)
 
 # Custom Entry with placeholder functionality
 class PlaceholderEntry(ttk.Entry):
@@ -36,75 +39,6 @@ class PlaceholderEntry(ttk.Entry):
             return ""
         return content
 
-# === AQL Tables ===
-aql_tables = {
-    "Level 1": [
-        {"min": 2, "max": 8, "sample": 2, "major": 0, "minor": 0},
-        {"min": 9, "max": 15, "sample": 2, "major": 0, "minor": 0},
-        {"min": 16, "max": 25, "sample": 3, "major": 0, "minor": 0},
-        {"min": 26, "max": 50, "sample": 5, "major": 0, "minor": 0},
-        {"min": 51, "max": 90, "sample": 5, "major": 0, "minor": 0},
-        {"min": 91, "max": 150, "sample": 8, "major": 0, "minor": 1},
-        {"min": 151, "max": 280, "sample": 13, "major": 0, "minor": 1},
-        {"min": 281, "max": 500, "sample": 20, "major": 1, "minor": 2},
-        {"min": 501, "max": 1200, "sample": 32, "major": 2, "minor": 3},
-        {"min": 1201, "max": 3200, "sample": 50, "major": 3, "minor": 5},
-        {"min": 3201, "max": 10000, "sample": 80, "major": 5, "minor": 7},
-        {"min": 10001, "max": 35000, "sample": 125, "major": 7, "minor": 10},
-        {"min": 35001, "max": 150000, "sample": 200, "major": 10, "minor": 14},
-        {"min": 150001, "max": 500000, "sample": 315, "major": 14, "minor": 21},
-        {"min": 500001, "max": float('inf'), "sample": 500, "major": 21, "minor": 21}
-    ],
-    "Level 2": [
-        {"min": 2, "max": 8, "sample": 2, "major": 0, "minor": 0},
-        {"min": 9, "max": 15, "sample": 3, "major": 0, "minor": 0},
-        {"min": 16, "max": 25, "sample": 5, "major": 0, "minor": 0},
-        {"min": 26, "max": 50, "sample": 8, "major": 0, "minor": 1},
-        {"min": 51, "max": 90, "sample": 13, "major": 1, "minor": 1},
-        {"min": 91, "max": 150, "sample": 20, "major": 1, "minor": 2},
-        {"min": 151, "max": 280, "sample": 32, "major": 2, "minor": 3},
-        {"min": 281, "max": 500, "sample": 50, "major": 3, "minor": 5},
-        {"min": 501, "max": 1200, "sample": 80, "major": 5, "minor": 7},
-        {"min": 1201, "max": 3200, "sample": 125, "major": 7, "minor": 10},
-        {"min": 3201, "max": 10000, "sample": 200, "major": 10, "minor": 14},
-        {"min": 10001, "max": 35000, "sample": 315, "major": 14, "minor": 21},
-        {"min": 35001, "max": 150000, "sample": 500, "major": 21, "minor": 21},
-        {"min": 150001, "max": 500000, "sample": 800, "major": 21, "minor": 21},
-        {"min": 500001, "max": float('inf'), "sample": 1250, "major": 21, "minor": 21}
-    ],
-    "S-4": [
-        {"min": 2, "max": 8, "sample": 2, "major": 0, "minor": 0},
-        {"min": 9, "max": 15, "sample": 2, "major": 0, "minor": 0},
-        {"min": 16, "max": 25, "sample": 3, "major": 0, "minor": 0},
-        {"min": 26, "max": 50, "sample": 5, "major": 0, "minor": 0},
-        {"min": 51, "max": 90, "sample": 5, "major": 0, "minor": 0},
-        {"min": 91, "max": 150, "sample": 8, "major": 0, "minor": 1},
-        {"min": 151, "max": 280, "sample": 13, "major": 0, "minor": 1},
-        {"min": 281, "max": 500, "sample": 13, "major": 0, "minor": 1},
-        {"min": 501, "max": 1200, "sample": 20, "major": 1, "minor": 2},
-        {"min": 1201, "max": 3200, "sample": 32, "major": 2, "minor": 3},
-        {"min": 3201, "max": 10000, "sample": 32, "major": 2, "minor": 3},
-        {"min": 10001, "max": 35000, "sample": 50, "major": 3, "minor": 5},
-        {"min": 35001, "max": 150000, "sample": 80, "major": 5, "minor": 7},
-        {"min": 150001, "max": 500000, "sample": 80, "major": 5, "minor": 7},
-        {"min": 500001, "max": float('inf'), "sample": 125, "major": 7, "minor": 10}
-    ]
-}
-
-# === Raw Material Types and Tests ===
-tests_by_type = {
-    "bottle": ["Volume", "Length & Width", "Leakage Test", "Appearance"],
-    "Cap": ["Length & Width", "Leakage Test", "Appearance"],
-    "alu pouch": ["Appearance and Color", "Length & Width", "Leakage Test"],
-    "plastic cassette": ["Appearance", "Length & Width", "Compatibility Between Top and Bottom"],
-    "silica gel": ["Length & Width", "Weight"],
-    "uncut sheet": ["Length & Width", "Controls & Flow Rate", "Compatibility with Cassette"],
-    "soft bag": ["Volume", "Leakage"],
-    "cbc carton": ["Volume", "Length & Width & Height", "Visual Appearance", "Stacking"],
-    "lateral flow box": ["Length & Width & Height", "Visual Appearance"],
-    "stickers": ["Length & Width", "Check data,codes (product code & sticker code)", "Visual Appearance"]
-}
-
 class AQLInspector:
     def __init__(self, root):
         self.root = root
@@ -115,9 +49,52 @@ class AQLInspector:
         self.style = ttk.Style()
         self.style.configure("Placeholder.TEntry", foreground="grey")
 
+        # Every record write is also appended to the change feed for BI refreshes
+        self.change_feed = ChangeFeed()
+        # Inspection attempts are looked up and rewritten through the index, not by rereading the file
+        self.inspections = InspectionIndex()
+        self.certificates = CertificateCache()
+        # Supplier totals are updated with every saved result instead of re-read from the records
+        self.scorecard = SupplierScorecard()
+        # Switching states too, so a plan gets its severity without replaying the history
+        self.switching = SupplierSwitching()
+        # Saves are written in the background and confirmed in the status bar
+        self.writer = BackgroundWriter()
+        self.search_results = []
+
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after(200, self.poll_writer)
+
+    def close(self):
+        """Write the saves still queued before closing"""
+        if self.writer.failed and not messagebox.askyesno(
+                "Unsaved Records", f"{len(self.writer.failed)} saves failed. They will be kept in "
+                f"{os.path.abspath(RECOVERY_FILE)} to be entered again. Close anyway?"):
+            return
+        unsaved = self.writer.close()
+        if unsaved:
+            self.report_unsaved(unsaved)
+        self.inspections.save()
+        self.root.destroy()
+
+    def report_unsaved(self, jobs):
+        """Keep the saves that failed at close in the recovery file and list them"""
+        try:
+            kept = f"They were kept in {write_recovery_file(jobs)}."
+        except OSError as e:
+            kept = f"They could not be kept in a recovery file either ({e})."
+        messagebox.showwarning("Unsaved Records", f"{len(jobs)} saves could not be written. {kept}\n\n"
+                               + self.writer.unsaved_text(jobs))
 
     def setup_ui(self):
+        # Status bar, saves are confirmed here instead of in a dialog
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
+        self.status_label = ttk.Label(status_frame, text="Ready", foreground="blue")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.retry_button = ttk.Button(status_frame, text="Retry Failed Saves", command=self.retry_failed_saves)
+
         # Notebook for multiple tabs
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -176,9 +153,9 @@ class AQLInspector:
         ttk.Label(input_frame, text="Inspection Level:").grid(row=2, column=2, sticky="e", padx=5, pady=5)
         self.level_var = tk.StringVar()
         level_menu = ttk.Combobox(input_frame, textvariable=self.level_var, 
-                                 values=["Level 1", "Level 2", "S-4"], state="readonly", width=27)
+                                 values=list(AQL_ENGINE.levels), state="readonly", width=27)
         level_menu.grid(row=2, column=3, sticky="w", padx=5, pady=5)
-        level_menu.current(1)
+        level_menu.set(AQL_ENGINE.defaults["level"])
 
         # Button
         ttk.Button(tab, text="Generate Inspection Plan", 
@@ -272,18 +249,23 @@ class AQLInspector:
         ttk.Button(search_frame, text="Search", 
                   command=self.search_records).grid(row=1, column=4, padx=5, pady=5)
 
+        self.latest_only_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(search_frame, text="Latest attempt only",
+                        variable=self.latest_only_var).grid(row=0, column=4, sticky="w", padx=5, pady=5)
+
         # Results Frame
         results_frame = ttk.LabelFrame(tab, text="Search Results", padding=10)
         results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
         # Treeview for results
-        self.results_tree = ttk.Treeview(results_frame, columns=("Timestamp", "IC", "ProductName", "ProductCode", "Sampler", "Supplier", "Units", "Item", "Level", 
+        self.results_tree = ttk.Treeview(results_frame, columns=("Timestamp", "IC", "Attempt", "ProductName", "ProductCode", "Sampler", "Supplier", "Units", "Item", "Level", 
                                                                "Sample", "Major", "Minor", "Status", "Inspector"), 
                                        show="headings")
 
         # Define headings
         self.results_tree.heading("Timestamp", text="Timestamp")
         self.results_tree.heading("IC", text="IC")
+        self.results_tree.heading("Attempt", text="Attempt")
         self.results_tree.heading("ProductName", text="Product Name")
         self.results_tree.heading("ProductCode", text="Product Code")
         self.results_tree.heading("Sampler", text="Sampler")
@@ -300,6 +282,7 @@ class AQLInspector:
         # Set column widths
         self.results_tree.column("Timestamp", width=150)
         self.results_tree.column("IC", width=100)
+        self.results_tree.column("Attempt", width=60)
         self.results_tree.column("ProductName", width=120)
         self.results_tree.column("ProductCode", width=100)
         self.results_tree.column("Sampler", width=100)
@@ -320,89 +303,63 @@ class AQLInspector:
 
         self.results_tree.pack(fill=tk.BOTH, expand=True)
 
-        # Export button
-        ttk.Button(tab, text="Export to CSV", 
-                  command=self.export_results).pack(pady=10)
-
-    def get_aql_values(self, units, level):
-        for row in aql_tables[level]:
-            if row["min"] <= units <= row["max"]:
-                return row["sample"], row["major"], row["minor"]
-        return None, None, None
+        # Export buttons
+        export_frame = ttk.Frame(tab)
+        export_frame.pack(pady=10)
+        ttk.Button(export_frame, text="Export to CSV", 
+                  command=self.export_results).pack(side=tk.LEFT, padx=5)
+        ttk.Button(export_frame, text="Export Certificates as PDF", 
+                  command=self.export_certificate_pdfs).pack(side=tk.LEFT, padx=5)
+        ttk.Button(export_frame, text="Export Supplier Scorecard", 
+                  command=self.export_scorecard).pack(side=tk.LEFT, padx=5)
 
     def generate_inspection_plan(self):
-        ic = self.ic_entry.get().strip()
-        product_name = self.product_name_entry.get().strip()
-        product_code = self.product_code_entry.get().strip()
-        sampler = self.sampler_entry.get().strip()
-        supplier = self.supplier_entry.get().strip()
+        generated_on = datetime.now()
+        error = None
+        with measure("generate_inspection_plan"):
+            # Normal, tightened or reduced inspection from the supplier's saved switching state
+            with self.writer.lock:
+                self.switching.ensure_current()
+                switching = self.switching.supplier(self.supplier_entry.get().strip())
+            try:
+                plan = build_inspection_plan(
+                    self.ic_entry.get().strip(),
+                    self.product_name_entry.get().strip(),
+                    self.product_code_entry.get().strip(),
+                    self.sampler_entry.get().strip(),
+                    self.supplier_entry.get().strip(),
+                    self.units_entry.get(),
+                    self.item_var.get(),
+                    self.level_var.get(),
+                    switching.severity
+                )
+            except ValueError as e:
+                error = str(e)
+            else:
+                self.output_text.delete(1.0, tk.END)
+                self.output_text.insert(tk.END, format_inspection_plan(plan, generated_on))
 
-        if not ic:
-            messagebox.showwarning("Warning", "Please enter an Internal Code")
-            return
-        if not sampler:
-            messagebox.showwarning("Warning", "Please enter Sampler Name")
-            return
+                # Save to CSV
+                self.save_to_csv(plan, generated_on)
 
-        level = self.level_var.get()
-        try:
-            units = int(self.units_entry.get())
-            if units <= 0:
-                raise ValueError
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid positive number of units.")
+        if error:
+            messagebox.showerror("Error", error)
             return
 
-        item = self.item_var.get()
-        sample, major, minor = self.get_aql_values(units, level)
-        if sample is None:
-            messagebox.showerror("Error", "Units not covered in AQL table for this level.")
-            return
+        if switching.discontinued:
+            messagebox.showwarning("Warning", f"{switching.tightened_rejects} lots of {plan['supplier']} were not "
+                                   "accepted under tightened inspection. Per ISO 2859-1, acceptance inspection "
+                                   "should be discontinued until the supplier has corrected the quality.")
+
+    def save_to_csv(self, plan, timestamp):
+        self.writer.submit(f"inspection plan of {plan['ic']}", self.write_plan, plan, timestamp)
+        self.status_label.config(text=f"Saving inspection plan of {plan['ic']}...", foreground="blue")
 
-        tests = tests_by_type[item]
-
-        output = f"📋 Inspection Plan\n{'='*40}\n"
-        output += f"• Internal Code: {ic}\n"
-        output += f"• Product Name: {product_name}\n"
-        output += f"• Product Code: {product_code}\n"
-        output += f"• Sampler: {sampler}\n"
-        output += f"• Supplier: {supplier}\n"
-        output += f"• Units: {units}\n"
-        output += f"• Item Type: {item}\n"
-        output += f"• Inspection Level: {level}\n"
-        output += f"• Sample Size: {sample}\n"
-        output += f"• Major Defects (2.5%): Accept ≤ {major}, Reject ≥ {major+1}\n"
-        output += f"• Minor Defects (4.0%): Accept ≤ {minor}, Reject ≥ {minor+1}\n"
-        output += f"\n🔍 Required Tests:\n"
-        for test in tests:
-            output += f"  - {test}\n"
-        output += f"\nGenerated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, output)
-
-        # Save to CSV
-        self.save_to_csv(ic, product_name, product_code, sampler, supplier, units, item, level, sample, tests, major, minor)
-
-    def save_to_csv(self, ic, product_name, product_code, sampler, supplier, units, item, level, sample, tests, major, minor):
-        file_exists = os.path.isfile("inspection_results.csv")
-        with open("inspection_results.csv", mode="a", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                writer.writerow([
-                    "Timestamp", "Internal Code", "Product Name", "Product Code", "Sampler", "Supplier", "Units", "Item Type", 
-                    "Inspection Level", "Sample Size", "Required Tests",
-                    "Major Defects", "Minor Defects", "Status", "Inspector", "Comments"
-                ])
-            writer.writerow([
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                ic, product_name, product_code, sampler, supplier, units, item, level, sample,
-                ", ".join(tests),
-                f"AQL2.5% Major: Ac {major}/Re {major + 1}",
-                f"AQL4.0% Minor: Ac {minor}/Re {minor + 1}",
-                "", "", ""  # Empty fields for conformity data
-            ])
-        messagebox.showinfo("Saved", "✅ Data saved to inspection_results.csv")
+    def write_plan(self, plan, timestamp):
+        """Append the plan as a new attempt, runs on the writer thread"""
+        with measure("save_inspection_plan"):
+            return append_inspection_record(plan, timestamp, change_feed=self.change_feed, scorecard=self.scorecard,
+                                            index=self.inspections, switching=self.switching)
 
     def save_conformity(self):
         ic = self.conform_ic_entry.get().strip()
@@ -429,161 +386,70 @@ class AQLInspector:
         except ValueError:
             minor_defects = 0
 
-        # Get additional info from CSV for the certificate
-        supplier = ""
-        item_type = ""
-        units = ""
-        sample_size = ""
-        
-        try:
-            with open("inspection_results.csv", mode="r", newline="", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row["Internal Code"] == ic:
-                        supplier = row.get("Supplier", "N/A")
-                        item_type = row.get("Item Type", "N/A")
-                        units = row.get("Units", "N/A")
-                        sample_size = row.get("Sample Size", "N/A")
-                        break
-        except FileNotFoundError:
-            pass
+        self.writer.submit(f"conformity of {ic}", self.record_conformity, ic, product_name, product_code,
+                           status, inspector, comments, major_defects, minor_defects)
+        self.status_label.config(text=f"Saving conformity of {ic}...", foreground="blue")
 
-        # Update the CSV record
-        updated = False
-        rows = []
+    def record_conformity(self, ic, product_name, product_code, status, inspector, comments,
+                          major_defects, minor_defects):
+        """Update the CSV record and generate its certificate, runs on the writer thread
 
+        The certificate is one of the updates after the record is written, so
+        a retry after it failed does not write the record again.
+        """
         try:
-            with open("inspection_results.csv", mode="r", newline="", encoding="utf-8") as file:
-                reader = csv.reader(file)
-                headers = next(reader)
-                rows.append(headers)
-
-                for row in reader:
-                    if row[1] == ic:  # Match by Internal Code
-                        row[13] = status
-                        row[14] = inspector
-                        row[15] = comments
-                        row[11] = f"Major Defects Found: {major_defects}"
-                        row[12] = f"Minor Defects Found: {minor_defects}"
-                        
-                        # Update product name and code if they were provided
-                        if product_name:
-                            row[2] = product_name
-                        if product_code:
-                            row[3] = product_code
-                            
-                        updated = True
-                    rows.append(row)
-
-            if updated:
-                with open("inspection_results.csv", mode="w", newline="", encoding="utf-8") as file:
-                    writer = csv.writer(file)
-                    writer.writerows(rows)
-                
-                # Generate Word document
-                self.generate_certificate(
-                    ic, product_name, product_code, supplier, item_type, units, sample_size, 
-                    status, major_defects, minor_defects, inspector, comments
-                )
-                
-                messagebox.showinfo("Success", "Conformity data updated and certificate generated successfully")
-            else:
-                messagebox.showerror("Error", f"No record found with IC: {ic}")
-
+            with measure("save_conformity"):
+                try:
+                    cert_fields = update_conformity_record(
+                        ic, product_name, product_code, status, inspector, comments,
+                        major_defects, minor_defects, change_feed=self.change_feed, scorecard=self.scorecard,
+                        index=self.inspections, switching=self.switching
+                    )
+                    steps = []
+                except PartlySaved as e:
+                    cert_fields, steps = e.result, e.steps
+
+                if cert_fields is None:
+                    raise RejectedRecord(f"No record found with IC: {ic}")
+
+                def certificate():
+                    # Generate Word document, unless the same certificate already exists
+                    _, generated = self.certificates.ensure(
+                        ic=ic, product_name=product_name, product_code=product_code,
+                        supplier=cert_fields["supplier"], item_type=cert_fields["item_type"],
+                        units=cert_fields["units"], sample_size=cert_fields["sample_size"],
+                        status=status, major_defects=major_defects, minor_defects=minor_defects,
+                        inspector=inspector, comments=comments, inspection_level=cert_fields["inspection_level"]
+                    )
+                    attempt = cert_fields["attempt"]
+                    if generated:
+                        return f"Conformity of {ic} (attempt {attempt}) saved and certificate generated"
+                    return f"Conformity of {ic} (attempt {attempt}) saved, the certificate is unchanged"
+
+                return run_after_save(steps + [certificate])
         except FileNotFoundError:
-            messagebox.showerror("Error", "No inspection records found")
-
-    def generate_certificate(self, ic, product_name, product_code, supplier, item_type, units, sample_size, 
-                           status, major_defects, minor_defects, inspector, comments):
-        doc = Document()
-        
-        # Add title
-        title = doc.add_heading('RAW MATERIAL INSPECTION CERTIFICATE', level=0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Add company info
-        company = doc.add_paragraph()
-        company.add_run("Company Name: ").bold = True
-        company.add_run("Your Company Name Here\n")
-        company.add_run("Address: ").bold = True
-        company.add_run("123 Company Address, City, Country\n")
-        company.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Add certificate number and date
-        cert_info = doc.add_paragraph()
-        cert_info.add_run(f"Certificate No: RM-{ic}-{datetime.now().strftime('%Y%m%d')}\n")
-        cert_info.add_run(f"Date: {datetime.now().strftime('%Y-%m-%d')}\n")
-        cert_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Add horizontal line
-        doc.add_paragraph("_"*50).alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Add basic info table
-        table = doc.add_table(rows=8, cols=2)
-        table.style = 'Light Shading Accent 1'
-        
-        # Set column widths
-        for row in table.rows:
-            row.cells[0].width = Inches(2)
-            row.cells[1].width = Inches(4)
-        
-        # Fill table
-        data = [
-            ("Internal Code:", ic),
-            ("Product Name:", product_name),
-            ("Product Code:", product_code),
-            ("Supplier:", supplier),
-            ("Material Type:", item_type),
-            ("Batch Quantity:", units),
-            ("Sample Size:", sample_size),
-            ("Inspection Date:", datetime.now().strftime("%Y-%m-%d"))
-        ]
-        
-        for i, (label, value) in enumerate(data):
-            table.cell(i, 0).text = label
-            table.cell(i, 1).text = value
-        
-        # Add inspection results
-        doc.add_heading('Inspection Results', level=1)
-        
-        results_table = doc.add_table(rows=4, cols=2)
-        results_data = [
-            ("Status:", status),
-            ("Major Defects Found:", str(major_defects)),
-            ("Minor Defects Found:", str(minor_defects)),
-            ("AQL Level:", "Level II (General Inspection Level)")
-        ]
-        
-        for i, (label, value) in enumerate(results_data):
-            results_table.cell(i, 0).text = label
-            results_table.cell(i, 1).text = value
-        
-        # Add comments
-        doc.add_heading('Comments', level=1)
-        doc.add_paragraph(comments)
-        
-        # Add approval section
-        doc.add_heading('Approval', level=1)
-        approval_table = doc.add_table(rows=2, cols=2)
-        approval_table.cell(0, 0).text = "Inspector:"
-        approval_table.cell(0, 1).text = inspector
-        approval_table.cell(1, 0).text = "Date:"
-        approval_table.cell(1, 1).text = datetime.now().strftime('%Y-%m-%d')
-        
-        # Add footer
-        doc.add_paragraph("\n\n")
-        footer = doc.add_paragraph()
-        footer.add_run("This certificate is generated based on AQL inspection results.").italic = True
-        footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Save the document
-        if not os.path.exists("Certificates"):
-            os.makedirs("Certificates")
-            
-        filename = f"Certificates/RM_Certificate_{ic}_{datetime.now().strftime('%Y%m%d')}.docx"
-        doc.save(filename)
-        
-        return filename
+            raise RejectedRecord("No inspection records found")
+
+    def poll_writer(self):
+        """Show finished background saves in the status bar"""
+        colors = {"done": "green", "rejected": "red", "retrying": "orange", "failed": "red"}
+        for state, job in self.writer.finished():
+            text = self.writer.status_text(state, job)
+            pending = self.writer.pending()
+            if pending:
+                text += f" ({pending} still saving)"
+            self.status_label.config(text=text, foreground=colors[state])
+
+        if self.writer.failed:
+            self.retry_button.config(text=f"Retry Failed Saves ({len(self.writer.failed)})")
+            self.retry_button.pack(side=tk.RIGHT, padx=5)
+        else:
+            self.retry_button.pack_forget()
+        self.root.after(200, self.poll_writer)
+
+    def retry_failed_saves(self):
+        count = self.writer.retry_failed()
+        self.status_label.config(text=f"Saving {count} records again...", foreground="blue")
 
     def clear_conformity(self):
         self.conform_ic_entry.delete(0, tk.END)
@@ -606,62 +472,33 @@ class AQLInspector:
             self.results_tree.delete(item)
 
         try:
-            with open("inspection_results.csv", mode="r", newline="", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
-
-                for row in reader:
-                    # Skip header if present
-                    if "Timestamp" not in row:
-                        continue
-
-                    # Apply filters
-                    match = True
-
-                    # IC filter
-                    if search_ic and search_ic.lower() not in row["Internal Code"].lower():
-                        match = False
-
-                    # Product name filter
-                    if search_product_name and search_product_name.lower() not in row.get("Product Name", "").lower():
-                        match = False
-
-                    # Date range filter
-                    if start_date or end_date:
-                        try:
-                            record_date = datetime.strptime(row["Timestamp"], "%Y-%m-%d %H:%M:%S").date()
-
-                            if start_date:
-                                start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                                if record_date < start:
-                                    match = False
-
-                            if end_date:
-                                end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                                if record_date > end:
-                                    match = False
-                        except ValueError:
-                            pass
-
-                    if match:
-                        self.results_tree.insert("", "end", values=(
-                            row["Timestamp"],
-                            row["Internal Code"],
-                            row.get("Product Name", ""),
-                            row.get("Product Code", ""),
-                            row["Sampler"],
-                            row.get("Supplier", ""),
-                            row["Units"],
-                            row["Item Type"],
-                            row["Inspection Level"],
-                            row["Sample Size"],
-                            row["Major Defects"],
-                            row["Minor Defects"],
-                            row.get("Status", ""),
-                            row.get("Inspector", "")
-                        ))
-
+            with measure("search_records"), self.writer.lock:
+                records = search_inspection_records(search_ic, search_product_name, start_date, end_date,
+                                                    latest_only=self.latest_only_var.get(), index=self.inspections)
+                self.search_results = records
+
+                for row in records:
+                    self.results_tree.insert("", "end", values=(
+                        row["Timestamp"],
+                        row["Internal Code"],
+                        row["Attempt"],
+                        row.get("Product Name", ""),
+                        row.get("Product Code", ""),
+                        row["Sampler"],
+                        row.get("Supplier", ""),
+                        row["Units"],
+                        row["Item Type"],
+                        row["Inspection Level"],
+                        row["Sample Size"],
+                        defect_text(row, "Major"),
+                        defect_text(row, "Minor"),
+                        row.get("Status", ""),
+                        row.get("Inspector", "")
+                    ))
         except FileNotFoundError:
             messagebox.showerror("Error", "No inspection records found")
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format")
 
     def export_results(self):
         items = self.results_tree.get_children()
@@ -687,6 +524,46 @@ class AQLInspector:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {str(e)}")
 
+    def export_certificate_pdfs(self):
+        """Render the PDF certificates of the inspected lots in the search results"""
+        lots = inspected_lots(self.search_results)
+        if not lots:
+            messagebox.showwarning("Warning", "No inspected lots in the search results")
+            return
+
+        folder = filedialog.askdirectory(title="Save PDF Certificates To")
+        if not folder:
+            return  # User cancelled
+
+        try:
+            paths = render_certificate_pdfs(lots, folder)
+            messagebox.showinfo("Success", f"Exported {len(paths)} PDF certificates to:\n{folder}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export certificates: {str(e)}")
+
+    def export_scorecard(self):
+        """Save the scorecard per supplier, and per supplier and item type next to it"""
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            initialfile="supplier_scorecard.csv",
+            title="Save Supplier Scorecard"
+        )
+        if not filepath:
+            return  # User cancelled
+
+        try:
+            with self.writer.lock:
+                self.scorecard.ensure_current()
+                by_supplier = self.scorecard.table()
+                by_item = self.scorecard.table(by_item=True)
+            by_supplier.to_csv(filepath, index=False, float_format="%.2f")
+            item_path = filepath[:-4] + "_by_item.csv" if filepath.lower().endswith(".csv") else filepath + "_by_item.csv"
+            by_item.to_csv(item_path, index=False, float_format="%.2f")
+            messagebox.showinfo("Success", f"Scorecard of {len(by_supplier)} suppliers saved to:\n{filepath}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export scorecard: {str(e)}")
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = AQLInspector(root)
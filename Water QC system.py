@@ -1,16 +1,177 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, font, filedialog
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from tkcalendar import Calendar, DateEntry
 import os
 import pandas as pd
 import sys
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
+
+from qc_core import (DB_FILES, SCHEDULE, db_key_for,
+                     initialize_databases, SummaryCache, query_point_trends, load_results,
+                     build_trend_figure, build_word_report, ChangeFeed, count_write, instrumented, measure,
+                     display_frame, find_missing_samples, write_report_pdf, ChartRenderer, export_record,
+                     BackgroundWriter, EntryGrid, ColumnCache, write_recovery_file, RECOVERY_FILE)
+
+GRID_HINT = "Enter/F2 or type to edit · Tab/Enter to move · Space toggles · Ctrl+Enter saves all"
+
+# In-cell editing of a results table backed by an EntryGrid
+class GridEditor:
+    """Enter/F2 or typing starts editing the focused row, Tab/Shift-Tab move
+    between cells, Enter and Up/Down between rows, Escape cancels, Space
+    cycles a choice cell and Ctrl+Enter commits the whole grid."""
+    def __init__(self, table, context, on_commit, on_message):
+        self.table = table
+        self.context = context
+        self.on_commit = on_commit
+        self.on_message = on_message
+        self.grid = None
+        self.cell = None
+        self.editor = ttk.Entry(table)
+
+        for key in ("<Return>", "<F2>"):
+            table.bind(key, lambda e: self.begin(table.focus(), self.grid.columns[0]))
+        table.bind("<Double-1>", self.begin_at_click)
+        table.bind("<Key>", self.begin_typing)
+        table.bind("<Control-Return>", lambda e: self.on_commit())
+
+        self.editor.bind("<Return>", lambda e: self.move(rows=1))
+        self.editor.bind("<Down>", lambda e: self.move(rows=1))
+        self.editor.bind("<Up>", lambda e: self.move(rows=-1))
+        self.editor.bind("<Tab>", lambda e: self.move(columns=1))
+        for key in ("<Shift-Tab>", "<ISO_Left_Tab>"):
+            self.editor.bind(key, lambda e: self.move(columns=-1))
+        self.editor.bind("<Escape>", lambda e: self.cancel())
+        self.editor.bind("<space>", self.cycle_choice)
+        self.editor.bind("<Control-Return>", self.commit_all)
+        self.editor.bind("<FocusOut>", self.leave)
+
+    def load(self, grid):
+        """Show a new grid, one row per point with the point as item id"""
+        self.cancel()
+        self.grid = grid
+        self.table.delete(*self.table.get_children())
+        for point in grid.rows:
+            self.table.insert("", 'end', iid=point, values=grid.values(point), tags=(grid.tag(point),))
+
+    def add_point(self, point):
+        self.grid.add_point(point)
+        if not self.table.exists(point):
+            self.table.insert("", 'end', iid=point, values=self.grid.values(point))
+
+    def restore(self, record):
+        """Show a record that was not saved in its row again, False if the row was edited since"""
+        if not self.grid.restore(record):
+            return False
+        point = record["Point"]
+        if not self.table.exists(point):
+            self.table.insert("", 'end', iid=point)
+        self.table.item(point, values=self.grid.values(point), tags=(self.grid.tag(point),))
+        return True
+
+    def set(self, point, column, text):
+        """Enter a value and refresh only that row"""
+        self.grid.set(point, column, text, self.context())
+        self.table.item(point, values=self.grid.values(point), tags=(self.grid.tag(point),))
+
+    def begin(self, point, column, text=None):
+        if not point or column not in self.grid.columns:
+            return "break"
+        if self.cell is not None and not self.commit(refocus=False):
+            return "break"
+        self.table.see(point)
+        self.table.focus(point)
+        self.table.selection_set(point)
+        self.table.update_idletasks()
+        bbox = self.table.bbox(point, column)
+        if not bbox:
+            return "break"
+        x, y, width, height = bbox
+        self.cell = (point, column)
+        self.editor.delete(0, 'end')
+        if text is None:
+            self.editor.insert(0, self.grid.rows[point][column])
+            self.editor.select_range(0, 'end')
+        else:
+            self.editor.insert(0, text)
+        self.editor.place(x=x, y=y, width=width, height=height)
+        self.editor.focus_set()
+        return "break"
+
+    def begin_at_click(self, event):
+        point = self.table.identify_row(event.y)
+        column = self.table.identify_column(event.x)  # "#1" is the first column
+        if point and column:
+            return self.begin(point, self.table["columns"][int(column[1:]) - 1])
+
+    def begin_typing(self, event):
+        # Typing on a selected row starts editing its first cell with that character
+        if event.char and event.char.isprintable() and event.char != " " and not event.state & 0x4:
+            return self.begin(self.table.focus(), self.grid.columns[0], event.char)
+
+    def commit(self, refocus=True):
+        """Enter the edited cell, False (and the editor stays open) if the value is rejected"""
+        if self.cell is None:
+            return True
+        point, column = self.cell
+        try:
+            self.set(point, column, self.editor.get())
+        except ValueError as e:
+            self.on_message(str(e))
+            return False
+        self.cancel(refocus)
+        return True
+
+    def commit_all(self, event=None):
+        if self.commit():
+            self.on_commit()
+        return "break"
+
+    def cancel(self, refocus=True):
+        self.cell = None
+        self.editor.place_forget()
+        if refocus:
+            self.table.focus_set()
+        return "break"
+
+    def leave(self, event):
+        # Clicking elsewhere keeps the typed value, or drops it if it is not valid
+        if self.cell is not None and not self.commit(refocus=False):
+            self.cancel(refocus=False)
+
+    def move(self, rows=0, columns=0):
+        if self.cell is None:
+            return "break"
+        point, column = self.cell
+        if not self.commit(refocus=False):
+            return "break"
+        points = list(self.grid.rows)
+        i = points.index(point)
+        j = self.grid.columns.index(column) + columns
+        if j >= len(self.grid.columns):
+            i, j = i + 1, 0
+        elif j < 0:
+            i, j = i - 1, len(self.grid.columns) - 1
+        i += rows
+        if 0 <= i < len(points):
+            self.begin(points[i], self.grid.columns[j])
+        else:
+            self.table.focus_set()
+        return "break"
+
+    def cycle_choice(self, event):
+        if self.cell is None:
+            return None
+        point, column = self.cell
+        if column not in self.grid.choices:
+            return None  # Spaces are ordinary text elsewhere
+        try:
+            value = self.grid.resolve(column, self.editor.get())
+        except ValueError:
+            value = None
+        self.editor.delete(0, 'end')
+        self.editor.insert(0, self.grid.next_choice(column, value))
+        return "break"
 
 class WaterQCApp:
     def __init__(self, root):
@@ -82,19 +243,27 @@ class WaterQCApp:
                       background=[('active', self.button_hover)])
         
         # Database setup
-        self.DB_FILES = {
-            "Daily_Micro": "daily_microbiology.csv",
-            "Daily_Chem": "daily_chemistry.csv",
-            "Monthly_Micro": "monthly_microbiology.csv",
-            "Monthly_Chem": "monthly_chemistry.csv",
-            "Sanitization_Micro": "sanitization_microbiology.csv",
-            "Sanitization_Chem": "sanitization_chemistry.csv"
-        }
+        self.DB_FILES = DB_FILES
         self.initialize_databases()
+        self.summary_cache = SummaryCache(self.DB_FILES)
+        # Column files of the databases, so loads never read a whole history into memory
+        self.column_cache = ColumnCache(self.DB_FILES)
+        self.change_feed = ChangeFeed()
+        self.charts = ChartRenderer()
+        # Exports are written in the background and confirmed in the status bar
+        self.writer = BackgroundWriter()
         
         # Data storage
         self.current_data = []
         
+        # Results loaded in the Results Viewer, kept as the source DataFrame
+        # so reports, graphs and exports don't round-trip through the Treeview
+        self.results_df = None
+        self.results_db = None
+        self.results_range = None
+        self.results_spc = None
+        self.graph_canvas = None
+        
         # Main container
         main_frame = ttk.Frame(root, style='Main.TFrame')
         main_frame.pack(fill='both', expand=True, padx=20, pady=20)
@@ -127,7 +296,7 @@ class WaterQCApp:
 
         # Day selection (only for daily)
         self.day_label = ttk.Label(control_frame, text="3. Select Day:")
-        self.day_combo = ttk.Combobox(control_frame, values=["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday"], state='readonly')
+        self.day_combo = ttk.Combobox(control_frame, values=list(SCHEDULE.working_days), state='readonly')
         
         # Additional point selection (only for daily)
         self.add_point_label = ttk.Label(control_frame, text="4. Add Additional Point:")
@@ -143,86 +312,27 @@ class WaterQCApp:
         self.setup_chem_tab()
         self.setup_results_viewer_tab()
         
-        # Status label
-        self.status_label = ttk.Label(main_frame, text="Ready", foreground='blue')
-        self.status_label.pack(fill='x', pady=10)
+        # Status bar, saves are confirmed here instead of in a dialog
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(fill='x', pady=10)
+        self.status_label = ttk.Label(status_frame, text="Ready", foreground='blue')
+        self.status_label.pack(side='left', fill='x', expand=True)
+        self.retry_btn = ttk.Button(status_frame, text="Retry Failed Saves", command=self.retry_failed_saves)
 
-        # Define all points and limits
-        self.ALL_POINTS = [
-            "city", "feed_water", "after_cl", "Before_sand_filter", "after_sand_filter",
-            "After_Soft_1", "After_Soft_2", "After_10µFilter", "after_soft_tank", "after_smbs",
-            "RO1_A", "RO1_B", "RO1_AB", "RO2", "After_EDI", "Before_PW_tank", "loop_supply",
-            "loop_return", "after_heat_exchange", "UV_lamp", "PW1", "PW2", "PW3", "PWMb", "PW4", "PW5"
-        ]
-        
-        # Microbiology limits
-        self.CFU_LIMITS = {
-            "city": 500, "feed_water": 500, "after_cl": 500, "Before_sand_filter": 500,
-            "after_sand_filter": 500, "After_Soft_1": 500, "After_Soft_2": 500,
-            "After_10µFilter": 500, "after_soft_tank": 500, "after_smbs": 500,
-            "RO1_A": 500, "RO1_B": 500, "RO1_AB": 500, "RO2": 100, "After_EDI": 100,
-            "Before_PW_tank": 100, "loop_supply": 100, "loop_return": 100,
-            "after_heat_exchange": 100, "UV_lamp": 100, "PW1": 100, "PW2": 100,
-            "PW3": 100, "PWMb": 100, "PW4": 100, "PW5": 100
-        }
-        
-        # Chemistry limits
-        self.CHEM_LIMITS = {
-            "Conductivity": {
-                "city": 1000, "feed_water": 1000, "after_cl": 1000, "Before_sand_filter": 1000,
-                "after_sand_filter": 1000, "After_Soft_1": 1000, "After_Soft_2": 1000,
-                "After_10µFilter": 1000, "after_soft_tank": 1000, "after_smbs": 1000,
-                "RO1_A": 40, "RO1_B": 40, "RO1_AB": 40, "RO2": 40, "After_EDI": 1.3,
-                "Before_PW_tank": 1.3, "loop_supply": 1.3, "loop_return": 1.3,
-                "after_heat_exchange": 1.3, "UV_lamp": 1.3, "PW1": 1.3, "PW2": 1.3,
-                "PW3": 1.3, "PWMb": 1.3, "PW4": 1.3, "PW5": 1.3
-            },
-            "Cl_Allowed_Points": ["city", "after_sand_filter", "After_Soft_2"]
-        }
-        
-        # Daily test points
-        self.DAILY_MICRO_POINTS = {
-            "Sunday": ["PW1", "PW2", "PW3","PW4", "PW5","RO2", "loop_return", "loop_supply", "After_Soft_1"],
-            "Monday": ["PW1", "PW2", "PW3","PW4", "PW5","RO2", "loop_return", "loop_supply", "After_Soft_2", "After_EDI"],
-            "Tuesday": ["PW1", "PW2", "PW3","PW4", "PW5","RO2", "loop_return", "loop_supply", "after_soft_tank", "Before_PW_tank"],
-            "Wednesday": ["PW1", "PW2", "PW3","PW4", "PW5","RO2", "loop_return", "loop_supply", "after_heat_exchange", "UV_lamp"],
-            "Thursday": ["PW1", "PW2", "PW3","PW4", "PW5","RO2", "loop_return", "loop_supply", "PWMb"]
-        }
-        
-        self.DAILY_CHEM_POINTS = {
-            "Sunday": ["PW1", "PW2", "PW3","PW4", "PW5", "loop_return", "loop_supply", "RO2"],
-            "Monday": ["PW1", "PW2", "PW3","PW4", "PW5", "loop_return", "loop_supply", "After_Soft_2", "After_EDI"],
-            "Tuesday": ["PW1", "PW2", "PW3","PW4", "PW5", "loop_return", "loop_supply", "Before_PW_tank"],
-            "Wednesday": ["PW1", "PW2", "PW3","PW4", "PW5", "loop_return", "loop_supply", "after_heat_exchange", "UV_lamp"],
-            "Thursday": ["PW1", "PW2", "PW3","PW4", "PW5", "loop_return", "loop_supply", "PWMb"]
-        }
-        
-        self.MONTHLY_CHEM = ["city", "Before_sand_filter", "After_Soft_2", "RO1_A", "RO1_B", "RO1_AB"]
-        self.MONTHLY_MICRO = self.MONTHLY_CHEM + ["feed_water", "after_cl", "after_sand_filter", "After_10µFilter", "after_smbs"]
+        # Points and test plans, compiled once from the schedule file
+        self.schedule = SCHEDULE
+        self.micro_points = set()
+        self.chem_points = set()
         
         # Initialize UI
         self.update_test_ui()
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after(200, self.poll_writer)
 
     def initialize_databases(self):
         """Create database files with headers in QC_Databases folder using pandas"""
-        os.makedirs("QC_Databases", exist_ok=True)
-        
-        for db_key, filename in self.DB_FILES.items():
-            filepath = os.path.join("QC_Databases", filename)
-            if not os.path.exists(filepath):
-                if "Micro" in db_key:
-                    df = pd.DataFrame(columns=[
-                        "Date", "Test Type", "Day", "Point",
-                        "Total Count", "Coliforms", "Pseudomonas",
-                        "Status", "Comments"
-                    ])
-                else:
-                    df = pd.DataFrame(columns=[
-                        "Date", "Test Type", "Day", "Point",
-                        "Conductivity", "Oxidizable", "Cl Test",
-                        "Status", "Comments"
-                    ])
-                df.to_csv(filepath, index=False)
+        initialize_databases(self.DB_FILES)
         print("Database files initialized in QC_Databases folder")
 
     def setup_results_viewer_tab(self):
@@ -256,7 +366,7 @@ class WaterQCApp:
         
         ttk.Label(type_frame, text="Test Type:").pack(side='left', padx=5)
         self.results_test_type = ttk.Combobox(type_frame, 
-                                            values=["Daily", "After Sanitization"], 
+                                            values=["Daily", "Monthly", "After Sanitization"], 
                                             state='readonly')
         self.results_test_type.pack(side='left', padx=5)
         self.results_test_type.set("Daily")
@@ -278,6 +388,9 @@ class WaterQCApp:
         
         ttk.Button(button_frame, text="Load Data", command=self.load_results_data).pack(side='left', padx=5)
         ttk.Button(button_frame, text="Generate Word Report", command=self.generate_word_report).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Export to CSV", command=self.export_results_csv).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Export Point Trends", command=self.export_point_trends).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Missing Samples", command=self.export_missing_samples).pack(side='left', padx=5)
         
         # Results display area
         results_display_frame = ttk.Frame(paned_window)
@@ -316,6 +429,10 @@ class WaterQCApp:
         self.graph_canvas_frame = ttk.Frame(graph_frame)
         self.graph_canvas_frame.pack(fill='both', expand=True)
 
+    def results_db_key(self):
+        """Database selected by the Results Viewer test and data type"""
+        return db_key_for(self.results_test_type.get(), self.results_data_type.get() == "Microbiology")
+
     def load_results_data(self):
         """Load historical data based on selected criteria"""
         date_from = self.date_from.get_date()
@@ -328,7 +445,7 @@ class WaterQCApp:
             return
         
         # Determine which file to load
-        file_key = f"{'Sanitization' if test_type == 'After Sanitization' else 'Daily'}_{'Micro' if data_type == 'Microbiology' else 'Chem'}"
+        file_key = self.results_db_key()
         filepath = os.path.join("QC_Databases", self.DB_FILES[file_key])
         
         if not os.path.exists(filepath):
@@ -336,96 +453,69 @@ class WaterQCApp:
             return
         
         try:
-            # Load and filter data
-            df = pd.read_csv(filepath)
-            df['Date'] = pd.to_datetime(df['Date'])
-            mask = (df['Date'] >= pd.to_datetime(date_from)) & (df['Date'] <= pd.to_datetime(date_to))
-            filtered_df = df[mask]
+            with measure("load_results_data"):
+                # Load and filter data
+                filtered_df, spc = load_results(filepath, date_from, date_to, data_type,
+                                                column_store=self.column_cache.store(file_key),
+                                                lock=self.writer.lock)
+                if not filtered_df.empty:
+                    self.show_results(filtered_df, file_key, (date_from, date_to), spc, data_type)
             
             if filtered_df.empty:
                 messagebox.showinfo("Info", "No data found for selected date range")
-                return
-            
-            # Clear previous data
-            for item in self.results_table.get_children():
-                self.results_table.delete(item)
-            
-            # Configure columns based on data type
-            self.results_table["columns"] = list(filtered_df.columns)
-            for col in filtered_df.columns:
-                self.results_table.heading(col, text=col)
-                self.results_table.column(col, width=100, anchor='center')
-            
-            # Add data to table
-            for _, row in filtered_df.iterrows():
-                self.results_table.insert("", 'end', values=list(row))
-            
-            # Update graph
-            self.update_graph(filtered_df, data_type)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load data: {str(e)}")
 
-    def update_graph(self, df, data_type):
-        """Update the graph with loaded data"""
-        # Clear previous graph
-        for widget in self.graph_canvas_frame.winfo_children():
-            widget.destroy()
-        
-        # Create figure
-        fig = Figure(figsize=(8, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        
-        # Convert dates for plotting
-        dates = [datetime.strptime(d, '%Y-%m-%d') for d in df['Date']]
-        
-        if data_type == "Microbiology":
-            # Plot microbiology data
-            points = df['Point'].unique()
-            
-            for point in points:
-                point_data = df[df['Point'] == point]
-                counts = point_data['Total Count'].apply(lambda x: float(x) if str(x).isdigit() else 0)
-                ax.plot(dates, counts, 'o-', label=point)
-            
-            ax.set_ylabel('CFU/mL')
-            ax.set_title('Microbiology Results Over Time')
-            
+    def show_results(self, filtered_df, file_key, date_range, spc, data_type):
+        """Keep the loaded results and show them in the table and graph"""
+        # Keep the typed DataFrame as the loaded result
+        self.results_df = filtered_df
+        self.results_db = file_key
+        self.results_range = date_range
+        self.results_spc = spc
+        
+        # Clear previous data
+        self.results_table.delete(*self.results_table.get_children())
+        
+        # Add data to table (display only, nothing reads it back)
+        display_df = display_frame(filtered_df)
+        
+        # Configure columns based on data type
+        self.results_table["columns"] = list(display_df.columns)
+        self.results_table["show"] = "headings"
+        for col in display_df.columns:
+            self.results_table.heading(col, text=col)
+            self.results_table.column(col, width=100, anchor='center')
+        
+        for row in display_df.itertuples(index=False, name=None):
+            self.results_table.insert("", 'end', values=row)
+        
+        # Update graph
+        self.update_graph(filtered_df, data_type, self.results_spc)
+
+    @instrumented()
+    def update_graph(self, df, data_type, spc=None):
+        """Update the graph with loaded data and SPC limits/signals"""
+        # The canvas and its figure are created once and redrawn on later loads
+        if self.graph_canvas is None:
+            fig = build_trend_figure(df, data_type, spc)
+            self.graph_canvas = FigureCanvasTkAgg(fig, master=self.graph_canvas_frame)
+            self.graph_canvas.get_tk_widget().pack(fill='both', expand=True)
         else:
-            # Plot chemistry data
-            points = df['Point'].unique()
-            
-            for point in points:
-                point_data = df[df['Point'] == point]
-                conductivity = point_data['Conductivity'].apply(lambda x: float(x) if pd.notna(x) and str(x).replace('.', '').isdigit() else 0)
-                ax.plot(dates, conductivity, 'o-', label=point)
-            
-            ax.set_ylabel('Conductivity (µS/cm)')
-            ax.set_title('Chemistry Results Over Time')
-        
-        # Format x-axis
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, len(dates)//5)))
-        fig.autofmt_xdate()
-        
-        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        ax.grid(True)
-        
-        # Embed in Tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.graph_canvas_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
+            build_trend_figure(df, data_type, spc, fig=self.graph_canvas.figure)
+        self.graph_canvas.draw()
 
     def generate_word_report(self):
-        """Generate a Word report from the loaded data"""
-        if not self.results_table.get_children():
+        """Generate a Word or PDF report from the loaded data"""
+        if self.results_df is None:
             messagebox.showerror("Error", "No data loaded to generate report")
             return
         
         # Ask for save location
         filepath = filedialog.asksaveasfilename(
             defaultextension=".docx",
-            filetypes=[("Word Documents", "*.docx")],
+            filetypes=[("Word Documents", "*.docx"), ("PDF Files", "*.pdf")],
             title="Save Report As"
         )
         
@@ -433,87 +523,107 @@ class WaterQCApp:
             return  # User cancelled
         
         try:
-            # Create document
-            doc = Document()
-            
-            # Add title
-            title = doc.add_heading('Water QC Report', level=1)
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Add report details
-            test_type = self.results_test_type.get()
-            data_type = self.results_data_type.get()
-            date_from = self.date_from.get_date().strftime('%Y-%m-%d')
-            date_to = self.date_to.get_date().strftime('%Y-%m-%d')
-            
-            details = doc.add_paragraph()
-            details.add_run(f"Test Type: {test_type}\n").bold = True
-            details.add_run(f"Data Type: {data_type}\n").bold = True
-            details.add_run(f"Date Range: {date_from} to {date_to}\n").bold = True
-            details.add_run("\n")
-            
-            # Add summary statistics
-            doc.add_heading('Summary Statistics', level=2)
-            
-            # Get data from table
-            data = []
-            columns = self.results_table["columns"]
-            for item in self.results_table.get_children():
-                values = self.results_table.item(item)['values']
-                data.append(dict(zip(columns, values)))
-            
-            df = pd.DataFrame(data)
-            
-            # Add statistics table
-            if data_type == "Microbiology":
-                stats = df.groupby('Point')['Total Count'].agg(['count', 'mean', 'max'])
-                stats.columns = ['Samples', 'Average CFU/mL', 'Max CFU/mL']
-            else:
-                stats = df.groupby('Point')['Conductivity'].agg(['count', 'mean', 'max'])
-                stats.columns = ['Samples', 'Average Conductivity', 'Max Conductivity']
-            
-            # Add statistics table to document
-            table = doc.add_table(stats.shape[0]+1, stats.shape[1])
-            
-            # Header row
-            hdr_cells = table.rows[0].cells
-            for i, col in enumerate(stats.columns):
-                hdr_cells[i].text = col
-            
-            # Data rows
-            for i, (index, row) in enumerate(stats.iterrows(), 1):
-                row_cells = table.rows[i].cells
-                row_cells[0].text = str(index)
-                for j, value in enumerate(row, 1):
-                    row_cells[j].text = f"{value:.2f}"
-            
-            # Add non-conforming results section
-            doc.add_heading('Non-Conforming Results', level=2)
-            non_conforming = df[df['Status'].str.contains('Non-Conform', na=False)]
-            
-            if len(non_conforming) > 0:
-                table = doc.add_table(non_conforming.shape[0]+1, non_conforming.shape[1])
-                
-                # Header row
-                hdr_cells = table.rows[0].cells
-                for i, col in enumerate(non_conforming.columns):
-                    hdr_cells[i].text = col
-                
-                # Data rows
-                for i, (_, row) in enumerate(non_conforming.iterrows(), 1):
-                    row_cells = table.rows[i].cells
-                    for j, value in enumerate(row):
-                        row_cells[j].text = str(value)
-            else:
-                doc.add_paragraph("No non-conforming results found in this period.")
-            
-            # Save document
-            doc.save(filepath)
+            # Statistics come from the cached month partials, only the edge
+            # months of the range are computed from the loaded rows
+            with measure("generate_word_report"):
+                with self.writer.lock:
+                    stats = self.summary_cache.summarize(self.results_db, *self.results_range, df=self.results_df)
+                if filepath.lower().endswith(".pdf"):
+                    write_report_pdf(filepath, self.results_df, self.results_db, self.results_range,
+                                     stats, self.results_spc)
+                else:
+                    doc = build_word_report(self.results_df, self.results_db, self.results_range,
+                                            stats, self.results_spc, charts=self.charts)
+                    
+                    # Save document
+                    doc.save(filepath)
+                    count_write(filepath)
             messagebox.showinfo("Success", f"Report saved successfully to:\n{filepath}")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
 
+    def export_results_csv(self):
+        """Export the loaded results to CSV"""
+        if self.results_df is None:
+            messagebox.showwarning("Warning", "No results to export")
+            return
+        
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv")],
+            title="Export Results As"
+        )
+        
+        if not filepath:
+            return  # User cancelled
+        
+        try:
+            display_frame(self.results_df).to_csv(filepath, index=False)
+            messagebox.showinfo("Success", f"Exported {len(self.results_df)} records to:\n{filepath}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export: {str(e)}")
+
+    def export_point_trends(self):
+        """Export micro and chem results of all test types, joined per point and date"""
+        date_from = self.date_from.get_date()
+        date_to = self.date_to.get_date()
+        
+        if date_from > date_to:
+            messagebox.showerror("Error", "End date must be after start date")
+            return
+        
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv")],
+            title="Export Point Trends As"
+        )
+        
+        if not filepath:
+            return  # User cancelled
+        
+        try:
+            with self.writer.lock:
+                trends = query_point_trends(self.DB_FILES, date_from=date_from, date_to=date_to)
+            if not trends:
+                messagebox.showinfo("Info", "No data found for selected date range")
+                return
+            
+            combined = pd.concat(trends, names=["Point", "Date"]).reset_index()
+            display_frame(combined).to_csv(filepath, index=False)
+            messagebox.showinfo("Success", f"Exported trends for {len(trends)} points to:\n{filepath}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export trends: {str(e)}")
+
+    def export_missing_samples(self):
+        """Export scheduled samples of the selected range that have no recorded result"""
+        date_from = self.date_from.get_date()
+        date_to = self.date_to.get_date()
+        
+        if date_from > date_to:
+            messagebox.showerror("Error", "End date must be after start date")
+            return
+        
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv")],
+            title="Export Missing Samples As"
+        )
+        
+        if not filepath:
+            return  # User cancelled
+        
+        try:
+            with measure("export_missing_samples"):
+                with self.writer.lock:
+                    missing, per_point = find_missing_samples(date_from, date_to, db_files=self.DB_FILES)
+                missing.to_csv(filepath, index=False)
+                per_point.to_csv(os.path.splitext(filepath)[0] + "_per_point.csv")
+            overdue = per_point["Overdue"].sum()
+            messagebox.showinfo("Success", f"{len(missing)} missing samples ({overdue} overdue) exported to:\n{filepath}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to check missing samples: {str(e)}")
+
     def open_calendar(self):
         """Open calendar popup"""
         top = tk.Toplevel(self.root)
@@ -557,9 +667,7 @@ class WaterQCApp:
             # Update available points for additional selection
             day = self.day_combo.get()
             if day:
-                # Combine used points from both micro and chem
-                used_points = set(self.DAILY_MICRO_POINTS.get(day, []) + self.DAILY_CHEM_POINTS.get(day, []))
-                available_points = [p for p in self.ALL_POINTS if p not in used_points]
+                available_points = self.schedule.extra_points(day)
                 self.add_point_combo['values'] = available_points
                 if available_points:
                     self.add_point_combo.current(0)
@@ -584,20 +692,17 @@ class WaterQCApp:
             return
             
         # Add to microbiology table if not already present
-        micro_points = {self.micro_table.item(item)['values'][0] for item in self.micro_table.get_children()}
-        if point not in micro_points:
-            self.micro_table.insert("", 'end', values=(point, "", "Absent", "Absent", ""))
+        if point not in self.micro_points:
+            self.micro_editor.add_point(point)
+            self.micro_points.add(point)
         
         # Add to chemistry table if not already present
-        chem_points = {self.chem_table.item(item)['values'][0] for item in self.chem_table.get_children()}
-        if point not in chem_points:
-            self.chem_table.insert("", 'end', values=(point, "", "", "", ""))
+        if point not in self.chem_points:
+            self.chem_editor.add_point(point)
+            self.chem_points.add(point)
         
         # Update available points
-        used_points = set(self.DAILY_MICRO_POINTS.get(day, []) + 
-                         self.DAILY_CHEM_POINTS.get(day, []) + 
-                         list(micro_points))
-        available_points = [p for p in self.ALL_POINTS if p not in used_points]
+        available_points = self.schedule.extra_points(day, self.micro_points)
         self.add_point_combo['values'] = available_points
         if available_points:
             self.add_point_combo.current(0)
@@ -609,34 +714,24 @@ class WaterQCApp:
         test_type = self.test_type.get()
         day = self.day_combo.get() if test_type == "Daily" else None
         
-        if test_type == "After Sanitization":
-            points = self.ALL_POINTS
-            micro_points = points
-            chem_points = points
-        elif test_type == "Monthly":
-            micro_points = self.MONTHLY_MICRO
-            chem_points = self.MONTHLY_CHEM
-        elif test_type == "Daily" and day:
-            micro_points = self.DAILY_MICRO_POINTS.get(day, [])
-            chem_points = self.DAILY_CHEM_POINTS.get(day, [])
-        else:
-            micro_points = []
-            chem_points = []
+        micro_points, chem_points = self.schedule.points_for(test_type, day)
+        self.micro_points = set(micro_points)
+        self.chem_points = set(chem_points)
+        
+        # Rows entered for the previous selection are kept for export
+        self.collect_grid_rows()
         
         # Update microbiology table
-        self.micro_table.delete(*self.micro_table.get_children())
-        for point in micro_points:
-            self.micro_table.insert("", 'end', values=(point, "", "Absent", "Absent", ""))
+        self.micro_grid = EntryGrid("Microbiology", micro_points)
+        self.micro_editor.load(self.micro_grid)
         
         # Update chemistry table
-        self.chem_table.delete(*self.chem_table.get_children())
-        for point in chem_points:
-            self.chem_table.insert("", 'end', values=(point, "", "", "", ""))
+        self.chem_grid = EntryGrid("Chemistry", chem_points)
+        self.chem_editor.load(self.chem_grid)
         
         # Update available additional points for daily tests
         if test_type == "Daily" and day:
-            used_points = set(self.DAILY_MICRO_POINTS.get(day, []) + self.DAILY_CHEM_POINTS.get(day, []))
-            available_points = [p for p in self.ALL_POINTS if p not in used_points]
+            available_points = self.schedule.extra_points(day)
             self.add_point_combo['values'] = available_points
             if available_points:
                 self.add_point_combo.current(0)
@@ -670,7 +765,7 @@ class WaterQCApp:
         
         # Table
         self.micro_table = ttk.Treeview(tree_scroll, 
-                                      columns=("Point", "Total Count", "Coliforms", "Pseudomonas", "Status"), 
+                                      columns=("Point", "Total Count", "Coliforms", "Pseudomonas", "Status", "Comments"), 
                                       show='headings',
                                       yscrollcommand=y_scroll.set,
                                       xscrollcommand=x_scroll.set)
@@ -681,12 +776,14 @@ class WaterQCApp:
         self.micro_table.heading("Coliforms", text="Coliforms")
         self.micro_table.heading("Pseudomonas", text="Pseudomonas")
         self.micro_table.heading("Status", text="Status")
+        self.micro_table.heading("Comments", text="Comments")
         
         self.micro_table.column("Point", width=150, anchor='w')
         self.micro_table.column("Total Count", width=120, anchor='center')
         self.micro_table.column("Coliforms", width=100, anchor='center')
         self.micro_table.column("Pseudomonas", width=100, anchor='center')
         self.micro_table.column("Status", width=120, anchor='center')
+        self.micro_table.column("Comments", width=250, anchor='w')
         
         self.micro_table.pack(fill='both', expand=True)
         
@@ -699,6 +796,12 @@ class WaterQCApp:
         self.micro_table.tag_configure('Warning', background='#fff3cd')
         self.micro_table.tag_configure('Conform', background='#ccffcc')
         
+        # Results are typed straight into the table
+        self.micro_editor = GridEditor(self.micro_table, self.entry_context, self.export_data, self.show_grid_message)
+        self.micro_grid = EntryGrid("Microbiology")
+        self.micro_editor.load(self.micro_grid)
+        ttk.Label(table_frame, text=GRID_HINT).pack(anchor='w', pady=(5, 0))
+        
         # Data entry frame
         entry_frame = ttk.Frame(paned_window)
         paned_window.add(entry_frame, weight=1)  # 30% of space
@@ -770,7 +873,7 @@ class WaterQCApp:
         
         # Table
         self.chem_table = ttk.Treeview(tree_scroll, 
-                                     columns=("Point", "Conductivity", "Oxidizable", "Cl Test", "Status"), 
+                                     columns=("Point", "Conductivity", "Oxidizable", "Cl Test", "Status", "Comments"), 
                                      show='headings',
                                      yscrollcommand=y_scroll.set,
                                      xscrollcommand=x_scroll.set)
@@ -781,12 +884,14 @@ class WaterQCApp:
         self.chem_table.heading("Oxidizable", text="Oxidizable Substances")
         self.chem_table.heading("Cl Test", text="Chloride Test (ppm)")
         self.chem_table.heading("Status", text="Status")
+        self.chem_table.heading("Comments", text="Comments")
         
         self.chem_table.column("Point", width=150, anchor='w')
         self.chem_table.column("Conductivity", width=120, anchor='center')
         self.chem_table.column("Oxidizable", width=150, anchor='center')
         self.chem_table.column("Cl Test", width=120, anchor='center')
         self.chem_table.column("Status", width=120, anchor='center')
+        self.chem_table.column("Comments", width=250, anchor='w')
         
         self.chem_table.pack(fill='both', expand=True)
         
@@ -799,6 +904,12 @@ class WaterQCApp:
         self.chem_table.tag_configure('Warning', background='#fff3cd')
         self.chem_table.tag_configure('Conform', background='#ccffcc')
         
+        # Results are typed straight into the table
+        self.chem_editor = GridEditor(self.chem_table, self.entry_context, self.export_data, self.show_grid_message)
+        self.chem_grid = EntryGrid("Chemistry")
+        self.chem_editor.load(self.chem_grid)
+        ttk.Label(table_frame, text=GRID_HINT).pack(anchor='w', pady=(5, 0))
+        
         # Data entry frame
         entry_frame = ttk.Frame(paned_window)
         paned_window.add(entry_frame, weight=1)  # 30% of space
@@ -849,8 +960,7 @@ class WaterQCApp:
         
         selected = table.focus()
         if selected:
-            point = table.item(selected)["values"][0]
-            label.config(text=point)
+            label.config(text=selected)  # Rows are keyed by their point
 
     def add_micro_data(self):
         """Add microbiology data with point-specific limits"""
@@ -859,47 +969,11 @@ class WaterQCApp:
             messagebox.showerror("Error", "Please select a point first!")
             return
         
-        point = self.micro_table.item(selected)["values"][0]
-        count = self.micro_count.get()
-        coliforms = self.coliforms.get()
-        pseudomonas = self.pseudomonas.get()
-        comments = self.micro_comments.get("1.0", 'end-1c')
-        
-        # Get the specific limit for this point
-        limit = self.CFU_LIMITS.get(point, 500)
-        
-        # Validation
-        status = "Conform"
-        if count.isdigit():
-            count_int = int(count)
-            if count_int > limit:
-                status = "Non-Conform"
-            elif count_int > 0.4 * limit:
-                status = "Warning"
-        else:
-            status = "Invalid Input"
-        
-        if coliforms == "Present" or pseudomonas == "Present":
-            status = "Non-Conform (Microbial)"
-        
-        # Update table
-        self.micro_table.item(selected, 
-                            values=(point, count, coliforms, pseudomonas, status),
-                            tags=(status,))
-        
-        # Save data
-        self.current_data.append({
-            "Date": self.date_entry.get(),
-            "Test Type": self.test_type.get(),
-            "Day": self.day_combo.get() if self.test_type.get() == "Daily" else "",
-            "Point": point,
-            "Total Count": count,
-            "Coliforms": coliforms,
-            "Pseudomonas": pseudomonas,
-            "Status": status,
-            "Comments": comments,
-            "Tab": "Microbiology"
-        })
+        # Same as typing the values into the row, which is validated against the point's limit
+        self.micro_editor.set(selected, "Total Count", self.micro_count.get())
+        self.micro_editor.set(selected, "Coliforms", self.coliforms.get())
+        self.micro_editor.set(selected, "Pseudomonas", self.pseudomonas.get())
+        self.micro_editor.set(selected, "Comments", self.micro_comments.get("1.0", 'end-1c'))
         
         # Clear entries
         self.micro_count.delete(0, 'end')
@@ -914,69 +988,11 @@ class WaterQCApp:
             messagebox.showerror("Error", "Please select a point first!")
             return
         
-        point = self.chem_table.item(selected)["values"][0]
-        conductivity = self.conductivity.get()
-        oxidizable = self.oxidizable.get()
-        cl_test = self.cl_test.get()
-        comments = self.chem_comments.get("1.0", 'end-1c')
-        
-        # Check conformance
-        status = "Conform"
-        issues = []
-        
-        # Check conductivity
-        if conductivity:
-            try:
-                cond_value = float(conductivity)
-                limit = self.CHEM_LIMITS["Conductivity"].get(point, 1.3)  # Default PW limit
-                if cond_value > limit:
-                    issues.append(f"Conductivity > {limit} µS/cm")
-            except ValueError:
-                issues.append("Invalid conductivity value")
-        
-        # Check oxidizable substances
-        if oxidizable == "Color change":
-            issues.append("Oxidizable substances detected")
-        
-        # Check chloride test
-        if cl_test:
-            try:
-                cl_value = float(cl_test)
-                # Special points where >0.5 is acceptable (conform)
-                if point in self.CHEM_LIMITS["Cl_Allowed_Points"]:
-                    if cl_value <= 0.5:  # Only non-conform if ≤ 0.5 for these points
-                        issues.append(f"Chloride ≤ 0.5 ppm (needs to be > 0.5 for this point)")
-                else:
-                    # For all other points, any chloride is non-conform
-                    if cl_value > 0:
-                        issues.append("Chloride detected (should be 0)")
-            except ValueError:
-                issues.append("Invalid chloride value")
-        
-        # Determine final status
-        if issues:
-            status = "Non-Conform: " + ", ".join(issues)
-        elif not conductivity and not cl_test:
-            status = "Incomplete data"
-        
-        # Update table
-        self.chem_table.item(selected, 
-                           values=(point, conductivity, oxidizable, cl_test, status),
-                           tags=("Non-Conform" if issues else "Conform",))
-        
-        # Save data
-        self.current_data.append({
-            "Date": self.date_entry.get(),
-            "Test Type": self.test_type.get(),
-            "Day": self.day_combo.get() if self.test_type.get() == "Daily" else "",
-            "Point": point,
-            "Conductivity": conductivity,
-            "Oxidizable": oxidizable,
-            "Cl Test": cl_test,
-            "Status": status,
-            "Comments": comments,
-            "Tab": "Chemistry"
-        })
+        # Same as typing the values into the row, which is checked for conformance
+        self.chem_editor.set(selected, "Conductivity", self.conductivity.get())
+        self.chem_editor.set(selected, "Oxidizable", self.oxidizable.get())
+        self.chem_editor.set(selected, "Cl Test", self.cl_test.get())
+        self.chem_editor.set(selected, "Comments", self.chem_comments.get("1.0", 'end-1c'))
         
         # Clear entries
         self.conductivity.delete(0, 'end')
@@ -984,112 +1000,92 @@ class WaterQCApp:
         self.cl_test.delete(0, 'end')
         self.chem_comments.delete("1.0", tk.END)
 
-    def check_for_duplicates(self, df, new_record):
-        """Check if a record with same date, point and test type already exists"""
-        mask = (
-            (df['Date'] == new_record['Date']) & 
-            (df['Point'] == new_record['Point']) & 
-            (df['Test Type'] == new_record['Test Type'])
-        )
-        return df[mask].empty
+    def entry_context(self):
+        """Date, test type and day the rows are being entered for"""
+        return {
+            "Date": self.date_entry.get(),
+            "Test Type": self.test_type.get(),
+            "Day": self.day_combo.get() if self.test_type.get() == "Daily" else ""
+        }
+
+    def show_grid_message(self, text):
+        self.status_label.config(text=text, foreground='red')
+
+    def collect_grid_rows(self):
+        """Move the rows entered in the tables to the records waiting for export"""
+        self.current_data.extend(self.micro_grid.take_records())
+        self.current_data.extend(self.chem_grid.take_records())
 
     def export_data(self):
-        """Export all data to appropriate database files using pandas"""
+        """Queue the entered records for the background writer, one job per record"""
+        self.collect_grid_rows()
         if not self.current_data:
-            messagebox.showerror("Error", "No data to export!")
+            self.status_label.config(text="No data to export", foreground='red')
             return
         
-        exported_files = set()
-        errors = []
-        
+        # Each record logs its own export_data metrics line, the batch id ties them together
+        batch = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
         for record in self.current_data:
-            test_type = record["Test Type"]
-            is_micro = record["Tab"] == "Microbiology"
-            
-            # Determine which database file to use
-            if test_type == "After Sanitization":
-                db_key = f"Sanitization_{'Micro' if is_micro else 'Chem'}"
-            else:
-                db_key = f"{test_type}_{'Micro' if is_micro else 'Chem'}"
-                
-            filename = self.DB_FILES[db_key]
-            filepath = os.path.join("QC_Databases", filename)
-            
-            try:
-                # Read existing data
-                if os.path.exists(filepath):
-                    df = pd.read_csv(filepath)
-                else:
-                    if is_micro:
-                        df = pd.DataFrame(columns=[
-                            "Date", "Test Type", "Day", "Point",
-                            "Total Count", "Coliforms", "Pseudomonas",
-                            "Status", "Comments"
-                        ])
-                    else:
-                        df = pd.DataFrame(columns=[
-                            "Date", "Test Type", "Day", "Point",
-                            "Conductivity", "Oxidizable", "Cl Test",
-                            "Status", "Comments"
-                        ])
-                
-                # Check for duplicates
-                if not self.check_for_duplicates(df, record):
-                    errors.append(f"Duplicate entry for {record['Point']} on {record['Date']}")
-                    continue
-                
-                # Prepare new row
-                new_row = {
-                    "Date": record["Date"],
-                    "Test Type": test_type,
-                    "Day": record.get("Day", ""),
-                    "Point": record["Point"],
-                    "Comments": record.get("Comments", ""),
-                    "Status": record.get("Status", "")
-                }
-                
-                if is_micro:
-                    new_row.update({
-                        "Total Count": record["Total Count"],
-                        "Coliforms": record["Coliforms"],
-                        "Pseudomonas": record["Pseudomonas"]
-                    })
-                else:
-                    new_row.update({
-                        "Conductivity": record.get("Conductivity", ""),
-                        "Oxidizable": record.get("Oxidizable", ""),
-                        "Cl Test": record.get("Cl Test", "")
-                    })
-                
-                # Append new data
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-                
-                # Save back to file
-                df.to_csv(filepath, index=False)
-                exported_files.add(filepath)
-                
-            except Exception as e:
-                errors.append(f"Error saving {record['Point']}: {str(e)}")
-        
-        # Show results
-        message_lines = []
-        
-        if exported_files:
-            message_lines.append("Data successfully saved to:")
-            message_lines.extend([f"- {os.path.abspath(f)}" for f in exported_files])
-            self.status_label.config(text="\n".join(message_lines), foreground='green')
-        
-        if errors:
-            message_lines.append("\nErrors encountered:")
-            message_lines.extend([f"- {e}" for e in errors])
-            self.status_label.config(text="\n".join(message_lines), foreground='red')
-        
-        if exported_files or errors:
-            messagebox.showinfo("Export Complete", "\n".join(message_lines))
-        
-        # Clear current data only after successful export
+            self.writer.submit(f"{record['Point']} {record['Tab']} ({record['Date']})", self.export_record, record,
+                               batch=batch, batch_size=len(self.current_data))
+        self.status_label.config(text=f"Saving {len(self.current_data)} records...", foreground='blue')
+        
+        # The queue holds the records now, failed saves stay in its retry queue
         self.current_data = []
 
+    def export_record(self, record, batch=None, batch_size=1):
+        """Write one record, runs on the writer thread"""
+        with measure("export_data", batch=batch, batch_size=batch_size):
+            export_record(record, self.DB_FILES, self.summary_cache, change_feed=self.change_feed,
+                          column_cache=self.column_cache)
+
+    def poll_writer(self):
+        """Show finished background saves in the status bar"""
+        colors = {"done": 'green', "rejected": 'red', "retrying": 'orange', "failed": 'red'}
+        for state, job in self.writer.finished():
+            text = self.writer.status_text(state, job)
+            # The entered rows were handed to the writer, a rejected one goes back to its table
+            if state == "rejected" and job.function == self.export_record:
+                record = job.args[0]
+                editor = self.micro_editor if record["Tab"] == "Microbiology" else self.chem_editor
+                if editor.restore(record):
+                    text += ", correct it in the table and export again"
+            pending = self.writer.pending()
+            if pending:
+                text += f" ({pending} still saving)"
+            self.status_label.config(text=text, foreground=colors[state])
+        
+        if self.writer.failed:
+            self.retry_btn.config(text=f"Retry Failed Saves ({len(self.writer.failed)})")
+            self.retry_btn.pack(side='right', padx=10)
+        else:
+            self.retry_btn.pack_forget()
+        self.root.after(200, self.poll_writer)
+
+    def retry_failed_saves(self):
+        count = self.writer.retry_failed()
+        self.status_label.config(text=f"Saving {count} records again...", foreground='blue')
+
+    def close(self):
+        """Write the records still queued before closing"""
+        if self.writer.failed and not messagebox.askyesno(
+                "Unsaved Records", f"{len(self.writer.failed)} records could not be saved. They will be kept in "
+                f"{os.path.abspath(RECOVERY_FILE)} to be entered again. Close anyway?"):
+            return
+        unsaved = self.writer.close()
+        if unsaved:
+            self.report_unsaved(unsaved)
+        self.root.destroy()
+
+    def report_unsaved(self, jobs):
+        """Keep the records that failed at close in the recovery file and list them"""
+        try:
+            kept = f"They were kept in {write_recovery_file(jobs)}."
+        except OSError as e:
+            kept = f"They could not be kept in a recovery file either ({e})."
+        messagebox.showwarning("Unsaved Records", f"{len(jobs)} records could not be saved. {kept}\n\n"
+                               + self.writer.unsaved_text(jobs))
+
 if __name__ == "__main__":
     root = tk.Tk()
     
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Headless benchmarks for the data paths of the AQL and Water QC apps
+
+Generates synthetic inspection records and QC databases with the same
+columns the apps write, times each hot path and writes the results as JSON.
+
+    python benchmarks/benchmark_data_paths.py run --sizes 10000 100000 1000000 -o after.json
+    python benchmarks/benchmark_data_paths.py compare before.json after.json --threshold 0.2
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qc_core
+from qc_core import ALL_POINTS as POINTS, DB_FILES
+
+BENCHMARKS = [
+    "get_aql_values", "search_records", "save_conformity", "generate_certificate",
+    "export_data", "load_results_data", "update_graph", "generate_word_report"
+]
+
+
+# === Synthetic Data ===
+def write_inspection_records(path, n, rng):
+    """inspection_results.csv with n records, half of them already inspected"""
+    start = datetime(2020, 1, 1)
+    items = ["bottle", "Cap", "alu pouch", "plastic cassette", "silica gel", "uncut sheet"]
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(qc_core.INSPECTION_COLUMNS)
+        for i in range(n):
+            inspected = i % 2 == 0
+            writer.writerow([
+                (start + timedelta(minutes=17 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+                f"IC{i:07d}", 1, f"Product {i % 500}", f"PC-{i % 500:04d}", "Sampler",
+                f"Supplier {rng.randint(1, 40)}", rng.randint(2, 50000), rng.choice(items),
+                "II", 125, '["Length & Width", "Appearance"]',
+                "2.5", 7, 8, 1 if inspected else "", "4.0", 10, 11, 2 if inspected else "",
+                "Conform" if inspected else "", "Inspector" if inspected else "", ""
+            ])
+
+
+def write_qc_databases(folder, n, rng):
+    """Daily micro/chem databases with n rows each, one row per point per day"""
+    os.makedirs(folder, exist_ok=True)
+    start = date(2000, 1, 1)
+    micro_path = os.path.join(folder, DB_FILES["Daily_Micro"])
+    chem_path = os.path.join(folder, DB_FILES["Daily_Chem"])
+    with open(micro_path, mode="w", newline="", encoding="utf-8") as micro, \
+            open(chem_path, mode="w", newline="", encoding="utf-8") as chem:
+        micro_writer = csv.writer(micro)
+        chem_writer = csv.writer(chem)
+        micro_writer.writerow(["Date", "Test Type", "Day", "Point", "Total Count", "Coliforms",
+                               "Pseudomonas", "Status", "Comments"])
+        chem_writer.writerow(["Date", "Test Type", "Day", "Point", "Conductivity", "Oxidizable",
+                              "Cl Test", "Status", "Comments"])
+        for i in range(n):
+            day = start + timedelta(days=i // len(POINTS))
+            point = POINTS[i % len(POINTS)]
+            count = rng.randint(0, 130)
+            micro_writer.writerow([day.isoformat(), "Daily", day.strftime("%A"), point, count,
+                                   "Absent", "Absent", "Non-Conform" if count > 100 else "Conform", ""])
+            conductivity = round(rng.uniform(0.2, 1.5), 2)
+            chem_writer.writerow([day.isoformat(), "Daily", day.strftime("%A"), point, conductivity,
+                                  "No color change", "", "Non-Conform: Conductivity > 1.3 µS/cm" if conductivity > 1.3 else "Conform", ""])
+
+    for db_key, filename in DB_FILES.items():
+        filepath = os.path.join(folder, filename)
+        if not os.path.exists(filepath):
+            columns = (["Total Count", "Coliforms", "Pseudomonas"] if "Micro" in db_key
+                       else ["Conductivity", "Oxidizable", "Cl Test"])
+            with open(filepath, mode="w", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerow(["Date", "Test Type", "Day", "Point"] + columns + ["Status", "Comments"])
+
+    last_day = start + timedelta(days=(n - 1) // len(POINTS))
+    return last_day
+
+
+# === Timing ===
+def time_call(func, repeat, setup=None):
+    """Run func repeat times and return its timings in seconds"""
+    timings = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        began = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - began)
+    return timings
+
+
+def run_size(n, repeat, only, workdir):
+    """Time every benchmark for one dataset size, inside workdir"""
+    rng = random.Random(n)
+    os.chdir(workdir)
+    write_inspection_records(qc_core.INSPECTION_FILE, n, rng)
+    last_day = write_qc_databases("QC_Databases", n, rng)
+    first_day = max(date(2000, 1, 1), last_day - timedelta(days=365))
+    results = {}
+
+    def record(name, func, setup=None):
+        if only and name not in only:
+            return
+        timings = time_call(func, repeat, setup)
+        results[name] = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "max": max(timings),
+            "repeat": repeat
+        }
+        print(f"  {name:<22} {min(timings):10.4f} s")
+
+    levels = list(qc_core.AQL_ENGINE.levels)
+    lookups = [(rng.randint(2, 600000), rng.choice(levels)) for _ in range(n)]
+    record("get_aql_values", lambda i: [qc_core.get_aql_values(units, level) for units, level in lookups])
+
+    record("search_records", lambda i: qc_core.search_inspection_records("IC00001", "", "2020-01-01", "2030-12-31"))
+
+    target_ic = f"IC{n // 2 + 1:07d}"
+    record("save_conformity", lambda i: qc_core.update_conformity_record(
+        target_ic, "", "", "Conform", "Inspector", "Benchmark", 1, 2))
+
+    record("generate_certificate", lambda i: qc_core.generate_certificate(
+        target_ic, "Product", "PC-0001", "Supplier 1", "bottle", "5000", "200",
+        "Conform", 1, 2, "Inspector", "Benchmark"))
+
+    # A full sanitization run (26 points, micro and chem) on a new day each repeat
+    def export_batch(i):
+        day = (last_day + timedelta(days=i + 1)).isoformat()
+        records = []
+        for point in POINTS:
+            records.append({"Date": day, "Test Type": "Daily", "Day": "", "Point": point, "Total Count": "12",
+                            "Coliforms": "Absent", "Pseudomonas": "Absent", "Status": "Conform",
+                            "Comments": "", "Tab": "Microbiology"})
+            records.append({"Date": day, "Test Type": "Daily", "Day": "", "Point": point, "Conductivity": "0.8",
+                            "Oxidizable": "No color change", "Cl Test": "", "Status": "Conform",
+                            "Comments": "", "Tab": "Chemistry"})
+        exported, errors = qc_core.export_records(records, DB_FILES)
+        if errors:
+            raise RuntimeError(errors[0])
+    record("export_data", export_batch)
+
+    micro_path = os.path.join("QC_Databases", DB_FILES["Daily_Micro"])
+    loaded = {}
+
+    def load(i):
+        loaded["df"], loaded["spc"] = qc_core.load_results(micro_path, first_day, last_day, "Microbiology")
+    record("load_results_data", load)
+    if "df" not in loaded:
+        load(0)
+
+    def graph(i):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = qc_core.build_trend_figure(loaded["df"], "Microbiology", loaded["spc"])
+        FigureCanvasAgg(fig).draw()
+    record("update_graph", graph)
+
+    cache = qc_core.SummaryCache(DB_FILES)
+
+    def report(i):
+        stats = cache.summarize("Daily_Micro", first_day, last_day, df=loaded["df"])
+        doc = qc_core.build_word_report(loaded["df"], "Daily_Micro", (first_day, last_day), stats, loaded["spc"])
+        doc.save(io.BytesIO())
+    record("generate_word_report", report)
+
+    return results
+
+
+def run(args):
+    output = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat
+        },
+        "results": {}
+    }
+
+    # The timed functions are instrumented, keep their metrics lines out of the timings' files
+    qc_core.configure_metrics(os.devnull, max_bytes=0)
+
+    cwd = os.getcwd()
+    try:
+        for n in args.sizes:
+            print(f"{n} rows")
+            with tempfile.TemporaryDirectory() as workdir:
+                output["results"][str(n)] = run_size(n, args.repeat, args.only, workdir)
+                os.chdir(cwd)
+    finally:
+        os.chdir(cwd)
+
+    with open(args.output, mode="w", encoding="utf-8") as file:
+        json.dump(output, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        return report_regressions(check_regressions(baseline, output, args.threshold), args.threshold)
+    return 0
+
+
+# === Regression Check ===
+def check_regressions(baseline, current, threshold):
+    """Benchmarks whose min time grew by more than threshold (0.2 = 20%)"""
+    regressions = []
+    for size, benches in current["results"].items():
+        for name, timing in benches.items():
+            before = baseline["results"].get(size, {}).get(name)
+            if before is None or before["min"] <= 0:
+                continue
+            ratio = timing["min"] / before["min"]
+            if ratio > 1 + threshold:
+                regressions.append((name, size, before["min"], timing["min"], ratio))
+    return regressions
+
+
+def report_regressions(regressions, threshold):
+    if not regressions:
+        print(f"No regressions above {threshold:.0%}")
+        return 0
+    print(f"Regressions above {threshold:.0%}:")
+    for name, size, before, after, ratio in regressions:
+        print(f"  {name} @ {size} rows: {before:.4f} s -> {after:.4f} s ({ratio:.2f}x)")
+    return 1
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.current, encoding="utf-8") as file:
+        current = json.load(file)
+    return report_regressions(check_regressions(baseline, current, args.threshold), args.threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AQL and Water QC data paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="generate synthetic data and time every data path")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="run only these benchmarks")
+    run_parser.add_argument("-o", "--output", default="benchmark_results.json")
+    run_parser.add_argument("--baseline", help="results JSON to check for regressions against")
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="check two result files for regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
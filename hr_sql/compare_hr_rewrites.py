@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Compare the original and rewritten HR queries on a synthetic SQLite schema
+
+    python hr_sql/compare_hr_rewrites.py --employees 100000 --plans
+
+Every original query is timed on the bare schema and again after the
+supporting indexes are created, every rewrite with the indexes. Both
+versions of a query must return the same rows.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from synthetic_hr import create_hr_database
+
+LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hr_query_rewrites_sqlite.sql")
+
+
+def load_library(path=LIBRARY):
+    """Index statements and {name: (original, rewrite)} from the SQLite query library"""
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    head, _, body = text.partition("-- query:")
+    indexes = head.split("---supporting indexes", 1)[1]
+
+    queries = {}
+    for section in ("-- query:" + body).split("-- query:")[1:]:
+        name, _, rest = section.partition("\n")
+        original = rest.split("-- original", 1)[1].split("-- rewrite", 1)[0]
+        rewrite = rest.split("-- rewrite", 1)[1]
+        queries[name.strip()] = (original.strip().rstrip(";"), rewrite.strip().rstrip(";"))
+    return indexes, queries
+
+
+def time_query(conn, sql, repeat):
+    """Best time over repeat runs and the rows returned"""
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        rows = conn.execute(sql).fetchall()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def query_plan(conn, sql):
+    return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the original and set-based HR queries side by side")
+    parser.add_argument("--employees", type=int, default=100000, help="size of the synthetic database")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="run only these queries")
+    parser.add_argument("--plans", action="store_true", help="print the query plans")
+    args = parser.parse_args()
+
+    indexes, queries = load_library()
+    if args.only:
+        queries = {name: pair for name, pair in queries.items() if name in args.only}
+
+    conn = sqlite3.connect(":memory:")
+    create_hr_database(conn, args.employees)
+    conn.execute("ANALYZE")
+
+    results = {}
+    for name, (original, rewrite) in queries.items():
+        results[name] = {"bare": time_query(conn, original, args.repeat)}
+        if args.plans:
+            results[name]["bare plan"] = query_plan(conn, original)
+
+    conn.executescript(indexes)
+    conn.execute("ANALYZE")
+
+    for name, (original, rewrite) in queries.items():
+        results[name]["indexed"] = time_query(conn, original, args.repeat)
+        results[name]["rewrite"] = time_query(conn, rewrite, args.repeat)
+        if args.plans:
+            results[name]["rewrite plan"] = query_plan(conn, rewrite)
+    conn.close()
+
+    print(f"{args.employees} employees, best of {args.repeat}\n")
+    print(f"{'query':<24}{'original':>10}{'+indexes':>10}{'rewrite':>10}{'speedup':>9}  match")
+    mismatches = 0
+    for name, result in results.items():
+        bare_time, bare_rows = result["bare"]
+        indexed_time, indexed_rows = result["indexed"]
+        rewrite_time, rewrite_rows = result["rewrite"]
+        match = sorted(bare_rows, key=repr) == sorted(rewrite_rows, key=repr) == sorted(indexed_rows, key=repr)
+        mismatches += not match
+        print(f"{name:<24}{bare_time:>10.4f}{indexed_time:>10.4f}{rewrite_time:>10.4f}"
+              f"{bare_time / max(rewrite_time, 1e-9):>8.1f}x  {'yes' if match else 'NO'}")
+
+    if args.plans:
+        for name, result in results.items():
+            print(f"\n{name}")
+            print("  original, no indexes:")
+            print("\n".join(f"    {step}" for step in result["bare plan"]))
+            print("  rewrite:")
+            print("\n".join(f"    {step}" for step in result["rewrite plan"]))
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
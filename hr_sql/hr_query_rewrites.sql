@@ -0,0 +1,95 @@
+-- Set-based rewrites of the SQLQuery1 30-3.sql exercises (SQL Server)
+--
+-- Each query shows the original and an equivalent formulation that the
+-- optimizer can answer with a join, a semi-join or a single scan, plus the
+-- indexes that make the rewrites seekable. compare_hr_rewrites.py runs the
+-- SQLite version of every pair on a synthetic HR schema and compares plans
+-- and timings.
+
+---supporting indexes
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_employees_manager_id')
+    CREATE INDEX IX_employees_manager_id ON employees (manager_id);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_employees_name')
+    CREATE INDEX IX_employees_name ON employees (first_name, last_name);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_employees_hire_date')
+    CREATE INDEX IX_employees_hire_date ON employees (hire_date DESC);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_employees_salary')
+    CREATE INDEX IX_employees_salary ON employees (salary) INCLUDE (first_name);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_orders_employee_id')
+    CREATE INDEX IX_orders_employee_id ON orders (employee_id);
+GO
+
+-- query: earn_more_than_103
+-- original
+select first_name,salary
+from employees
+where salary>(select salary
+from employees
+where employee_id='103')
+order by salary;
+-- rewrite
+select e.first_name, e.salary
+from employees e
+join employees ref on ref.employee_id = 103
+where e.salary > ref.salary
+order by e.salary;
+--the comparison value is a typed key lookup joined once, and the covering salary index gives the order
+
+-- query: managers_count
+-- original
+select count(*) as [No of managers] from employees
+where employee_id in (select manager_id from employees);
+-- rewrite
+select count(distinct manager_id) as [No of managers] from employees
+where manager_id is not null;
+--counted straight from IX_employees_manager_id, relies on manager_id referencing an existing employee
+
+-- query: non_managers_count
+-- original
+select count(first_name)as No_of_emps from employees
+where employee_id not in (select manager_id from employees where manager_id is not null);
+-- rewrite
+select count(first_name) as No_of_emps from employees e
+where not exists (select 1 from employees r where r.manager_id = e.employee_id);
+--anti-join, and unlike NOT IN it does not depend on filtering out NULL manager_id
+
+-- query: below_average_salary
+-- original
+select * from employees
+where salary<(select AVG(salary) as average_salary
+from employees);
+-- rewrite
+with average as (select AVG(salary) as average_salary from employees)
+select e.*
+from employees e
+join average a on e.salary < a.average_salary;
+--the average is computed once and joined as a range predicate on IX_employees_salary;
+--hr_employee_flags keeps the flag precomputed with AVG() OVER () when it is needed per row
+
+-- query: hired_recently
+-- original
+select top(10) * from employees
+order by hire_date desc;
+-- rewrite
+select top(10) * from employees
+order by hire_date desc;
+--unchanged, IX_employees_hire_date turns the full sort into reading the first ten index entries
+
+-- query: find_robert
+-- original
+select employee_id,first_name+' '+last_name as Full_name from employees
+where lower(first_name) like 'robert';
+-- rewrite
+select employee_id, first_name + ' ' + last_name as Full_name from employees
+where first_name = 'Robert';
+--the default collation is case-insensitive already, so LOWER() only prevented the index seek
+
+-- query: orders_of_robert_king
+-- original
+select * from orders
+where employee_id =(select employee_id from employees where concat(first_name,last_name)='RobertKing');
+-- rewrite
+select o.* from orders o
+join employees e on e.employee_id = o.employee_id
+where e.first_name = 'Robert' and e.last_name = 'King';
+--sargable on IX_employees_name, then IX_orders_employee_id; also works when several Robert Kings exist
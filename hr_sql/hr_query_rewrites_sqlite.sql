@@ -0,0 +1,82 @@
+-- SQLite version of hr_query_rewrites.sql, run by compare_hr_rewrites.py
+--
+-- TOP becomes LIMIT, + becomes ||, and the name indexes use COLLATE NOCASE
+-- to match SQL Server's case-insensitive default collation. The synthetic
+-- data has many Robert Kings, so the original Robert King query uses IN
+-- where SQL Server's = would fail on more than one match.
+
+---supporting indexes
+CREATE INDEX IF NOT EXISTS IX_employees_manager_id ON employees (manager_id);
+CREATE INDEX IF NOT EXISTS IX_employees_name ON employees (first_name COLLATE NOCASE, last_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS IX_employees_hire_date ON employees (hire_date DESC);
+CREATE INDEX IF NOT EXISTS IX_employees_salary ON employees (salary, first_name);
+CREATE INDEX IF NOT EXISTS IX_orders_employee_id ON orders (employee_id);
+
+-- query: earn_more_than_103
+-- original
+select first_name,salary
+from employees
+where salary>(select salary
+from employees
+where employee_id='103')
+order by salary;
+-- rewrite
+select e.first_name, e.salary
+from employees e
+join employees ref on ref.employee_id = 103
+where e.salary > ref.salary
+order by e.salary;
+
+-- query: managers_count
+-- original
+select count(*) as "No of managers" from employees
+where employee_id in (select manager_id from employees);
+-- rewrite
+select count(distinct manager_id) as "No of managers" from employees
+where manager_id is not null;
+
+-- query: non_managers_count
+-- original
+select count(first_name)as No_of_emps from employees
+where employee_id not in (select manager_id from employees where manager_id is not null);
+-- rewrite
+select count(first_name) as No_of_emps from employees e
+where not exists (select 1 from employees r where r.manager_id = e.employee_id);
+
+-- query: below_average_salary
+-- original
+select * from employees
+where salary<(select AVG(salary) as average_salary
+from employees);
+-- rewrite
+with average as (select AVG(salary) as average_salary from employees)
+select e.*
+from employees e
+join average a on e.salary < a.average_salary;
+
+-- query: hired_recently
+-- original
+select * from employees
+order by hire_date desc, employee_id
+limit 10;
+-- rewrite
+select * from employees
+order by hire_date desc, employee_id
+limit 10;
+
+-- query: find_robert
+-- original
+select employee_id,first_name||' '||last_name as Full_name from employees
+where lower(first_name) like 'robert';
+-- rewrite
+select employee_id, first_name || ' ' || last_name as Full_name from employees
+where first_name = 'Robert' COLLATE NOCASE;
+
+-- query: orders_of_robert_king
+-- original
+select * from orders
+where employee_id in (select employee_id from employees where lower(first_name||last_name)='robertking');
+-- rewrite
+select o.* from orders o
+join employees e on e.employee_id = o.employee_id
+where e.first_name = 'Robert' COLLATE NOCASE and e.last_name = 'King' COLLATE NOCASE;
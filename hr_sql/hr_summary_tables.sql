@@ -0,0 +1,132 @@
+-- Materialized summary tables for the HR analytics (SQL Server)
+--
+-- Run once to create the indexes, tables and refresh procedure, then
+-- EXEC dbo.refresh_hr_summaries after each HR data load. The Power BI
+-- report reads these small tables instead of re-running the five-table
+-- joins and the correlated subqueries of the analysis scripts.
+
+---supporting indexes for the joins the summaries are built from
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_employees_department_id')
+    CREATE INDEX IX_employees_department_id ON employees (department_id) INCLUDE (salary);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_employees_manager_id')
+    CREATE INDEX IX_employees_manager_id ON employees (manager_id);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_departments_location_id')
+    CREATE INDEX IX_departments_location_id ON departments (location_id);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_locations_country_id')
+    CREATE INDEX IX_locations_country_id ON locations (country_id);
+GO
+
+---summary tables
+IF OBJECT_ID('dbo.hr_country_salary') IS NULL
+CREATE TABLE dbo.hr_country_salary (
+    country_id CHAR(2) NOT NULL PRIMARY KEY,
+    country_name VARCHAR(40) NOT NULL,
+    region_name VARCHAR(25) NOT NULL,
+    total_employees INT NOT NULL,
+    total_salary DECIMAL(12, 2) NOT NULL,
+    avg_salary DECIMAL(12, 2) NOT NULL
+);
+
+IF OBJECT_ID('dbo.hr_department_salary') IS NULL
+CREATE TABLE dbo.hr_department_salary (
+    department_id INT NOT NULL PRIMARY KEY,
+    department_name VARCHAR(30) NOT NULL,
+    city VARCHAR(30) NOT NULL,
+    country_id CHAR(2) NOT NULL,
+    country_name VARCHAR(40) NOT NULL,
+    region_name VARCHAR(25) NOT NULL,
+    total_employees INT NOT NULL,
+    total_salary DECIMAL(12, 2) NOT NULL,
+    avg_salary DECIMAL(12, 2) NOT NULL,
+    min_salary DECIMAL(8, 2) NOT NULL,
+    max_salary DECIMAL(8, 2) NOT NULL
+);
+
+IF OBJECT_ID('dbo.hr_employee_flags') IS NULL
+CREATE TABLE dbo.hr_employee_flags (
+    employee_id INT NOT NULL PRIMARY KEY,
+    full_name VARCHAR(46) NOT NULL,
+    department_id INT NULL,
+    salary DECIMAL(8, 2) NOT NULL,
+    is_manager BIT NOT NULL,
+    direct_reports INT NOT NULL,
+    below_avg_salary BIT NOT NULL
+);
+
+IF OBJECT_ID('dbo.hr_summary_refresh_log') IS NULL
+CREATE TABLE dbo.hr_summary_refresh_log (
+    refreshed_at DATETIME2 NOT NULL DEFAULT SYSDATETIME(),
+    employees INT NOT NULL,
+    duration_ms INT NOT NULL
+);
+GO
+
+---refresh procedure, rebuilds every summary in one transaction
+CREATE OR ALTER PROCEDURE dbo.refresh_hr_summaries
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+    DECLARE @started DATETIME2 = SYSDATETIME();
+
+    BEGIN TRANSACTION;
+
+    TRUNCATE TABLE dbo.hr_department_salary;
+    INSERT INTO dbo.hr_department_salary
+    SELECT d.department_id, d.department_name, l.city, c.country_id, c.country_name, r.region_name,
+           COUNT(*), SUM(e.salary), AVG(e.salary), MIN(e.salary), MAX(e.salary)
+    FROM employees AS e
+    INNER JOIN departments AS d ON e.department_id = d.department_id
+    INNER JOIN locations AS l ON d.location_id = l.location_id
+    INNER JOIN countries AS c ON l.country_id = c.country_id
+    INNER JOIN regions AS r ON c.region_id = r.region_id
+    GROUP BY d.department_id, d.department_name, l.city, c.country_id, c.country_name, r.region_name;
+
+    -- Countries roll up from the department summary rather than the raw joins
+    TRUNCATE TABLE dbo.hr_country_salary;
+    INSERT INTO dbo.hr_country_salary
+    SELECT country_id, country_name, region_name,
+           SUM(total_employees), SUM(total_salary), SUM(total_salary) / SUM(total_employees)
+    FROM dbo.hr_department_salary
+    GROUP BY country_id, country_name, region_name;
+
+    -- One pass over employees: the report counts and the company average come from window functions
+    TRUNCATE TABLE dbo.hr_employee_flags;
+    INSERT INTO dbo.hr_employee_flags
+    SELECT e.employee_id, e.first_name + ' ' + e.last_name, e.department_id, e.salary,
+           CASE WHEN m.direct_reports IS NULL THEN 0 ELSE 1 END,
+           COALESCE(m.direct_reports, 0),
+           CASE WHEN e.salary < AVG(e.salary) OVER () THEN 1 ELSE 0 END
+    FROM employees AS e
+    LEFT JOIN (SELECT manager_id, COUNT(*) AS direct_reports
+               FROM employees
+               WHERE manager_id IS NOT NULL
+               GROUP BY manager_id) AS m
+    ON m.manager_id = e.employee_id;
+
+    INSERT INTO dbo.hr_summary_refresh_log (employees, duration_ms)
+    SELECT COUNT(*), DATEDIFF(MILLISECOND, @started, SYSDATETIME()) FROM dbo.hr_employee_flags;
+
+    COMMIT TRANSACTION;
+END;
+GO
+
+EXEC dbo.refresh_hr_summaries;
+GO
+
+---queries for the Power BI report
+select country_name, total_employees, total_salary
+from hr_country_salary;
+--each country with total salaries and count of employees
+
+select country_name, department_name, total_employees, total_salary, avg_salary
+from hr_department_salary;
+--salary by country and department
+
+select count(*) as [No of managers] from hr_employee_flags
+where is_manager = 1;
+--total number of employees who are managers
+
+select * from hr_employee_flags
+where below_avg_salary = 1;
+--employees who earn less than the average salary
@@ -0,0 +1,82 @@
+-- SQLite version of hr_summary_tables.sql, used by run_hr_summaries.py
+--
+-- SQLite has no stored procedures, the refresh section below is run by the
+-- runner inside one transaction.
+
+---supporting indexes
+CREATE INDEX IF NOT EXISTS IX_employees_department_id ON employees (department_id, salary);
+CREATE INDEX IF NOT EXISTS IX_employees_manager_id ON employees (manager_id);
+CREATE INDEX IF NOT EXISTS IX_departments_location_id ON departments (location_id);
+CREATE INDEX IF NOT EXISTS IX_locations_country_id ON locations (country_id);
+
+---summary tables
+CREATE TABLE IF NOT EXISTS hr_country_salary (
+    country_id TEXT NOT NULL PRIMARY KEY,
+    country_name TEXT NOT NULL,
+    region_name TEXT NOT NULL,
+    total_employees INTEGER NOT NULL,
+    total_salary REAL NOT NULL,
+    avg_salary REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS hr_department_salary (
+    department_id INTEGER NOT NULL PRIMARY KEY,
+    department_name TEXT NOT NULL,
+    city TEXT NOT NULL,
+    country_id TEXT NOT NULL,
+    country_name TEXT NOT NULL,
+    region_name TEXT NOT NULL,
+    total_employees INTEGER NOT NULL,
+    total_salary REAL NOT NULL,
+    avg_salary REAL NOT NULL,
+    min_salary REAL NOT NULL,
+    max_salary REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS hr_employee_flags (
+    employee_id INTEGER NOT NULL PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    department_id INTEGER,
+    salary REAL NOT NULL,
+    is_manager INTEGER NOT NULL,
+    direct_reports INTEGER NOT NULL,
+    below_avg_salary INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS hr_summary_refresh_log (
+    refreshed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    employees INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL
+);
+
+---refresh
+DELETE FROM hr_department_salary;
+INSERT INTO hr_department_salary
+SELECT d.department_id, d.department_name, l.city, c.country_id, c.country_name, r.region_name,
+       COUNT(*), SUM(e.salary), AVG(e.salary), MIN(e.salary), MAX(e.salary)
+FROM employees AS e
+INNER JOIN departments AS d ON e.department_id = d.department_id
+INNER JOIN locations AS l ON d.location_id = l.location_id
+INNER JOIN countries AS c ON l.country_id = c.country_id
+INNER JOIN regions AS r ON c.region_id = r.region_id
+GROUP BY d.department_id, d.department_name, l.city, c.country_id, c.country_name, r.region_name;
+
+DELETE FROM hr_country_salary;
+INSERT INTO hr_country_salary
+SELECT country_id, country_name, region_name,
+       SUM(total_employees), SUM(total_salary), SUM(total_salary) / SUM(total_employees)
+FROM hr_department_salary
+GROUP BY country_id, country_name, region_name;
+
+DELETE FROM hr_employee_flags;
+INSERT INTO hr_employee_flags
+SELECT e.employee_id, e.first_name || ' ' || e.last_name, e.department_id, e.salary,
+       CASE WHEN m.direct_reports IS NULL THEN 0 ELSE 1 END,
+       COALESCE(m.direct_reports, 0),
+       CASE WHEN e.salary < AVG(e.salary) OVER () THEN 1 ELSE 0 END
+FROM employees AS e
+LEFT JOIN (SELECT manager_id, COUNT(*) AS direct_reports
+           FROM employees
+           WHERE manager_id IS NOT NULL
+           GROUP BY manager_id) AS m
+ON m.manager_id = e.employee_id;
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Build and refresh the HR summary tables in SQLite and time them against the raw queries
+
+    python hr_sql/run_hr_summaries.py --employees 100000
+    python hr_sql/run_hr_summaries.py --db hr.sqlite
+
+Without --db a synthetic HR database of the given size is built in memory.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from synthetic_hr import create_hr_database
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hr_summary_tables_sqlite.sql")
+
+# (report, raw query from the analysis scripts, the same report from the summary tables)
+QUERY_PAIRS = [
+    ("salary by country", """
+        select c.country_name, COUNT(e.first_name) as total_employees, SUM(e.salary) as Total_salary
+        from countries as c
+        INNER JOIN locations as l ON c.country_id = l.country_id
+        INNER JOIN regions as r ON r.region_id = c.region_id
+        INNER JOIN departments as d ON d.location_id = l.location_id
+        INNER JOIN employees as e ON e.department_id = d.department_id
+        GROUP BY c.country_name
+        ORDER BY c.country_name
+    """, """
+        select country_name, total_employees, total_salary
+        from hr_country_salary
+        order by country_name
+    """),
+    ("salary by department", """
+        select d.department_id, COUNT(*), SUM(e.salary)
+        from departments as d
+        INNER JOIN locations as l ON d.location_id = l.location_id
+        INNER JOIN countries as c ON l.country_id = c.country_id
+        INNER JOIN regions as r ON r.region_id = c.region_id
+        INNER JOIN employees as e ON e.department_id = d.department_id
+        GROUP BY d.department_id
+        ORDER BY d.department_id
+    """, """
+        select department_id, total_employees, total_salary
+        from hr_department_salary
+        order by department_id
+    """),
+    ("number of managers", """
+        select count(*) from employees
+        where employee_id in (select manager_id from employees)
+    """, """
+        select count(*) from hr_employee_flags
+        where is_manager = 1
+    """),
+    ("number of non-managers", """
+        select count(first_name) from employees
+        where employee_id not in (select manager_id from employees where manager_id is not null)
+    """, """
+        select count(*) from hr_employee_flags
+        where is_manager = 0
+    """),
+    ("below average salary", """
+        select employee_id from employees
+        where salary < (select AVG(salary) from employees)
+        order by employee_id
+    """, """
+        select employee_id from hr_employee_flags
+        where below_avg_salary = 1
+        order by employee_id
+    """),
+]
+
+
+def split_script(path=SCRIPT):
+    """Setup (indexes and tables) and refresh statements of the SQLite script"""
+    with open(path, encoding="utf-8") as file:
+        setup, refresh = file.read().split("---refresh", 1)
+    return setup, refresh
+
+
+def refresh_summaries(conn, refresh_sql):
+    """Rebuild the summary tables in one transaction and log the refresh, returns seconds taken"""
+    began = time.perf_counter()
+    with conn:
+        for statement in refresh_sql.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        elapsed = time.perf_counter() - began
+        conn.execute(
+            "INSERT INTO hr_summary_refresh_log (employees, duration_ms) "
+            "SELECT COUNT(*), ? FROM hr_employee_flags", (round(elapsed * 1000),)
+        )
+    return elapsed
+
+
+def time_query(conn, sql, repeat):
+    """Best time over repeat runs and the rows returned"""
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        rows = conn.execute(sql).fetchall()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def same_rows(a, b):
+    """Compare result sets, allowing for float rounding in the aggregates"""
+    if len(a) != len(b):
+        return False
+    for row_a, row_b in zip(a, b):
+        for x, y in zip(row_a, row_b):
+            if isinstance(x, float) or isinstance(y, float):
+                if abs(x - y) > 1e-6 * max(1.0, abs(x)):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the HR summary tables in SQLite and time them")
+    parser.add_argument("--db", help="existing SQLite HR database (default: synthetic, in memory)")
+    parser.add_argument("--employees", type=int, default=100000, help="size of the synthetic database")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.db:
+        conn = sqlite3.connect(args.db)
+    else:
+        conn = sqlite3.connect(":memory:")
+        began = time.perf_counter()
+        create_hr_database(conn, args.employees)
+        print(f"Synthetic HR database with {args.employees} employees built in {time.perf_counter() - began:.2f} s")
+
+    setup, refresh = split_script()
+    conn.executescript(setup)
+    print(f"Summary tables refreshed in {refresh_summaries(conn, refresh):.3f} s")
+
+    print(f"\n{'report':<26}{'raw (s)':>10}{'summary (s)':>13}{'speedup':>9}  match")
+    mismatches = 0
+    for name, raw_sql, summary_sql in QUERY_PAIRS:
+        raw_time, raw_rows = time_query(conn, raw_sql, args.repeat)
+        summary_time, summary_rows = time_query(conn, summary_sql, args.repeat)
+        match = same_rows(raw_rows, summary_rows)
+        mismatches += not match
+        print(f"{name:<26}{raw_time:>10.4f}{summary_time:>13.4f}{raw_time / max(summary_time, 1e-9):>8.1f}x  {'yes' if match else 'NO'}")
+
+    conn.close()
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Synthetic HR schema (regions, countries, locations, departments, employees) in SQLite
+
+Same tables and columns as the HR database the .sql scripts query, scaled
+to any number of employees, for timing the queries locally. The orders
+table stands in for the Northwind Orders table of the last exercise,
+keyed to the HR employees.
+"""
+
+import random
+from datetime import date, timedelta
+
+SCHEMA = """
+CREATE TABLE regions (
+    region_id INTEGER PRIMARY KEY,
+    region_name TEXT
+);
+CREATE TABLE countries (
+    country_id TEXT PRIMARY KEY,
+    country_name TEXT,
+    region_id INTEGER NOT NULL REFERENCES regions (region_id)
+);
+CREATE TABLE locations (
+    location_id INTEGER PRIMARY KEY,
+    street_address TEXT,
+    postal_code TEXT,
+    city TEXT NOT NULL,
+    state_province TEXT,
+    country_id TEXT NOT NULL REFERENCES countries (country_id)
+);
+CREATE TABLE jobs (
+    job_id INTEGER PRIMARY KEY,
+    job_title TEXT NOT NULL,
+    min_salary REAL,
+    max_salary REAL
+);
+CREATE TABLE departments (
+    department_id INTEGER PRIMARY KEY,
+    department_name TEXT NOT NULL,
+    location_id INTEGER REFERENCES locations (location_id)
+);
+CREATE TABLE employees (
+    employee_id INTEGER PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone_number TEXT,
+    hire_date TEXT NOT NULL,
+    job_id INTEGER NOT NULL REFERENCES jobs (job_id),
+    salary REAL NOT NULL,
+    manager_id INTEGER REFERENCES employees (employee_id),
+    department_id INTEGER REFERENCES departments (department_id)
+);
+CREATE TABLE orders (
+    order_id INTEGER PRIMARY KEY,
+    employee_id INTEGER NOT NULL REFERENCES employees (employee_id),
+    order_date TEXT NOT NULL,
+    freight REAL
+);
+"""
+
+REGIONS = ["Europe", "Americas", "Asia", "Middle East and Africa"]
+COUNTRIES = [
+    ("AR", "Argentina", 2), ("AU", "Australia", 3), ("BE", "Belgium", 1), ("BR", "Brazil", 2),
+    ("CA", "Canada", 2), ("CH", "Switzerland", 1), ("CN", "China", 3), ("DE", "Germany", 1),
+    ("DK", "Denmark", 1), ("EG", "Egypt", 4), ("FR", "France", 1), ("HK", "HongKong", 3),
+    ("IL", "Israel", 4), ("IN", "India", 3), ("IT", "Italy", 1), ("JP", "Japan", 3),
+    ("KW", "Kuwait", 4), ("MX", "Mexico", 2), ("NG", "Nigeria", 4), ("NL", "Netherlands", 1),
+    ("SG", "Singapore", 3), ("UK", "United Kingdom", 1), ("US", "United States of America", 2),
+    ("ZM", "Zambia", 4), ("ZW", "Zimbabwe", 4)
+]
+DEPARTMENTS = ["Administration", "Marketing", "Purchasing", "Human Resources", "Shipping",
+               "IT", "Public Relations", "Sales", "Executive", "Finance", "Accounting"]
+FIRST_NAMES = ["Steven", "Neena", "Lex", "Alexander", "Bruce", "David", "Valli", "Diana", "Nancy",
+               "Daniel", "John", "Ismael", "Jose Manuel", "Luis", "Den", "Karen", "Robert", "Shelli"]
+LAST_NAMES = ["King", "Kochhar", "De Haan", "Hunold", "Ernst", "Austin", "Pataballa", "Lorentz",
+              "Greenberg", "Faviet", "Chen", "Sciarra", "Urman", "Popp", "Raphaely", "Colmenares"]
+
+
+def create_hr_database(conn, employees=100000, seed=0):
+    """Create and fill the HR tables with the given number of employees"""
+    rng = random.Random(seed)
+    conn.executescript(SCHEMA)
+
+    conn.executemany("INSERT INTO regions VALUES (?, ?)", enumerate(REGIONS, start=1))
+    conn.executemany("INSERT INTO countries VALUES (?, ?, ?)", COUNTRIES)
+
+    n_locations = max(len(COUNTRIES), employees // 500)
+    conn.executemany("INSERT INTO locations VALUES (?, ?, ?, ?, ?, ?)", (
+        (1000 + i, f"{i} Main Street", f"{10000 + i}", f"City {i}", None, COUNTRIES[i % len(COUNTRIES)][0])
+        for i in range(n_locations)
+    ))
+
+    conn.executemany("INSERT INTO jobs VALUES (?, ?, ?, ?)", (
+        (i + 1, f"Job {i + 1}", 2000 + 1000 * i, 9000 + 1500 * i) for i in range(19)
+    ))
+
+    n_departments = max(len(DEPARTMENTS), employees // 25)
+    conn.executemany("INSERT INTO departments VALUES (?, ?, ?)", (
+        (i + 1, f"{DEPARTMENTS[i % len(DEPARTMENTS)]} {i // len(DEPARTMENTS) + 1}", 1000 + rng.randrange(n_locations))
+        for i in range(n_departments)
+    ))
+
+    # Managers come from the first tenth of the staff, employee 100 reports to nobody
+    hired = date(1987, 6, 17)
+    rows = []
+    for i in range(employees):
+        employee_id = 100 + i
+        manager_id = None if i == 0 else 100 + rng.randrange(max(1, min(i, employees // 10)))
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        rows.append((
+            employee_id, first_name, last_name, f"{first_name[0]}{last_name}{i}".upper().replace(" ", ""),
+            None if rng.random() < 0.05 else f"515.123.{i % 10000:04d}",
+            (hired + timedelta(days=rng.randrange(12000))).isoformat(), rng.randint(1, 19),
+            float(rng.randrange(2000, 24001, 100)), manager_id, rng.randint(1, n_departments)
+        ))
+    conn.executemany("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)", (
+        (10248 + i, 100 + rng.randrange(employees),
+         (date(1996, 7, 4) + timedelta(days=rng.randrange(3650))).isoformat(), round(rng.uniform(0, 1000), 2))
+        for i in range(employees * 2)
+    ))
+    conn.commit()
@@ -0,0 +1,33 @@
+"""Domain core of the AQL inspection and water QC apps
+
+Everything here is plain Python (pandas, python-docx, matplotlib's
+Agg-capable Figure) with no Tkinter, so it can run in batch jobs, services
+and benchmarks. The Tk apps only collect input and display results.
+"""
+
+from .aql import (AQL_TABLES_FILE, SEVERITIES, AqlPlan, AqlEngine, AQL_ENGINE, tests_by_type, get_aql_values,
+                  build_inspection_plan, format_inspection_plan)
+from .inspections import (INSPECTION_FILE, INDEX_FILE, INSPECTION_SCHEMA_VERSION, INSPECTION_COLUMNS, InspectionIndex,
+                          append_inspection_record, read_inspection_records, filter_inspection_records,
+                          search_inspection_records, update_conformity_record, migrate_inspection_file, defect_text)
+from .schedule import SCHEDULE_FILE, WaterSchedule, SCHEDULE
+from .water import (DB_FOLDER, DB_FILES, MICRO_COLUMNS, CHEM_COLUMNS, ALL_POINTS, CFU_LIMITS, CHEM_LIMITS,
+                    DAILY_MICRO_POINTS, DAILY_CHEM_POINTS, MONTHLY_CHEM, MONTHLY_MICRO,
+                    db_key_for, evaluate_micro, evaluate_chem)
+from .spc import compute_spc
+from .water_store import (initialize_databases, SummaryCache, read_filtered, query_point_trends,
+                          load_results, check_for_duplicates, export_record, export_records)
+from .reports import generate_certificate, build_trend_figure, build_word_report
+from .certificates import CERTIFICATE_FOLDER, CertificateCache, certificate_hash, inspected_lots
+from .pdf import certificate_pdf, render_certificate_pdfs, certificates_to_pdf, write_report_pdf
+from .charts import CHART_FOLDER, FigurePool, ChartRenderer
+from .schema import apply_schema, read_raw, read_results, display_frame, storage_row
+from .changes import CHANGE_FOLDER, ChangeFeed
+from .metrics import METRICS_FILE, configure_metrics, measure, instrumented, count_read, count_write
+from .tracker import find_missing_samples
+from .switching import SWITCHING_FILE, SwitchingState, SupplierSwitching, replay_switching, supplier_switching
+from .scorecard import SCORECARD_FILE, SupplierScorecard
+from .writer import (RETRY_DELAYS, RECOVERY_FILE, BackgroundWriter, RejectedRecord, PartlySaved, run_after_save,
+                     write_recovery_file)
+from .entry_grid import GRID_KINDS, EntryGrid
+from .column_store import MEMORY_LIMIT_MB, ColumnStore, ColumnCache
@@ -0,0 +1,237 @@
+"""AQL sampling plans for raw material inspection"""
+
+import json
+import os
+from bisect import bisect_right
+from collections import namedtuple
+from types import MappingProxyType
+
+AQL_TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aql_tables.json")
+
+SEVERITIES = ("Normal", "Tightened", "Reduced")
+
+AqlPlan = namedtuple("AqlPlan", "letter sample ac re")
+
+
+class AqlEngine:
+    """ISO 2859-1 single sampling plans, compiled from aql_tables.json
+
+    The file holds the sample size code letters (table 1) and the master
+    tables for normal, tightened and reduced inspection (tables 2-A, 2-B,
+    2-C). A master table has the same plan along each diagonal of code
+    letter + AQL column, so it is stored as the sequence of those diagonals,
+    arrows included. Every (severity, level, AQL) is resolved once, arrows
+    followed, into a tuple indexed by lot size range, so plan() is a bisect
+    over 15 range bounds and two tuple lookups.
+
+    In the columns up to AQL 10 the tables stop at a largest plan (21/22
+    normal, 18/19 tightened, 10/11 reduced); the cells past it are up
+    arrows, the longer diagonals only exist for the larger AQLs.
+    """
+    def __init__(self, config):
+        self.lot_bounds = tuple(low for low, _ in config["lot_sizes"])
+        self.letters = config["letters"]
+        self.levels = tuple(config["code_letters"])
+        self.level_names = MappingProxyType(dict(config["level_names"]))
+        self.level_aliases = MappingProxyType(dict(config["level_aliases"]))
+        self.aql_values = tuple(float(v) for v in config["aql_values"])
+        self.defaults = MappingProxyType(dict(config["defaults"]))
+        self.switching = MappingProxyType(dict(config["switching"]))
+        self.capped_aql = float(config["capped_aql"])
+        self.masters = MappingProxyType(dict(config["severities"]))
+
+        code_rows = {level: tuple(self.letters.index(letter) for letter in letters)
+                     for level, letters in config["code_letters"].items()}
+        self.tables = {}
+        for severity, master in config["severities"].items():
+            sizes = master["sample_sizes"]
+            for level, rows in code_rows.items():
+                for column in range(len(self.aql_values)):
+                    self.tables[severity, level, column] = tuple(
+                        self.resolve(master, row, column, sizes) for row in rows)
+
+    @classmethod
+    def load(cls, path=AQL_TABLES_FILE):
+        with open(path, encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def resolve(self, master, row, column, sizes):
+        """Follow the arrows of a master table from a code letter row to a plan"""
+        first = master["first_diagonal"]
+        plans = master["plans"]
+        cap = master["capped_ac"] if self.aql_values[column] <= self.capped_aql else None
+        while 0 <= row < len(sizes):
+            step = row + column - first
+            entry = plans[step] if 0 <= step < len(plans) else ("down" if step < 0 else "up")
+            if cap is not None and isinstance(entry, list) and entry[0] > cap:
+                entry = "up"
+            if entry == "down":
+                row += 1
+            elif entry == "up":
+                row -= 1
+            else:
+                return AqlPlan(self.letters[row], sizes[row], entry[0], entry[1])
+        return None  # The arrow runs off the table, no plan at this severity
+
+    def level(self, level):
+        """Standard level name of a level or its alias ("Level 2" -> "II")"""
+        level = self.level_aliases.get(level, level)
+        if level not in self.levels:
+            raise ValueError(f"Unknown inspection level: {level}")
+        return level
+
+    def aql_column(self, aql):
+        try:
+            return self.aql_values.index(float(aql))
+        except ValueError:
+            raise ValueError(f"{aql} is not an AQL value of ISO 2859-1") from None
+
+    def plan(self, units, level, aql, severity="Normal"):
+        """AqlPlan for a lot, or None if the lot size is below the table or has no plan
+
+        A sample at least as large as the lot means 100% inspection, the
+        sample is then the whole lot. Severities without a plan for this
+        lot fall back to normal inspection.
+        """
+        if units < self.lot_bounds[0]:
+            return None
+        index = bisect_right(self.lot_bounds, units) - 1
+        key = (severity, self.level(level), self.aql_column(aql))
+        plan = self.tables[key][index] or self.tables[("Normal",) + key[1:]][index]
+        if plan is not None and plan.sample > units:
+            plan = plan._replace(sample=units)
+        return plan
+
+    def letter_plan(self, letter, aql, severity="Normal"):
+        """AqlPlan starting from a code letter instead of a lot size, None if there is none"""
+        row = self.letters.index(letter)
+        column = self.aql_column(aql)
+        for name in (severity, "Normal"):
+            master = self.masters[name]
+            plan = self.resolve(master, row, column, master["sample_sizes"])
+            if plan is not None:
+                return plan
+        return None
+
+    def common_plans(self, units, level, aqls, severity="Normal"):
+        """Plans of several defect classes checked on one sample, or None if a class has no plan
+
+        The sample is the largest of the classes' own plans. The other
+        classes are looked up again at its code letter, so their accept
+        numbers belong to that sample. A class whose column has no plan at
+        that letter (an arrow) keeps its own accept number, which is only
+        stricter on the larger sample.
+        """
+        plans = [self.plan(units, level, aql, severity) for aql in aqls]
+        if None in plans:
+            return None
+        common = max(plans, key=lambda plan: plan.sample)
+        result = []
+        for aql, plan in zip(aqls, plans):
+            if plan.letter != common.letter:
+                at_letter = self.letter_plan(common.letter, aql, severity)
+                if at_letter is not None and at_letter.letter == common.letter:
+                    plan = at_letter
+                plan = plan._replace(letter=common.letter, sample=common.sample)
+            result.append(plan)
+        return result
+
+    def tighter_aql(self, aql):
+        """The next smaller AQL value, used by the switching score"""
+        column = self.aql_column(aql)
+        return self.aql_values[max(column - 1, 0)]
+
+
+AQL_ENGINE = AqlEngine.load()
+
+
+# === Raw Material Types and Tests ===
+tests_by_type = {
+    "bottle": ["Volume", "Length & Width", "Leakage Test", "Appearance"],
+    "Cap": ["Length & Width", "Leakage Test", "Appearance"],
+    "alu pouch": ["Appearance and Color", "Length & Width", "Leakage Test"],
+    "plastic cassette": ["Appearance", "Length & Width", "Compatibility Between Top and Bottom"],
+    "silica gel": ["Length & Width", "Weight"],
+    "uncut sheet": ["Length & Width", "Controls & Flow Rate", "Compatibility with Cassette"],
+    "soft bag": ["Volume", "Leakage"],
+    "cbc carton": ["Volume", "Length & Width & Height", "Visual Appearance", "Stacking"],
+    "lateral flow box": ["Length & Width & Height", "Visual Appearance"],
+    "stickers": ["Length & Width", "Check data,codes (product code & sticker code)", "Visual Appearance"]
+}
+
+
+def aql_text(aql):
+    """AQL as written in the standard: 0.65, 2.5, 4.0, 10"""
+    aql = float(aql)
+    return f"{aql:.1f}" if aql < 10 and aql == round(aql, 1) else f"{aql:g}"
+
+
+def get_aql_values(units, level, severity="Normal", major_aql=None, minor_aql=None):
+    """Sample size and major/minor accept numbers for a lot, or Nones if not covered"""
+    major_aql = major_aql or AQL_ENGINE.defaults["major_aql"]
+    minor_aql = minor_aql or AQL_ENGINE.defaults["minor_aql"]
+    plans = AQL_ENGINE.common_plans(units, level, (major_aql, minor_aql), severity)
+    if plans is None:
+        return None, None, None
+    major, minor = plans
+    return major.sample, major.ac, minor.ac
+
+
+def build_inspection_plan(ic, product_name, product_code, sampler, supplier, units, item, level,
+                          severity="Normal"):
+    """Resolve the inspection plan of a lot
+
+    ``severity`` is the supplier's switching state (Normal, Tightened or
+    Reduced). Raises ValueError with a message for the operator when the
+    input is incomplete or the lot size is not covered by the AQL table.
+    """
+    if not ic:
+        raise ValueError("Please enter an Internal Code")
+    if not sampler:
+        raise ValueError("Please enter Sampler Name")
+
+    try:
+        units = int(units)
+    except (TypeError, ValueError):
+        units = 0
+    if units <= 0:
+        raise ValueError("Please enter a valid positive number of units.")
+
+    level = AQL_ENGINE.level(level)
+    major_aql = AQL_ENGINE.defaults["major_aql"]
+    minor_aql = AQL_ENGINE.defaults["minor_aql"]
+    plans = AQL_ENGINE.common_plans(units, level, (major_aql, minor_aql), severity)
+    if plans is None:
+        raise ValueError("Units not covered in AQL table for this level.")
+    major, minor = plans
+
+    return {
+        "ic": ic, "product_name": product_name, "product_code": product_code,
+        "sampler": sampler, "supplier": supplier, "units": units, "item": item,
+        "level": level, "severity": severity, "code_letter": major.letter,
+        "sample": major.sample,
+        "major_aql": major_aql, "major": major.ac, "major_re": major.re,
+        "minor_aql": minor_aql, "minor": minor.ac, "minor_re": minor.re,
+        "tests": tests_by_type[item]
+    }
+
+
+def format_inspection_plan(plan, generated_on):
+    """Plan text shown to the sampler"""
+    output = f"📋 Inspection Plan\n{'='*40}\n"
+    output += f"• Internal Code: {plan['ic']}\n"
+    output += f"• Product Name: {plan['product_name']}\n"
+    output += f"• Product Code: {plan['product_code']}\n"
+    output += f"• Sampler: {plan['sampler']}\n"
+    output += f"• Supplier: {plan['supplier']}\n"
+    output += f"• Units: {plan['units']}\n"
+    output += f"• Item Type: {plan['item']}\n"
+    output += f"• Inspection Level: {plan['level']} ({plan['severity']} inspection, code letter {plan['code_letter']})\n"
+    output += f"• Sample Size: {plan['sample']}\n"
+    output += f"• Major Defects ({aql_text(plan['major_aql'])}%): Accept ≤ {plan['major']}, Reject ≥ {plan['major_re']}\n"
+    output += f"• Minor Defects ({aql_text(plan['minor_aql'])}%): Accept ≤ {plan['minor']}, Reject ≥ {plan['minor_re']}\n"
+    output += "\n🔍 Required Tests:\n"
+    for test in plan["tests"]:
+        output += f"  - {test}\n"
+    output += f"\nGenerated on: {generated_on.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    return output
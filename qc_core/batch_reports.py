@@ -0,0 +1,182 @@
+"""Batch water QC reports: one report per dataset and period
+
+    python -m qc_core.batch_reports --from 2025-01-01 --to 2025-12-31 -o Reports/2025
+
+Each database file is read once and split into periods in memory. The
+renders are fanned out to a process pool and every run writes a
+manifest.json next to the reports, listing what was produced.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import pandas as pd
+
+from .charts import CHART_FOLDER, ChartRenderer
+from .metrics import instrumented
+from .pdf import write_report_pdf
+from .reports import build_word_report
+from .schema import read_results
+from .spc import compute_spc
+from .water import DB_FILES, DB_FOLDER
+from .water_store import SummaryCache
+
+MANIFEST_FILE = "manifest.json"
+
+# One chart renderer (and figure pool) per process and chart folder
+renderers = {}
+
+
+def month_periods(date_from, date_to):
+    """(first day, last day) of every month overlapping a date range, clipped to the range"""
+    periods = []
+    start = date_from
+    while start <= date_to:
+        next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        end = min(next_month - timedelta(days=1), date_to)
+        periods.append((start, end))
+        start = next_month
+    return periods
+
+
+def in_period(df, start, end):
+    return df[(df["Date"] >= pd.Timestamp(start)) & (df["Date"] <= pd.Timestamp(end))]
+
+
+def report_jobs(date_from, date_to, output, db_files=DB_FILES, folder=DB_FOLDER, fmt="docx",
+                summary_cache=None):
+    """Render jobs for every dataset and month of a range
+
+    Each dataset is loaded and its SPC computed once over its whole history,
+    like load_results does; the month slices are taken from that.
+    """
+    summary_cache = summary_cache or SummaryCache(db_files, folder)
+    periods = month_periods(date_from, date_to)
+    jobs = []
+    for db_key, filename in db_files.items():
+        filepath = os.path.join(folder, filename)
+        if not os.path.exists(filepath):
+            continue
+        df = read_results(filepath).sort_values("Date", kind="stable")
+        column = "Total Count" if db_key.endswith("Micro") else "Conductivity"
+        spc = compute_spc(df, column)
+
+        # One pass splits the rows by month, periods then only trim their own slice
+        by_month = dict(list(df.groupby(df["Date"].dt.to_period("M"))))
+        spc_by_month = dict(list(spc.groupby(spc["Date"].dt.to_period("M"))))
+        for start, end in periods:
+            month = pd.Period(start, freq="M")
+            part = in_period(by_month.get(month, df.iloc[:0]), start, end)
+            part_spc = in_period(spc_by_month.get(month, spc.iloc[:0]), start, end)
+            stats = summary_cache.summarize(db_key, start, end, df=part)
+            path = os.path.join(output, f"{db_key}_{start.strftime('%Y-%m')}.{fmt}")
+            jobs.append({"db_key": db_key, "period": (start, end), "path": path, "format": fmt,
+                         "df": part.reset_index(drop=True), "stats": stats, "spc": part_spc})
+    return jobs
+
+
+def render_report(job):
+    """Process pool entry point, renders one report and returns its manifest entry"""
+    began = time.perf_counter()
+    df, period = job["df"], job["period"]
+    if job["format"] == "pdf":
+        write_report_pdf(job["path"], df, job["db_key"], period, job["stats"], job["spc"])
+    else:
+        charts = None
+        if job.get("charts"):
+            charts = renderers.setdefault(job["charts"], ChartRenderer(job["charts"]))
+        build_word_report(df, job["db_key"], period, job["stats"], job["spc"], charts=charts).save(job["path"])
+    return {
+        "db_key": job["db_key"],
+        "from": period[0].isoformat(),
+        "to": period[1].isoformat(),
+        "path": job["path"],
+        "rows": len(df),
+        "non_conform": int(df["Status"].astype(str).str.contains("Non-Conform").sum()),
+        "seconds": round(time.perf_counter() - began, 3)
+    }
+
+
+@instrumented()
+def generate_reports(date_from, date_to, output, db_files=DB_FILES, folder=DB_FOLDER, fmt="docx",
+                     workers=None, skip_empty=False, chart_folder=CHART_FOLDER):
+    """Write one report per dataset and month of a range, returns the manifest
+
+    Reports are rendered in parallel over ``workers`` processes (all cores by
+    default). A failed render is recorded in the manifest with its error
+    instead of stopping the batch. Word reports get per-point trend charts,
+    cached in ``chart_folder``; pass None to leave them out.
+    """
+    os.makedirs(output, exist_ok=True)
+    began = time.perf_counter()
+    jobs = report_jobs(date_from, date_to, output, db_files, folder, fmt)
+    if skip_empty:
+        jobs = [job for job in jobs if len(job["df"])]
+    for job in jobs:
+        job["charts"] = chart_folder
+
+    reports = []
+    if workers == 1:
+        for job in jobs:
+            reports.append(render_or_fail(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_report, job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    reports.append(future.result())
+                except Exception as e:
+                    reports.append(failed_entry(futures[future], e))
+    reports.sort(key=lambda entry: (entry["db_key"], entry["from"]))
+
+    manifest = {
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "format": fmt,
+        "generated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seconds": round(time.perf_counter() - began, 3),
+        "reports": reports
+    }
+    with open(os.path.join(output, MANIFEST_FILE), mode="w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1)
+    return manifest
+
+
+def render_or_fail(job):
+    try:
+        return render_report(job)
+    except Exception as e:
+        return failed_entry(job, e)
+
+
+def failed_entry(job, error):
+    return {"db_key": job["db_key"], "from": job["period"][0].isoformat(), "to": job["period"][1].isoformat(),
+            "path": None, "error": f"{type(error).__name__}: {error}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write one water QC report per dataset and month")
+    parser.add_argument("--from", dest="date_from", required=True, type=date.fromisoformat)
+    parser.add_argument("--to", dest="date_to", required=True, type=date.fromisoformat)
+    parser.add_argument("-o", "--output", required=True, help="folder for the reports and manifest.json")
+    parser.add_argument("--folder", default=DB_FOLDER, help="database folder")
+    parser.add_argument("--format", choices=["docx", "pdf"], default="docx")
+    parser.add_argument("--workers", type=int, help="render processes (default: one per core)")
+    parser.add_argument("--skip-empty", action="store_true", help="no reports for months without results")
+    parser.add_argument("--no-charts", action="store_true", help="leave the trend charts out of Word reports")
+    args = parser.parse_args()
+
+    manifest = generate_reports(args.date_from, args.date_to, args.output, folder=args.folder, fmt=args.format,
+                                workers=args.workers, skip_empty=args.skip_empty,
+                                chart_folder=None if args.no_charts else CHART_FOLDER)
+    failed = [entry for entry in manifest["reports"] if entry.get("error")]
+    print(f"{len(manifest['reports']) - len(failed)} reports written to {args.output} "
+          f"in {manifest['seconds']} s, {len(failed)} failed")
+
+
+if __name__ == "__main__":
+    main()
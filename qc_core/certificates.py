@@ -0,0 +1,132 @@
+"""Certificate cache: skip regenerating certificates whose content did not change
+
+The manifest (Certificates/certificate_manifest.json) maps each Internal
+Code to its latest certificate file and the hash of the inputs it was
+rendered from. Saving a lot again with the same values finds the same hash
+and reuses the existing file, which keeps its original issue date.
+"""
+
+import hashlib
+import json
+import os
+
+from .inspections import INSPECTION_FILE, read_inspection_records
+from .reports import generate_certificate
+
+CERTIFICATE_FOLDER = "Certificates"
+MANIFEST_FILE = "certificate_manifest.json"
+
+# Bump when the certificate layout changes so every certificate is rendered again
+CERTIFICATE_VERSION = 2
+
+CERTIFICATE_FIELDS = ["ic", "product_name", "product_code", "supplier", "item_type", "units", "sample_size",
+                      "status", "major_defects", "minor_defects", "inspector", "comments", "inspection_level"]
+
+
+def certificate_hash(fields):
+    """sha256 of the values shown on a certificate"""
+    content = [CERTIFICATE_VERSION] + [str(fields.get(name) or "") for name in CERTIFICATE_FIELDS]
+    return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()
+
+
+class CertificateCache:
+    """Manifest of Internal Code -> certificate path and content hash"""
+    def __init__(self, folder=CERTIFICATE_FOLDER):
+        self.folder = folder
+        self.manifest_path = os.path.join(folder, MANIFEST_FILE)
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def lookup(self, ic):
+        """Path of the current certificate of a lot, or None if there is none on disk"""
+        entry = self.entries.get(ic)
+        if entry and os.path.exists(entry["path"]):
+            return entry["path"]
+        return None
+
+    def ensure(self, save=True, **fields):
+        """Certificate of a lot, rendered only if its content changed
+
+        Takes the generate_certificate() arguments by name and returns
+        (path, generated).
+        """
+        digest = certificate_hash(fields)
+        entry = self.entries.get(fields["ic"])
+        if entry and entry["hash"] == digest and os.path.exists(entry["path"]):
+            return entry["path"], False
+
+        path = generate_certificate(folder=self.folder, **fields)
+        self.entries[fields["ic"]] = {"path": path, "hash": digest}
+        if save:
+            self.save()
+        return path, True
+
+    def ensure_all(self, path=INSPECTION_FILE):
+        """Make sure every inspected lot has an up to date certificate
+
+        Returns (generated, reused) counts.
+        """
+        generated = reused = 0
+        try:
+            for fields in inspected_lots(read_inspection_records(path)):
+                _, created = self.ensure(save=False, **fields)
+                if created:
+                    generated += 1
+                else:
+                    reused += 1
+        finally:
+            if generated:
+                self.save()
+        return generated, reused
+
+
+def inspected_lots(records):
+    """Certificate fields of every inspected lot
+
+    A lot's certificate shows its latest attempt with a conformity status;
+    lots without one are skipped.
+    """
+    lots = {}
+    for row in records:
+        if row["Status"]:
+            latest = lots.get(row["Internal Code"])
+            if latest is None or row["Attempt"] > latest["Attempt"]:
+                lots[row["Internal Code"]] = row
+    return [record_fields(row) for row in lots.values()]
+
+
+def text(value):
+    return "" if value is None else str(value)
+
+
+def record_fields(row):
+    """generate_certificate() arguments of an inspection record"""
+    return {
+        "ic": row["Internal Code"],
+        "product_name": row["Product Name"],
+        "product_code": row["Product Code"],
+        "supplier": row["Supplier"],
+        "item_type": row["Item Type"],
+        "units": text(row["Units"]),
+        "sample_size": text(row["Sample Size"]),
+        "status": row["Status"],
+        "major_defects": row["Major Found"] or 0,
+        "minor_defects": row["Minor Found"] or 0,
+        "inspector": row["Inspector"],
+        "comments": row["Comments"],
+        "inspection_level": row["Inspection Level"]
+    }
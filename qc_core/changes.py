@@ -0,0 +1,172 @@
+"""Append-only change feed of every write to the QC stores
+
+Each write path appends one JSON line per inserted or updated row to
+sequence-numbered segments in Change_Feed/:
+
+    {"seq": 42, "time": "2025-03-30 10:15:00", "store": "Daily_Micro",
+     "op": "insert", "key": {"Date": "2025-03-30", "Point": "PW1"}, "row": {...}}
+
+Consumers keep the last seq they processed as a watermark and read only
+the entries after it, so a refresh costs as much as the new data.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from .metrics import count
+
+CHANGE_FOLDER = "Change_Feed"
+SEGMENT_PREFIX = "changes-"
+SEGMENT_SIZE = 4 * 1024 * 1024
+
+
+class ChangeFeed:
+    """Sequence-numbered JSONL segments, rotated once a segment passes segment_size bytes"""
+    def __init__(self, folder=CHANGE_FOLDER, segment_size=SEGMENT_SIZE):
+        self.folder = folder
+        self.segment_size = segment_size
+        self.lock_path = os.path.join(folder, "feed.lock")
+
+    def segments(self):
+        """(first seq, path) of every segment, oldest first"""
+        if not os.path.isdir(self.folder):
+            return []
+        found = []
+        for name in os.listdir(self.folder):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(".jsonl"):
+                try:
+                    first_seq = int(name[len(SEGMENT_PREFIX):-len(".jsonl")])
+                except ValueError:
+                    continue
+                found.append((first_seq, os.path.join(self.folder, name)))
+        return sorted(found)
+
+    @staticmethod
+    def last_entry_seq(path):
+        """seq of the last complete line of a segment, None if it has none"""
+        with open(path, mode="rb") as file:
+            file.seek(0, os.SEEK_END)
+            end = file.tell()
+            file.seek(max(0, end - 65536))
+            lines = file.read().split(b"\n")
+        for line in reversed(lines):
+            try:
+                return json.loads(line)["seq"]
+            except (ValueError, KeyError):
+                continue
+        return None
+
+    @staticmethod
+    def drop_partial_line(path):
+        """Cut off a last line left without its newline by a crashed writer, so the next entry starts a line"""
+        with open(path, mode="r+b") as file:
+            end = file.seek(0, os.SEEK_END)
+            if not end:
+                return
+            file.seek(end - 1)
+            if file.read(1) == b"\n":
+                return
+            start = end
+            while start > 0:
+                start = max(0, start - 65536)
+                file.seek(start)
+                newline = file.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    file.truncate(start + newline + 1)
+                    return
+            file.truncate(0)
+
+    def last_seq(self):
+        """Highest sequence number written so far, 0 for an empty feed"""
+        for first_seq, path in reversed(self.segments()):
+            seq = self.last_entry_seq(path)
+            if seq is not None:
+                return seq
+        return 0
+
+    @contextmanager
+    def locked(self, timeout=10.0):
+        """Hold the feed lock file so both apps can write to one feed
+
+        A lock older than the timeout is assumed to be left behind by a
+        crashed writer and is broken.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    try:
+                        if time.time() - os.path.getmtime(self.lock_path) > timeout:
+                            os.remove(self.lock_path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    raise TimeoutError(f"Change feed is locked: {self.lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(self.lock_path)
+
+    def append(self, changes):
+        """Write (store, op, key, row) changes and return their last sequence number"""
+        changes = list(changes)
+        if not changes:
+            return None
+
+        with self.locked():
+            segments = self.segments()
+            if segments:
+                self.drop_partial_line(segments[-1][1])
+            seq = self.last_seq()
+            if not segments or os.path.getsize(segments[-1][1]) >= self.segment_size:
+                path = os.path.join(self.folder, f"{SEGMENT_PREFIX}{seq + 1:012d}.jsonl")
+            else:
+                path = segments[-1][1]
+
+            written = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            lines = []
+            for store, op, key, row in changes:
+                seq += 1
+                lines.append(json.dumps({
+                    "seq": seq, "time": written, "store": store, "op": op, "key": key, "row": row
+                }, ensure_ascii=False, default=str))
+
+            text = "\n".join(lines) + "\n"
+            with open(path, mode="a", encoding="utf-8", newline="\n") as file:
+                file.write(text)
+            count(bytes_written=len(text.encode("utf-8")))
+        return seq
+
+    def read(self, since=0, limit=None, stores=None):
+        """Entries with seq > since, oldest first
+
+        Segments that end before the watermark are skipped without being read.
+        """
+        segments = self.segments()
+        entries = []
+        for i, (first_seq, path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] <= since + 1:
+                continue
+            with open(path, mode="r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Line still being written
+                    if entry["seq"] <= since:
+                        continue
+                    if stores and entry["store"] not in stores:
+                        continue
+                    entries.append(entry)
+                    if limit is not None and len(entries) >= limit:
+                        return entries
+        return entries
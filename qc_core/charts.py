@@ -0,0 +1,185 @@
+"""Off-screen trend charts for reports
+
+Charts are drawn with the Agg backend on figures taken from a small pool.
+A pooled figure keeps its axes, lines and legend and only gets new data for
+the next chart, which is far cheaper than building a new Figure. The PNGs
+are cached in memory and in Chart_Cache/ under a key made of the dataset,
+point, period and a hash of the plotted data, so a report pack rendered
+again only draws the charts whose data changed.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+
+import matplotlib.dates as mdates
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .metrics import count
+from .schedule import SCHEDULE
+from .water import CFU_LIMITS, CHEM_LIMITS
+
+CHART_FOLDER = "Chart_Cache"
+
+# Bump when the chart drawing changes so cached images are not reused
+CHART_VERSION = 1
+CHART_SIZE = (6.5, 2.4)
+CHART_DPI = 100
+CHART_CAPTION = ("Blue: results. Red line: specification limit. Shaded: SPC limits (rolling mean ± 3σ). "
+                 "Red x: results that triggered an SPC rule.")
+
+
+class TrendChart:
+    """One Agg figure with the artists of a point trend, redrawn with new data"""
+    def __init__(self):
+        self.fig = Figure(figsize=CHART_SIZE, dpi=CHART_DPI)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        self.values, = self.ax.plot([], [], 'o-', markersize=3, linewidth=1, label='Result')
+        self.limit = self.ax.axhline(0, color='red', linewidth=1, label='Limit')
+        self.signals, = self.ax.plot([], [], 'x', color='red', markersize=7, label='SPC signal')
+        self.band = None
+        # No legend, it is the same on every chart and a quarter of the draw time; see CHART_CAPTION
+        self.ax.tick_params(labelsize=7)
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+        self.ax.grid(True, linewidth=0.3)
+        self.fig.subplots_adjust(left=0.1, right=0.97, bottom=0.15, top=0.88)
+
+    def render(self, point, data_type, period, point_df, point_spc=None):
+        """PNG of one point's results over a period with its limit, SPC band and signals"""
+        column = 'Total Count' if data_type == "Microbiology" else 'Conductivity'
+        ax = self.ax
+        self.values.set_data(point_df['Date'], point_df[column].astype('float64'))
+        limit = point_limit(point, data_type)
+        self.limit.set_ydata([limit, limit])
+
+        if self.band is not None:
+            self.band.remove()
+            self.band = None
+        if point_spc is not None and not point_spc.empty:
+            self.band = ax.fill_between(point_spc['Date'], point_spc['LCL'], point_spc['UCL'],
+                                        color='tab:blue', alpha=0.12, linewidth=0)
+            signals = point_spc[point_spc['Signal']]
+            self.signals.set_data(signals['Date'], signals['Value'])
+        else:
+            self.signals.set_data([], [])
+
+        ax.set_title(point, fontsize=9)
+        ax.set_ylabel('CFU/mL' if data_type == "Microbiology" else 'µS/cm', fontsize=8)
+        ax.relim()
+        ax.autoscale_view(scalex=False)
+        ax.set_xlim(pd.Timestamp(period[0]) - pd.Timedelta(hours=12), pd.Timestamp(period[1]) + pd.Timedelta(hours=12))
+
+        buffer = BytesIO()
+        self.fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+
+
+class FigurePool:
+    """Trend chart figures reused across renders"""
+    def __init__(self, size=4):
+        self.size = size
+        self.free = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def chart(self):
+        with self.lock:
+            chart = self.free.pop() if self.free else None
+        if chart is None:
+            chart = TrendChart()
+        try:
+            yield chart
+        finally:
+            with self.lock:
+                if len(self.free) < self.size:
+                    self.free.append(chart)
+
+
+def point_limit(point, data_type):
+    """Specification limit drawn on a point's chart"""
+    if data_type == "Microbiology":
+        return CFU_LIMITS.get(point, SCHEDULE.default_cfu)
+    return CHEM_LIMITS["Conductivity"].get(point, SCHEDULE.default_conductivity)
+
+
+def data_version(*frames):
+    """Hash of the rows that go into a chart"""
+    digest = hashlib.sha1()
+    for frame in frames:
+        if frame is not None:
+            digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ChartRenderer:
+    """Per-point trend PNGs, cached by (dataset, point, period, data version)"""
+    caption = CHART_CAPTION
+
+    def __init__(self, folder=CHART_FOLDER, pool=None, memory_items=256):
+        self.folder = folder
+        self.pool = pool or FigurePool()
+        self.memory_items = memory_items
+        self.images = OrderedDict()
+
+    @staticmethod
+    def chart_key(db_key, point, period, version):
+        text = f"{CHART_VERSION}|{db_key}|{point}|{period[0]}|{period[1]}|{version}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def cached(self, key):
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key]
+        path = os.path.join(self.folder, f"{key}.png")
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                png = file.read()
+            self.remember(key, png)
+            return png
+        return None
+
+    def remember(self, key, png):
+        self.images[key] = png
+        while len(self.images) > self.memory_items:
+            self.images.popitem(last=False)
+
+    def store(self, key, png):
+        self.remember(key, png)
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, f"{key}.png")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(png)
+        os.replace(temp_path, path)
+
+    def point_chart(self, db_key, point, period, point_df, point_spc=None):
+        """PNG of one point's trend, drawn only if not cached"""
+        data_type = "Microbiology" if db_key.endswith("Micro") else "Chemistry"
+        column = 'Total Count' if data_type == "Microbiology" else 'Conductivity'
+        spc_columns = ['Date', 'Value', 'UCL', 'LCL', 'Signal']
+        key = self.chart_key(db_key, point, period, data_version(
+            point_df[['Date', column]], None if point_spc is None else point_spc[spc_columns]))
+        png = self.cached(key)
+        if png is not None:
+            return png
+
+        count(rows=len(point_df))
+        with self.pool.chart() as chart:
+            png = chart.render(point, data_type, period, point_df, point_spc)
+        self.store(key, png)
+        return png
+
+    def report_charts(self, db_key, period, df, spc=None):
+        """(point, PNG) of every point in the loaded rows, in point order"""
+        spc_points = dict(list(spc.groupby('Point', sort=False))) if spc is not None else {}
+        charts = []
+        for point, point_df in df.groupby('Point', sort=True, observed=True):
+            point = str(point)
+            charts.append((point, self.point_chart(db_key, point, period, point_df, spc_points.get(point))))
+        return charts
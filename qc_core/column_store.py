@@ -0,0 +1,536 @@
+"""Memory-mapped column files of the water QC databases
+
+Decade-scale histories do not fit in memory as DataFrames. A ColumnStore
+converts a database CSV once, a chunk at a time, into one binary file per
+column and keeps the files up to date as records are appended:
+
+    Date                            int32 days since 1970-01-01, NO_DATE if not a date
+    Test Type, Day, Point, Status   int32 codes into the column's values
+    Total Count, Conductivity,      float64, NaN if empty or not a number, plus
+    Cl Test                         a uint8 file of the "<column> Invalid" mask
+    Coliforms, Pseudomonas,         int8, 1 = Present / Color change, 0, -1 if empty
+    Oxidizable
+    Comments                        UTF-8 text with int64 end offsets
+
+Filters and trend extraction then read only the columns they need through
+numpy memmaps, a chunk of rows at a time, so their working set stays under
+the memory limit whatever the length of the history. frame() turns the
+selected rows back into the typed frame read_results() gives.
+
+The memory limit is QC_MEMORY_LIMIT_MB from the environment if set,
+MEMORY_LIMIT_MB otherwise.
+
+Writes only append past the rows already converted, and a write that fails
+part way is cut back to them, so once a store is current its rows can be
+read while a record is being appended. Bringing it up to date has to wait
+for the writes, see load_results().
+"""
+
+import csv
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .metrics import count
+from .schema import CATEGORY_COLUMNS, NUMERIC_COLUMNS, FLAG_COLUMNS, invalid_column, read_raw
+from .spc import compute_spc
+from .water import DB_FILES, DB_FOLDER
+
+MEMORY_LIMIT_MB = 256
+COLUMN_FOLDER = "columns"
+NO_DATE = np.iinfo(np.int32).min
+TAIL_BYTES = 256
+
+# Rough memory use per row, temporaries included, used to size chunks and batches
+CSV_ROW_BYTES = 2048
+SCAN_OVERHEAD = 4
+FRAME_OVERHEAD = 3
+TEXT_VALUE_BYTES = 64
+SPC_ROW_BYTES = 512
+
+FILE_DTYPES = {
+    "date": np.int32, "category": np.int32, "number": np.float64, "invalid": np.uint8,
+    "flag": np.int8, "end": np.int64, "text": np.uint8
+}
+
+
+def memory_limit():
+    """Memory ceiling in bytes"""
+    value = os.environ.get("QC_MEMORY_LIMIT_MB", "").strip()
+    return int(float(value) * 1024 * 1024) if value else MEMORY_LIMIT_MB * 1024 * 1024
+
+
+def csv_chunk_rows(limit=None):
+    """Rows of a CSV chunk read as text that fit in the memory limit"""
+    return max(1000, (limit or memory_limit()) // CSV_ROW_BYTES)
+
+
+def column_kind(column):
+    if column == "Date":
+        return "date"
+    if column in CATEGORY_COLUMNS:
+        return "category"
+    if column in NUMERIC_COLUMNS:
+        return "number"
+    if column in FLAG_COLUMNS:
+        return "flag"
+    return "text"
+
+
+def day_number(value):
+    """Days since 1970-01-01 of a date"""
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+def read_header(path):
+    with open(path, mode="r", newline="", encoding="utf-8") as file:
+        return next(csv.reader(file), [])
+
+
+class ColumnStore:
+    """Column files of one database CSV, in <folder>/columns/<file name>/
+
+    rows is the number of records converted and categories the values
+    behind the codes of each category column, in order of first appearance.
+    dates_sorted tells whether the Date column never goes down, which lets
+    a date range be found by binary search instead of a scan.
+
+    The files are checked against the signature of the CSV. If it was only
+    appended to (it still has the bytes it ended with at the last
+    conversion) just the new rows are converted, otherwise it is rebuilt.
+    """
+    def __init__(self, path, memory_limit_mb=None):
+        self.path = path
+        self.folder = os.path.join(os.path.dirname(path), COLUMN_FOLDER, os.path.basename(path))
+        self.meta_path = os.path.join(self.folder, "columns.json")
+        self.limit = int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else memory_limit()
+        self.reset()
+        self.load()
+
+    def reset(self):
+        self.columns = []
+        self.categories = {}
+        self.codes = {}
+        self.rows = 0
+        self.dates_sorted = True
+        self.last_day = None
+        self.size = 0
+        self.tail = ""
+        self.source = None
+
+    def file(self, column, kind):
+        return os.path.join(self.folder, f"{column}.{kind}")
+
+    def files(self):
+        """(column, kind) of every column file"""
+        for column in self.columns:
+            kind = column_kind(column)
+            if kind == "number":
+                yield column, "number"
+                yield column, "invalid"
+            elif kind == "text":
+                yield column, "end"
+                yield column, "text"
+            else:
+                yield column, kind
+
+    def source_signature(self):
+        """Modification time and size of the CSV, used to detect outside edits"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def read_tail(self, size):
+        """Hex of the last bytes of the CSV before size"""
+        with open(self.path, mode="rb") as file:
+            file.seek(max(0, size - TAIL_BYTES))
+            return file.read(min(size, TAIL_BYTES)).hex()
+
+    def load(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as file:
+                saved = json.load(file)
+            self.source = saved["source"]
+            self.columns = saved["columns"]
+            self.categories = saved["categories"]
+            self.rows = saved["rows"]
+            self.dates_sorted = saved["dates_sorted"]
+            self.last_day = saved["last_day"]
+            self.size = saved["size"]
+            self.tail = saved["tail"]
+            self.codes = {column: {value: code for code, value in enumerate(values)}
+                          for column, values in self.categories.items()}
+            if not self.files_complete():
+                self.reset()
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.reset()
+        self.ensure_current()
+
+    def files_complete(self):
+        """Whether every column file holds exactly the converted rows (not so after a crash mid-write)"""
+        for column, kind in self.files():
+            size = os.path.getsize(self.file(column, kind)) if os.path.exists(self.file(column, kind)) else -1
+            if kind == "text":
+                expected = int(self.array(column, "end")[-1]) if self.rows else 0
+            else:
+                expected = self.rows * np.dtype(FILE_DTYPES[kind]).itemsize
+            if size != expected:
+                return False
+        return True
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = self.meta_path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump({"source": self.source, "columns": self.columns, "categories": self.categories,
+                       "rows": self.rows, "dates_sorted": self.dates_sorted, "last_day": self.last_day,
+                       "size": self.size, "tail": self.tail}, file)
+        os.replace(temp_path, self.meta_path)
+
+    def ensure_current(self):
+        """Convert rows appended to the CSV, or rebuild if it was edited otherwise"""
+        signature = self.source_signature()
+        if self.source == signature:
+            return
+        if (self.source is not None and signature is not None and signature[1] > self.size
+                and self.read_tail(self.size) == self.tail):
+            self.convert(self.size)
+        else:
+            self.rebuild()
+        self.save()
+
+    def rebuild(self):
+        """Convert the whole CSV again"""
+        self.reset()
+        # The old files go first so a half-built store is never taken as complete
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.makedirs(self.folder, exist_ok=True)
+        if not os.path.exists(self.path):
+            return
+        self.columns = read_header(self.path)
+        for column in self.columns:
+            if column_kind(column) == "category":
+                self.categories[column] = list(CATEGORY_COLUMNS[column])
+                self.codes[column] = {value: code for code, value in enumerate(self.categories[column])}
+        self.convert(0)
+
+    def convert(self, start):
+        """Append the CSV's records from byte offset start to the column files"""
+        signature = self.source_signature()
+        rows = 0
+        with self.undo_on_error(), open(self.path, mode="rb") as file:
+            file.seek(start)
+            # Appended rows have no header of their own
+            options = {"header": None, "names": self.columns} if start else {}
+            if start == signature[1]:
+                chunks = []
+            else:
+                chunks = read_raw(file, chunksize=csv_chunk_rows(self.limit), encoding="utf-8", **options)
+            for chunk in chunks:
+                self.add_chunk(chunk)
+                rows += len(chunk)
+        count(rows=rows, bytes_read=signature[1] - start)
+        self.source = signature
+        self.size = signature[1]
+        self.tail = self.read_tail(self.size)
+
+    @contextmanager
+    def undo_on_error(self):
+        """Cut the column files back to the rows they held if the block fails
+
+        A write that stops part way would leave the files with different
+        numbers of rows, and a later catch-up would add to them. If they
+        can't be cut back either, the next ensure_current() rebuilds.
+        """
+        sizes = {(column, kind): os.path.getsize(self.file(column, kind))
+                 for column, kind in self.files() if os.path.exists(self.file(column, kind))}
+        state = (self.rows, self.dates_sorted, self.last_day, {c: list(v) for c, v in self.categories.items()})
+        try:
+            yield
+        except BaseException:
+            self.rows, self.dates_sorted, self.last_day, self.categories = state
+            self.codes = {column: {value: code for code, value in enumerate(values)}
+                          for column, values in self.categories.items()}
+            try:
+                for column, kind in self.files():
+                    path = self.file(column, kind)
+                    if os.path.exists(path):
+                        with open(path, mode="r+b") as file:
+                            file.truncate(sizes.get((column, kind), 0))
+            except OSError:
+                self.source = None
+            raise
+
+    def add_chunk(self, chunk):
+        """Encode a frame of raw CSV text and append it to the column files"""
+        for column, kind in self.files():
+            if kind in ("invalid", "text"):
+                continue  # Written along with their number and end files
+            values = chunk[column]
+            if kind == "date":
+                dates = pd.to_datetime(values, errors="coerce")
+                valid = dates.notna().to_numpy()
+                days = np.full(len(values), NO_DATE, dtype=np.int32)
+                days[valid] = dates[valid].to_numpy().astype("datetime64[D]").astype(np.int32)
+                self.track_order(days, valid)
+                self.write(column, kind, days)
+            elif kind == "category":
+                codes = self.codes[column]
+                for value in values.unique():
+                    if value not in codes:
+                        codes[value] = len(self.categories[column])
+                        self.categories[column].append(value)
+                self.write(column, kind, values.map(codes).to_numpy(dtype=np.int32))
+            elif kind == "number":
+                text = values.str.strip()
+                numbers = pd.to_numeric(text, errors="coerce").astype("float64").to_numpy()
+                self.write(column, "number", numbers)
+                self.write(column, "invalid", (np.isnan(numbers) & (text != "").to_numpy()).astype(np.uint8))
+            elif kind == "flag":
+                flags = {label: int(flag) for label, flag in FLAG_COLUMNS[column].items()}
+                self.write(column, kind, values.map(flags).fillna(-1).to_numpy(dtype=np.int8))
+            else:
+                encoded = [value.encode("utf-8") for value in values.tolist()]
+                lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+                start = int(self.array(column, "end")[-1]) if self.rows else 0
+                self.write(column, "end", start + np.cumsum(lengths))
+                with open(self.file(column, "text"), mode="ab") as file:
+                    file.write(b"".join(encoded))
+        self.rows += len(chunk)
+
+    def track_order(self, days, valid):
+        if not self.dates_sorted or not len(days):
+            return
+        if not valid.all() or (days[1:] < days[:-1]).any() or (self.last_day is not None and days[0] < self.last_day):
+            self.dates_sorted = False
+        self.last_day = int(days[-1])
+
+    def write(self, column, kind, values):
+        with open(self.file(column, kind), mode="ab") as file:
+            file.write(np.ascontiguousarray(values, dtype=FILE_DTYPES[kind]).tobytes())
+
+    def append(self, row):
+        """Add a record just appended to the CSV, as its raw text values
+
+        Call ensure_current() before writing the record, like the summary cache.
+        """
+        if self.source is None or not self.columns:
+            self.ensure_current()
+            return
+        chunk = pd.DataFrame([[str(row.get(column, "")) for column in self.columns]], columns=self.columns,
+                             dtype=str)
+        with self.undo_on_error():
+            self.add_chunk(chunk)
+        self.source = self.source_signature()
+        self.size = self.source[1]
+        self.tail = self.read_tail(self.size)
+        self.save()
+
+    def array(self, column, kind):
+        """Read-only memory map of one column file"""
+        dtype = FILE_DTYPES[kind]
+        path = self.file(column, kind)
+        length = os.path.getsize(path) // np.dtype(dtype).itemsize if kind == "text" else self.rows
+        if not length:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+
+    def scan(self, files, start=0, stop=None):
+        """(first row, arrays) of consecutive chunks of (column, kind) files, sized to the memory limit"""
+        maps = [self.array(column, kind) for column, kind in files]
+        stop = self.rows if stop is None else stop
+        row_bytes = sum(np.dtype(FILE_DTYPES[kind]).itemsize for column, kind in files) or 1
+        step = max(1000, self.limit // (SCAN_OVERHEAD * row_bytes))
+        for first in range(start, stop, step):
+            yield first, [np.asarray(m[first:min(first + step, stop)]) for m in maps]
+        count(rows=stop - start, bytes_read=(stop - start) * row_bytes)
+
+    def date_bounds(self, date_from=None, date_to=None):
+        """First and end row that can hold dates of the range"""
+        if not self.dates_sorted or "Date" not in self.columns:
+            return 0, self.rows
+        days = self.array("Date", "date")
+        start = int(np.searchsorted(days, day_number(date_from), side="left")) if date_from is not None else 0
+        stop = int(np.searchsorted(days, day_number(date_to), side="right")) if date_to is not None else self.rows
+        return start, stop
+
+    def select(self, points=None, date_from=None, date_to=None):
+        """Numbers of the rows of the given points and date range, in file order"""
+        self.ensure_current()
+        start, stop = self.date_bounds(date_from, date_to)
+        files = [("Date", "date")]
+        wanted = None
+        if points is not None:
+            files.append(("Point", "category"))
+            wanted = np.array([self.codes["Point"][p] for p in points if p in self.codes.get("Point", {})],
+                              dtype=np.int32)
+        low = day_number(date_from) if date_from is not None else None
+        high = day_number(date_to) if date_to is not None else None
+
+        parts = []
+        for first, arrays in self.scan(files, start, stop):
+            days = arrays[0]
+            mask = days != NO_DATE if low is not None or high is not None else np.ones(len(days), dtype=bool)
+            if low is not None:
+                mask &= days >= low
+            if high is not None:
+                mask &= days <= high
+            if wanted is not None:
+                mask &= np.isin(arrays[1], wanted)
+            parts.append(np.flatnonzero(mask) + first)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def contains(self, date_value, point, test_type):
+        """Whether a record of this date, point and test type is already in the file"""
+        self.ensure_current()
+        point_code = self.codes.get("Point", {}).get(point)
+        type_code = self.codes.get("Test Type", {}).get(test_type)
+        if point_code is None or type_code is None:
+            return False
+        start, stop = self.date_bounds(date_value, date_value)
+        day = day_number(date_value)
+        for first, (days, points, types) in self.scan(
+                [("Date", "date"), ("Point", "category"), ("Test Type", "category")], start, stop):
+            if ((days == day) & (points == point_code) & (types == type_code)).any():
+                return True
+        return False
+
+    def frame_row_bytes(self, columns):
+        size = 0
+        for column in columns:
+            kind = column_kind(column)
+            if kind == "text":
+                text_bytes = os.path.getsize(self.file(column, "text"))
+                size += TEXT_VALUE_BYTES + (text_bytes // self.rows if self.rows else 0)
+            else:
+                size += {"date": 8, "category": 8, "number": 10, "flag": 2}[kind]
+        return size * FRAME_OVERHEAD
+
+    def frame(self, rows, columns=None):
+        """Typed frame of the given rows, as read_results() would give them
+
+        Raises ValueError if the rows would not fit in the memory limit.
+        """
+        columns = [c for c in self.columns if columns is None or c in columns]
+        needed = len(rows) * self.frame_row_bytes(columns)
+        if needed > self.limit:
+            raise ValueError(f"The {len(rows)} selected rows need about {needed >> 20} MB, more than the "
+                             f"{self.limit >> 20} MB memory limit. Select a shorter date range.")
+        rows = np.asarray(rows, dtype=np.int64)
+        df = pd.DataFrame(index=pd.RangeIndex(len(rows)))
+        for column in columns:
+            kind = column_kind(column)
+            if kind == "date":
+                days = self.array(column, kind)[rows]
+                dates = days.astype("datetime64[D]")
+                dates[days == NO_DATE] = np.datetime64("NaT")
+                df[column] = pd.Series(dates).astype(self.date_dtype())
+            elif kind == "category":
+                df[column] = self.decode_category(column, self.array(column, kind)[rows])
+            elif kind == "number":
+                df[column] = pd.array(self.array(column, kind)[rows], dtype="Float64")
+                df[invalid_column(column)] = self.array(column, "invalid")[rows].astype(bool)
+            elif kind == "flag":
+                flags = self.array(column, kind)[rows]
+                df[column] = pd.arrays.BooleanArray(flags == 1, flags < 0)
+            else:
+                ends = self.array(column, "end")
+                text = self.array(column, "text")
+                stops = ends[rows]
+                starts = np.where(rows > 0, ends[np.maximum(rows - 1, 0)], 0)
+                df[column] = pd.Series([bytes(text[a:b]).decode("utf-8") for a, b in zip(starts, stops)],
+                                       dtype=str)
+        count(rows=len(rows))
+        return df
+
+    @staticmethod
+    def date_dtype():
+        # Whatever resolution pandas parses ISO dates to, so frames match read_results()
+        return pd.to_datetime(pd.Series(["2000-01-01"])).dtype
+
+    def decode_category(self, column, codes):
+        """Categorical of codes, with the known values first and the others sorted like apply_schema()"""
+        values = self.categories[column]
+        known = list(CATEGORY_COLUMNS[column])
+        order = known + sorted(set(values) - set(known))
+        position = {value: i for i, value in enumerate(order)}
+        remap = np.array([position[value] for value in values], dtype=np.int32)
+        return pd.Categorical.from_codes(remap[codes], dtype=pd.CategoricalDtype(order))
+
+    def spc(self, column, date_from, date_to, points=None):
+        """SPC signals of the results of a date range, baselines taken from each point's whole history
+
+        compute_spc() only looks back, so every point's history is read up to
+        date_to. Points are taken a batch at a time, as many as fit in the
+        memory limit (at least one), and their signals trimmed to the range.
+        Reads the rows converted so far, call ensure_current() first.
+        """
+        stop = self.date_bounds(None, date_to)[1]
+        high = day_number(date_to)
+        files = [("Date", "date"), ("Point", "category"), (column, "number")]
+        names = self.categories.get("Point", [])
+        if points is None:
+            wanted = range(len(names))
+        else:
+            wanted = [self.codes["Point"][p] for p in points if p in self.codes.get("Point", {})]
+
+        # One pass counts each point's history, so the batches can be sized to the limit
+        sizes = np.zeros(len(names), dtype=np.int64)
+        for first, (days, codes) in self.scan(files[:2], 0, stop):
+            kept = (days != NO_DATE) & (days <= high)
+            sizes += np.bincount(codes[kept], minlength=len(names))
+
+        batches, batch, batch_rows = [], [], 0
+        budget = self.limit // SPC_ROW_BYTES
+        for code in sorted((c for c in wanted if sizes[c]), key=lambda c: str(names[c])):
+            if batch and batch_rows + sizes[code] > budget:
+                batches.append(batch)
+                batch, batch_rows = [], 0
+            batch.append(code)
+            batch_rows += sizes[code]
+        if batch:
+            batches.append(batch)
+
+        parts = []
+        for batch in batches:
+            wanted_codes = np.array(batch, dtype=np.int32)
+            days_parts, code_parts, value_parts = [], [], []
+            for first, (days, codes, values) in self.scan(files, 0, stop):
+                kept = (days != NO_DATE) & (days <= high) & np.isin(codes, wanted_codes)
+                days_parts.append(days[kept])
+                code_parts.append(codes[kept])
+                value_parts.append(values[kept])
+            history = pd.DataFrame({
+                "Date": pd.Series(np.concatenate(days_parts).astype("datetime64[D]")).astype(self.date_dtype()),
+                "Point": np.array(names, dtype=object)[np.concatenate(code_parts)],
+                column: np.concatenate(value_parts)
+            })
+            spc = compute_spc(history, column)
+            parts.append(spc[spc["Date"] >= pd.Timestamp(date_from)])
+        if not parts:
+            empty = pd.DataFrame({"Date": pd.Series(dtype=self.date_dtype()), "Point": pd.Series(dtype=str),
+                                  column: pd.Series(dtype="float64")})
+            return compute_spc(empty, column)
+        return pd.concat(parts, ignore_index=True)
+
+
+class ColumnCache:
+    """Column stores of the QC databases by database key, opened on first use"""
+    def __init__(self, db_files=DB_FILES, folder=DB_FOLDER, memory_limit_mb=None):
+        self.db_files = db_files
+        self.folder = folder
+        self.memory_limit_mb = memory_limit_mb
+        self.stores = {}
+
+    def store(self, db_key):
+        store = self.stores.get(db_key)
+        if store is None:
+            store = self.stores[db_key] = ColumnStore(os.path.join(self.folder, self.db_files[db_key]),
+                                                      self.memory_limit_mb)
+        return store
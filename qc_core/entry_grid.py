@@ -0,0 +1,123 @@
+"""Spreadsheet-style entry of a test day's micro and chem results
+
+An EntryGrid holds the rows of one table, one per point, as the operator
+types them in. An edit re-evaluates only the row it changed, so the status
+next to the values is always current, and take_records() hands every
+edited row over for export in one go.
+"""
+
+from .water import evaluate_micro, evaluate_chem
+
+GRID_KINDS = {
+    "Microbiology": {
+        "defaults": {"Total Count": "", "Coliforms": "Absent", "Pseudomonas": "Absent", "Comments": ""},
+        "choices": {"Coliforms": ("Absent", "Present"), "Pseudomonas": ("Absent", "Present")}
+    },
+    "Chemistry": {
+        "defaults": {"Conductivity": "", "Oxidizable": "No color change", "Cl Test": "", "Comments": ""},
+        "choices": {"Oxidizable": ("No color change", "Color change")}
+    }
+}
+
+
+def micro_status(point, values):
+    status = evaluate_micro(point, values["Total Count"], values["Coliforms"], values["Pseudomonas"])
+    return status, "Non-Conform" if status.startswith("Non-Conform") else status
+
+
+def chem_status(point, values):
+    status, issues = evaluate_chem(point, values["Conductivity"], values["Oxidizable"], values["Cl Test"])
+    return status, "Non-Conform" if issues else "Conform"
+
+
+class EntryGrid:
+    """Values and live status of the points of one micro or chem table
+
+    columns lists the editable columns in Tab order, display_columns the
+    table's columns. Each edited row keeps the date, test type and day it
+    was entered for, as the Add Data button did.
+    """
+    def __init__(self, kind, points=()):
+        self.kind = kind
+        spec = GRID_KINDS[kind]
+        self.defaults = spec["defaults"]
+        self.choices = spec["choices"]
+        self.columns = tuple(self.defaults)
+        self.display_columns = ("Point",) + self.columns[:-1] + ("Status", "Comments")
+        self.evaluate = micro_status if kind == "Microbiology" else chem_status
+        self.rows = {}
+        self.status = {}
+        self.contexts = {}
+        for point in points:
+            self.add_point(point)
+
+    def add_point(self, point):
+        if point not in self.rows:
+            self.rows[point] = dict(self.defaults)
+            self.status[point] = ("", "")
+
+    def values(self, point):
+        """Row of the table, in display_columns order"""
+        row = self.rows[point]
+        return (point,) + tuple(row[c] for c in self.columns[:-1]) + (self.status[point][0], row["Comments"])
+
+    def tag(self, point):
+        return self.status[point][1]
+
+    def resolve(self, column, text):
+        """Value of a typed cell; choices can be typed by their first letters, empty means the default
+
+        Raises ValueError for text that is none of a column's choices.
+        """
+        text = text.strip()
+        if column not in self.choices or not text:
+            return text or self.defaults[column]
+        for choice in self.choices[column]:
+            if choice.lower().startswith(text.lower()):
+                return choice
+        raise ValueError(f"{column} must be one of: {', '.join(self.choices[column])}")
+
+    def next_choice(self, column, value):
+        choices = self.choices[column]
+        return choices[(choices.index(value) + 1) % len(choices)] if value in choices else choices[0]
+
+    def set(self, point, column, text, context):
+        """Enter a cell and re-evaluate its row, returns the row's (status, tag)
+
+        context holds the Date, Test Type and Day the row is entered for.
+        """
+        row = self.rows[point]
+        row[column] = self.resolve(column, text)
+        self.contexts[point] = dict(context)
+        if column != "Comments" or not self.status[point][0]:
+            self.status[point] = self.evaluate(point, row)
+        return self.status[point]
+
+    def restore(self, record):
+        """Put a record that was not saved back into its row for correcting
+
+        Returns False, leaving the row alone, if the row was edited again
+        since the record was taken.
+        """
+        point = record["Point"]
+        self.add_point(point)
+        if point in self.contexts:
+            return False
+        self.rows[point] = {column: record[column] for column in self.columns}
+        self.contexts[point] = {key: record[key] for key in ("Date", "Test Type", "Day")}
+        self.status[point] = self.evaluate(point, self.rows[point])
+        return True
+
+    def pending(self):
+        """Number of edited rows not handed over yet"""
+        return len(self.contexts)
+
+    def take_records(self):
+        """Records of the edited rows, in table order, for export_record()"""
+        records = []
+        for point, row in self.rows.items():
+            context = self.contexts.pop(point, None)
+            if context is not None:
+                records.append({**context, "Point": point, **row, "Status": self.status[point][0],
+                                "Tab": self.kind})
+        return records
@@ -0,0 +1,608 @@
+"""Inspection record store (inspection_results.csv)
+
+Schema version 2 keeps the plan and the result in separate typed columns:
+the AQL, acceptance and rejection numbers of the plan, the defects found at
+inspection, and the required tests as a JSON list. Records are read back as
+dicts with ints, floats and lists (None for an empty field), so nothing has
+to parse "AQL2.5% Major: Ac 1/Re 2" or "Major Defects Found: 3" again.
+
+Every plan generated for an IC is a new inspection attempt, numbered from 1
+(schema version 3). Results are written into one attempt, earlier attempts
+keep theirs. InspectionIndex keeps the byte offset of each attempt so one
+can be read without going through the whole file. A result is appended as
+a new version of its attempt record rather than rewritten in place; readers
+keep the last version of each attempt, in the place of its first, and the
+file is compacted once half of it is superseded versions.
+
+Older files are migrated the first time they are opened; the original is
+kept next to it as inspection_results.v<version>.csv. Version 1 files held
+the plan and the defects found as strings in the same columns; versions 1
+and 2 wrote a result into every record of the IC, so migrated attempts of
+one IC share it.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+from bisect import bisect_left
+from datetime import datetime
+
+from .aql import aql_text
+from .metrics import count, count_read, count_write
+from .writer import PartlySaved, run_after_save
+
+INSPECTION_FILE = "inspection_results.csv"
+INDEX_FILE = "inspection_index.json"
+COMPACT_MIN_RECORDS = 1000
+
+INSPECTION_SCHEMA_VERSION = 3
+
+INSPECTION_COLUMNS = [
+    "Timestamp", "Internal Code", "Attempt", "Product Name", "Product Code", "Sampler", "Supplier", "Units", "Item Type",
+    "Inspection Level", "Sample Size", "Required Tests",
+    "Major AQL", "Major Ac", "Major Re", "Major Found",
+    "Minor AQL", "Minor Ac", "Minor Re", "Minor Found",
+    "Status", "Inspector", "Comments"
+]
+
+# Header of each schema version, a file's header tells its version
+INSPECTION_SCHEMAS = {
+    1: [
+        "Timestamp", "Internal Code", "Product Name", "Product Code", "Sampler", "Supplier", "Units", "Item Type",
+        "Inspection Level", "Sample Size", "Required Tests",
+        "Major Defects", "Minor Defects", "Status", "Inspector", "Comments"
+    ],
+    2: [
+        "Timestamp", "Internal Code", "Product Name", "Product Code", "Sampler", "Supplier", "Units", "Item Type",
+        "Inspection Level", "Sample Size", "Required Tests",
+        "Major AQL", "Major Ac", "Major Re", "Major Found",
+        "Minor AQL", "Minor Ac", "Minor Re", "Minor Found",
+        "Status", "Inspector", "Comments"
+    ],
+    3: INSPECTION_COLUMNS
+}
+
+INTEGER_COLUMNS = ["Attempt", "Units", "Sample Size", "Major Ac", "Major Re", "Major Found", "Minor Ac", "Minor Re", "Minor Found"]
+AQL_COLUMNS = ["Major AQL", "Minor AQL"]
+COLUMN_INDEX = {column: i for i, column in enumerate(INSPECTION_COLUMNS)}
+
+
+def parse_integer(text):
+    return int(text) if text.strip() else None
+
+
+def parse_aql(text):
+    return float(text) if text.strip() else None
+
+
+def typed_record(row, columns=INSPECTION_COLUMNS):
+    """Record dict with typed values from a row of CSV text"""
+    record = dict.fromkeys(INSPECTION_COLUMNS, "")
+    record.update(zip(columns, row))
+    for column in INTEGER_COLUMNS:
+        record[column] = parse_integer(record[column])
+    for column in AQL_COLUMNS:
+        record[column] = parse_aql(record[column])
+    record["Required Tests"] = json.loads(record["Required Tests"] or "[]")
+    return record
+
+
+def storage_row(record):
+    """CSV text of a typed record, in INSPECTION_COLUMNS order"""
+    row = []
+    for column in INSPECTION_COLUMNS:
+        value = record.get(column)
+        if value is None:
+            row.append("")
+        elif column == "Required Tests":
+            row.append(json.dumps(value, ensure_ascii=False))
+        elif column in AQL_COLUMNS:
+            row.append(aql_text(value))
+        else:
+            row.append(str(value))
+    return row
+
+
+def defect_text(record, kind):
+    """Defects found, or the Ac/Re of the plan while the lot is not inspected ("Major" or "Minor")"""
+    if record[f"{kind} Found"] is not None:
+        return str(record[f"{kind} Found"])
+    if record[f"{kind} Ac"] is None:
+        return ""
+    return f"Ac {record[f'{kind} Ac']}/Re {record[f'{kind} Re']}"
+
+
+def schema_version(header):
+    for version, columns in INSPECTION_SCHEMAS.items():
+        if header == columns:
+            return version
+    raise ValueError("inspection_results.csv has unknown columns: " + ", ".join(header))
+
+
+LEGACY_PLAN = re.compile(r"AQL\s*([\d.]+)%.*Ac\s*(\d+)\s*/\s*Re\s*(\d+)")
+LEGACY_FOUND = re.compile(r"Found:\s*(\d+)")
+
+
+def legacy_record(row):
+    """Typed record of a version 1 row
+
+    The defect columns held the plan ("AQL2.5% Major: Ac 1/Re 2") until the
+    lot was inspected and the number found ("Major Defects Found: 3") after,
+    so the Ac/Re of inspected version 1 lots are unknown.
+    """
+    old = dict(zip(INSPECTION_SCHEMAS[1], row))
+    record = {column: old.get(column, "") for column in INSPECTION_COLUMNS}
+    for column in ("Units", "Sample Size"):
+        try:
+            record[column] = int(old[column])
+        except ValueError:
+            record[column] = None
+    record["Required Tests"] = [test for test in old["Required Tests"].split(", ") if test]
+    for kind in ("Major", "Minor"):
+        text = old[f"{kind} Defects"]
+        plan = LEGACY_PLAN.search(text)
+        found = LEGACY_FOUND.search(text)
+        record[f"{kind} AQL"] = float(plan.group(1)) if plan else None
+        record[f"{kind} Ac"] = int(plan.group(2)) if plan else None
+        record[f"{kind} Re"] = int(plan.group(3)) if plan else None
+        record[f"{kind} Found"] = int(found.group(1)) if found else None
+    return record
+
+
+def migrate_inspection_file(path=INSPECTION_FILE):
+    """Rewrite a file of an older schema version in the current one
+
+    Returns the number of records migrated, 0 if the file is already
+    current or does not exist. The original file is kept as
+    <name>.v<version>.csv. Records of an IC become attempts 1, 2, ... in
+    file order.
+    """
+    try:
+        with open(path, mode="r", newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            version = schema_version(next(reader, INSPECTION_COLUMNS))
+            if version == INSPECTION_SCHEMA_VERSION:
+                return 0
+            if version == 1:
+                records = [legacy_record(row) for row in reader if row]
+            else:
+                records = [typed_record(row, INSPECTION_SCHEMAS[version]) for row in reader if row]
+    except FileNotFoundError:
+        return 0
+    count_read(path, rows=len(records))
+
+    attempts = {}
+    for record in records:
+        ic = record["Internal Code"]
+        attempts[ic] = record["Attempt"] = attempts.get(ic, 0) + 1
+
+    temp_path = path + ".tmp"
+    with open(temp_path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(INSPECTION_COLUMNS)
+        writer.writerows(storage_row(record) for record in records)
+    os.replace(path, f"{os.path.splitext(path)[0]}.v{version}.csv")
+    os.replace(temp_path, path)
+    count_write(path, rows=len(records))
+    return len(records)
+
+
+def csv_text(row):
+    """One CSV record as the csv module writes it, line terminator included"""
+    buffer = io.StringIO(newline="")
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+
+def parse_record(text):
+    return next(csv.reader(io.StringIO(text, newline="")), [])
+
+
+def raw_records(file):
+    """Bytes of each CSV record of a binary file, quoted line breaks included"""
+    pending = b""
+    for line in file:
+        pending += line
+        # Quotes are doubled inside quoted fields, so an odd count means the record goes on
+        if pending.count(b'"') % 2 == 0:
+            yield pending
+            pending = b""
+    if pending:
+        yield pending
+
+
+class InspectionIndex:
+    """Byte offsets of the inspection attempts, by Internal Code
+
+    offsets holds the start of every record in file order plus the end of
+    the file; attempts maps each IC to its [attempt, record number] pairs,
+    sorted by attempt, pointing at the newest version of each attempt.
+    Saved to inspection_index.json with the signature of the inspection
+    file and rebuilt with one scan if the file was changed outside of it.
+    With index_path=None the index only lives in memory.
+
+    Writes through the index do not save it, that would cost as much as
+    the write itself on a large file; call save() when done, an index that
+    was not saved is rebuilt on the next load.
+    """
+    def __init__(self, path=INSPECTION_FILE, index_path=INDEX_FILE):
+        self.path = path
+        self.index_path = index_path
+        self.offsets = []
+        self.attempts = {}
+        self.source = None
+        self.load()
+
+    def source_signature(self):
+        """Modification time and size of the inspection file, used to detect outside edits"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def load(self):
+        if self.index_path:
+            try:
+                with open(self.index_path, encoding="utf-8") as file:
+                    saved = json.load(file)
+                self.source = saved["source"]
+                self.offsets = saved["offsets"]
+                self.attempts = saved["attempts"]
+            except (FileNotFoundError, ValueError, KeyError, TypeError):
+                self.source = None
+        self.ensure_current()
+
+    def save(self):
+        if not self.index_path:
+            return
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump({"source": self.source, "offsets": self.offsets, "attempts": self.attempts}, file)
+        os.replace(temp_path, self.index_path)
+
+    def ensure_current(self):
+        """Migrate the file if needed and rebuild the index if the file changed"""
+        migrate_inspection_file(self.path)
+        if self.source != self.source_signature():
+            self.rebuild()
+            self.save()
+
+    def rebuild(self):
+        """Index the file with one scan; a record cut off by a crash is left out and overwritten by the next append"""
+        self.offsets = []
+        versions = {}
+        ic_column, attempt_column = COLUMN_INDEX["Internal Code"], COLUMN_INDEX["Attempt"]
+        try:
+            with open(self.path, mode="rb") as file:
+                records = raw_records(file)
+                header = next(records, b"")
+                if not header.endswith(b"\n"):
+                    return  # Empty file, append() writes the header
+                offset = len(header)
+                for record in records:
+                    if not record.endswith(b"\n"):
+                        break
+                    row = parse_record(record.decode("utf-8"))
+                    if row:
+                        # A later version of an attempt supersedes the earlier ones
+                        versions.setdefault(row[ic_column], {})[int(row[attempt_column])] = len(self.offsets)
+                        self.offsets.append(offset)
+                    offset += len(record)
+                self.offsets.append(offset)
+            count(rows=len(self.offsets) - 1, bytes_read=offset)
+        except FileNotFoundError:
+            pass
+        finally:
+            self.attempts = {ic: sorted([attempt, number] for attempt, number in numbers.items())
+                             for ic, numbers in versions.items()}
+            self.source = self.source_signature()
+
+    def superseded(self):
+        """Number of records in the file that are older versions of an attempt"""
+        return len(self.offsets) - 1 - sum(len(attempts) for attempts in self.attempts.values()) if self.offsets else 0
+
+    def find(self, ic, attempt=None):
+        """Record number of an attempt of an IC, its latest attempt by default, None if there is none"""
+        attempts = self.attempts.get(ic)
+        if not attempts:
+            return None
+        if attempt is None:
+            return attempts[-1][1]
+        i = bisect_left(attempts, [attempt])
+        if i < len(attempts) and attempts[i][0] == attempt:
+            return attempts[i][1]
+        return None
+
+    def next_attempt(self, ic):
+        attempts = self.attempts.get(ic)
+        return attempts[-1][0] + 1 if attempts else 1
+
+    def read_rows(self, numbers):
+        """CSV rows of the given record numbers"""
+        rows = []
+        size = 0
+        with open(self.path, mode="rb") as file:
+            for number in numbers:
+                start, end = self.offsets[number], self.offsets[number + 1]
+                file.seek(start)
+                rows.append(parse_record(file.read(end - start).decode("utf-8")))
+                size += end - start
+        count(rows=len(rows), bytes_read=size)
+        return rows
+
+    def append(self, row):
+        """Append a record at the end of the file, creating it with its header if needed
+
+        A record of an attempt that is already in the file supersedes it.
+        Anything after the last indexed record, a record cut off by a
+        crash, is overwritten.
+        """
+        data = csv_text(row).encode("utf-8")
+        header = b""
+        if not self.offsets:
+            header = csv_text(INSPECTION_COLUMNS).encode("utf-8")
+            self.offsets = [0]
+        with open(self.path, mode="ab") as file:
+            file.truncate(self.offsets[-1])
+            file.write(header + data)
+        if header:
+            self.offsets = [len(header)]
+        ic, attempt = row[COLUMN_INDEX["Internal Code"]], int(row[COLUMN_INDEX["Attempt"]])
+        attempts = self.attempts.setdefault(ic, [])
+        i = bisect_left(attempts, [attempt])
+        if i < len(attempts) and attempts[i][0] == attempt:
+            attempts[i][1] = len(self.offsets) - 1
+        else:
+            attempts.insert(i, [attempt, len(self.offsets) - 1])
+        self.offsets.append(self.offsets[-1] + len(data))
+        count(rows=1, bytes_written=len(header) + len(data))
+        self.source = self.source_signature()
+
+    def replace(self, row):
+        """Write a new version of an attempt record, compacting the file once half of it is superseded"""
+        self.append(row)
+        superseded = self.superseded()
+        if superseded >= COMPACT_MIN_RECORDS and superseded * 2 >= len(self.offsets) - 1:
+            try:
+                self.compact()
+            except OSError:
+                pass  # The file is open elsewhere, compact on a later save
+
+    def compact(self):
+        """Rewrite the file without superseded versions, through a temporary file"""
+        ic_column, attempt_column = COLUMN_INDEX["Internal Code"], COLUMN_INDEX["Attempt"]
+        latest = {}
+        with open(self.path, mode="rb") as file:
+            records = raw_records(file)
+            header = next(records)
+            for record in records:
+                if not record.endswith(b"\n"):
+                    break
+                row = parse_record(record.decode("utf-8"))
+                if row:
+                    latest[row[ic_column], row[attempt_column]] = record
+        temp_path = self.path + ".tmp"
+        with open(temp_path, mode="wb") as file:
+            file.write(header)
+            file.writelines(latest.values())
+        os.replace(temp_path, self.path)
+        count(rows=len(latest), bytes_written=len(header) + sum(len(record) for record in latest.values()))
+        self.rebuild()
+
+
+def open_index(path, index):
+    """The given index, or an in-memory one built from the file"""
+    if index is None:
+        return InspectionIndex(path, index_path=None)
+    index.ensure_current()
+    return index
+
+
+def append_inspection_record(plan, timestamp, path=INSPECTION_FILE, change_feed=None, scorecard=None, index=None,
+                             switching=None):
+    """Append a new inspection attempt of a plan, conformity fields are filled in later
+
+    Returns the attempt number. index is the InspectionIndex of the same
+    file; without one the file is scanned to number the attempt. scorecard
+    and switching (a SupplierSwitching) are kept in sync with the file.
+    Raises PartlySaved if the record was appended but a store or the change
+    feed could not be updated.
+    """
+    index = open_index(path, index)
+    record = {
+        "Timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        "Internal Code": plan["ic"], "Attempt": index.next_attempt(plan["ic"]),
+        "Product Name": plan["product_name"], "Product Code": plan["product_code"],
+        "Sampler": plan["sampler"], "Supplier": plan["supplier"], "Units": plan["units"], "Item Type": plan["item"],
+        "Inspection Level": plan["level"], "Sample Size": plan["sample"], "Required Tests": list(plan["tests"]),
+        "Major AQL": plan["major_aql"], "Major Ac": plan["major"], "Major Re": plan["major_re"],
+        "Minor AQL": plan["minor_aql"], "Minor Ac": plan["minor"], "Minor Re": plan["minor_re"]
+    }
+    row = storage_row(record)  # Found, Status, Inspector and Comments stay empty until conformity
+    for store in (scorecard, switching):
+        if store is not None:
+            store.ensure_current()
+    index.append(row)
+
+    # A plan has no result yet, it only changes the file the stores were built from
+    steps = []
+    for store in (scorecard, switching):
+        if store is not None:
+            steps += [store.mark_synced, store.save]
+    if change_feed is not None:
+        steps.append(lambda: change_feed.append([("inspections", "insert", {
+            "Internal Code": plan["ic"], "Attempt": record["Attempt"]}, typed_record(row))]))
+    try:
+        run_after_save(steps)
+    except PartlySaved as e:
+        e.result = record["Attempt"]
+        raise
+    return record["Attempt"]
+
+
+def complete_records(file):
+    """Text of each complete CSV record of a text file, a last record cut off by a crash is left out"""
+    pending = ""
+    for line in file:
+        pending += line
+        if pending.count('"') % 2 == 0 and pending.endswith("\n"):
+            yield pending
+            pending = ""
+
+
+def read_rows(file):
+    """Typed records of an open inspection file, the last version of each attempt in the place of its first
+
+    A record cut off by a crash is left out, as the index does.
+    """
+    reader = csv.reader(complete_records(file))
+    version = schema_version(next(reader, INSPECTION_COLUMNS))
+    if version != INSPECTION_SCHEMA_VERSION:
+        raise ValueError(f"inspection_results.csv is still in schema version {version}, "
+                         "open it in the AQL app once to migrate it")
+    records = {}
+    for row in reader:
+        if row:
+            record = typed_record(row)
+            records[record["Internal Code"], record["Attempt"]] = record
+    return records.values()
+
+
+def read_inspection_records(path=INSPECTION_FILE, migrate=True):
+    """All inspection records (every attempt) as typed dicts
+
+    Without migrate a file of an older schema version is left alone and
+    raises ValueError, for readers that must not write.
+    """
+    if migrate:
+        migrate_inspection_file(path)
+    with open(path, mode="r", newline="", encoding="utf-8") as file:
+        rows = list(read_rows(file))
+    count_read(path, rows=len(rows))
+    return rows
+
+
+def filter_inspection_records(rows, search_ic="", search_product_name="", start_date="", end_date=""):
+    """Return the records matching the search criteria"""
+    start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+    end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    search_ic = search_ic.lower()
+    search_product_name = search_product_name.lower()
+
+    matches = []
+    for row in rows:
+        # Skip header if present
+        if "Timestamp" not in row:
+            continue
+
+        # IC filter
+        if search_ic and search_ic not in row["Internal Code"].lower():
+            continue
+
+        # Product name filter
+        if search_product_name and search_product_name not in (row.get("Product Name") or "").lower():
+            continue
+
+        # Date range filter
+        if start or end:
+            try:
+                record_date = datetime.strptime(row["Timestamp"], "%Y-%m-%d %H:%M:%S").date()
+                if start and record_date < start:
+                    continue
+                if end and record_date > end:
+                    continue
+            except ValueError:
+                pass
+
+        matches.append(row)
+    return matches
+
+
+def search_inspection_records(search_ic="", search_product_name="", start_date="", end_date="", path=INSPECTION_FILE,
+                              latest_only=False, index=None):
+    """Return the inspection records matching the search criteria
+
+    With latest_only, only the latest attempt of each IC is returned; the
+    ICs are matched on the index and only their latest records are read.
+    """
+    if latest_only:
+        index = open_index(path, index)
+        if not index.offsets:
+            raise FileNotFoundError(path)
+        search = search_ic.lower()
+        numbers = sorted(attempts[-1][1] for ic, attempts in index.attempts.items() if search in ic.lower())
+        rows = (typed_record(row) for row in index.read_rows(numbers))
+        return filter_inspection_records(rows, search_ic, search_product_name, start_date, end_date)
+
+    migrate_inspection_file(path)
+    with open(path, mode="r", newline="", encoding="utf-8") as file:
+        matches = filter_inspection_records(read_rows(file), search_ic, search_product_name, start_date, end_date)
+    count_read(path, rows=len(matches))
+    return matches
+
+
+def update_conformity_record(ic, product_name, product_code, status, inspector, comments,
+                             major_defects, minor_defects, path=INSPECTION_FILE, change_feed=None, scorecard=None,
+                             attempt=None, index=None, switching=None):
+    """Write conformity results into one inspection attempt of an IC, its latest by default
+
+    Returns the certificate fields (supplier, item type, units, sample size,
+    inspection level) and the attempt number of the record, or None if the
+    IC has no such attempt. Other attempts are left as they are.
+    Raises FileNotFoundError if there are no inspection records yet, and
+    PartlySaved, with the certificate fields as its result, if the record
+    was written but a store or the change feed could not be updated.
+    """
+    index = open_index(path, index)
+    if not index.offsets:
+        raise FileNotFoundError(path)
+    number = index.find(ic, attempt)
+    if number is None:
+        return None
+
+    column = COLUMN_INDEX
+    row = index.read_rows([number])[0]
+    cert_fields = {
+        "supplier": row[column["Supplier"]],
+        "item_type": row[column["Item Type"]],
+        "units": row[column["Units"]],
+        "sample_size": row[column["Sample Size"]],
+        "inspection_level": row[column["Inspection Level"]],
+        "attempt": int(row[column["Attempt"]])
+    }
+
+    row[column["Status"]] = status
+    row[column["Inspector"]] = inspector
+    row[column["Comments"]] = comments
+    row[column["Major Found"]] = str(major_defects)
+    row[column["Minor Found"]] = str(minor_defects)
+
+    # Update product name and code if they were provided
+    if product_name:
+        row[column["Product Name"]] = product_name
+    if product_code:
+        row[column["Product Code"]] = product_code
+
+    for store in (scorecard, switching):
+        if store is not None:
+            store.ensure_current()
+    index.replace(row)
+    updated = typed_record(row)
+
+    steps = []
+    for store in (scorecard, switching):
+        if store is not None:
+            steps += [lambda store=store: store.update_lot(updated), store.mark_synced, store.save]
+    if change_feed is not None:
+        steps.append(lambda: change_feed.append([("inspections", "update", {
+            "Internal Code": ic, "Attempt": cert_fields["attempt"]}, updated)]))
+    try:
+        run_after_save(steps)
+    except PartlySaved as e:
+        e.result = cert_fields
+        raise
+
+    return cert_fields
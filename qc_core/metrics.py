@@ -0,0 +1,161 @@
+"""Timing instrumentation for user actions
+
+Each instrumented action appends one JSON line to a rotating metrics file:
+
+    {"time": "2025-03-30 10:15:00", "action": "export_data", "wall_s": 1.92,
+     "rows": 52, "bytes_read": 3481920, "bytes_written": 3486012, "status": "ok"}
+
+Saves queued to the background writer are measured on the writer thread,
+one line per job. Extra fields given to measure() are written into the
+line; the Water QC app tags the records of one export with the same
+"batch" id and its "batch_size", so the lines of an export can be summed.
+
+Store functions report the rows and bytes they touch with count(), which
+returns immediately when no action is being measured, so the cost outside
+an action is one attribute lookup.
+
+Set QC_PROFILE to a comma separated list of action names (or *) to also
+run those actions under cProfile and dump the profile to Profiles/.
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+METRICS_FILE = "qc_metrics.jsonl"
+METRICS_MAX_BYTES = 1024 * 1024
+METRICS_BACKUPS = 5
+PROFILE_FOLDER = "Profiles"
+
+logger = logging.getLogger("qc_core.metrics")
+logger.propagate = False
+_state = threading.local()
+
+
+def configure_metrics(path=METRICS_FILE, max_bytes=METRICS_MAX_BYTES, backup_count=METRICS_BACKUPS):
+    """Send metrics to a rotating file, replaces any previous configuration"""
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def profiled_actions():
+    value = os.environ.get("QC_PROFILE", "")
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def active_actions():
+    stack = getattr(_state, "stack", None)
+    if stack is None:
+        stack = _state.stack = []
+    return stack
+
+
+def count(rows=0, bytes_read=0, bytes_written=0):
+    """Add rows and bytes to every action being measured on this thread"""
+    stack = getattr(_state, "stack", None)
+    if not stack:
+        return
+    for action in stack:
+        action["rows"] += rows
+        action["bytes_read"] += bytes_read
+        action["bytes_written"] += bytes_written
+
+
+def count_read(path, rows=0):
+    """Count a whole file as read"""
+    if getattr(_state, "stack", None):
+        count(rows=rows, bytes_read=os.path.getsize(path))
+
+
+def count_write(path, size_before=0, rows=0):
+    """Count the bytes a file grew by (or its whole size if rewritten) as written"""
+    if getattr(_state, "stack", None):
+        count(rows=rows, bytes_written=max(0, os.path.getsize(path) - size_before))
+
+
+def file_size(path):
+    """Size of a file before a write, 0 if it does not exist yet"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+@contextmanager
+def measure(name, **fields):
+    """Time the enclosed block as action `name` and write its metrics line, with `fields` added"""
+    action = {"rows": 0, "bytes_read": 0, "bytes_written": 0}
+    stack = active_actions()
+    stack.append(action)
+
+    # Only the outermost profiled action runs a profiler, cProfile can't nest
+    profiled = profiled_actions()
+    profiler = None
+    if (name in profiled or "*" in profiled) and not getattr(_state, "profiling", False):
+        profiler = cProfile.Profile()
+        _state.profiling = True
+
+    started = datetime.now()
+    status = "ok"
+    began = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield action
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _state.profiling = False
+        wall = time.perf_counter() - began
+        stack.pop()
+
+        entry = {
+            "time": started.strftime("%Y-%m-%d %H:%M:%S"),
+            "action": name,
+            "wall_s": round(wall, 6),
+            **action,
+            **fields,
+            "status": status
+        }
+        if profiler is not None:
+            os.makedirs(PROFILE_FOLDER, exist_ok=True)
+            entry["profile"] = os.path.join(PROFILE_FOLDER, f"{name}-{started.strftime('%Y%m%d-%H%M%S-%f')}.prof")
+            profiler.dump_stats(entry["profile"])
+        write_entry(entry)
+
+
+def write_entry(entry):
+    if not logger.handlers:
+        configure_metrics()
+    try:
+        logger.info(json.dumps(entry))
+    except Exception:
+        pass  # Metrics must never break the action itself
+
+
+def instrumented(name=None):
+    """Decorator form of measure(), named after the function by default"""
+    def decorate(func):
+        action_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(action_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
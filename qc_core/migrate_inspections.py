@@ -0,0 +1,27 @@
+"""Migrate inspection_results.csv to the current schema
+
+    python -m qc_core.migrate_inspections [inspection_results.csv]
+
+Files are also migrated the first time the apps open them, this only
+does it ahead of time.
+"""
+
+import argparse
+
+from .inspections import INSPECTION_FILE, INSPECTION_SCHEMA_VERSION, migrate_inspection_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate inspection records to the current schema")
+    parser.add_argument("path", nargs="?", default=INSPECTION_FILE)
+    args = parser.parse_args()
+
+    migrated = migrate_inspection_file(args.path)
+    if migrated:
+        print(f"{migrated} records migrated to schema version {INSPECTION_SCHEMA_VERSION}")
+    else:
+        print(f"{args.path} is already at schema version {INSPECTION_SCHEMA_VERSION} or does not exist")
+
+
+if __name__ == "__main__":
+    main()
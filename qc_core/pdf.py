@@ -0,0 +1,231 @@
+"""PDF certificates and reports, drawn with matplotlib's PDF backend
+
+No word processor is needed: pages are laid out as matplotlib figures and
+written to the PDF one at a time, so a long table never holds more than one
+page in memory. Certificates can be rendered in batches over a process pool.
+"""
+
+import os
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+from matplotlib import rc_context
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+from .certificates import CERTIFICATE_FOLDER, inspected_lots
+from .inspections import INSPECTION_FILE, read_inspection_records
+from .metrics import count, count_write, instrumented
+from .reports import (SPC_NOTE, certificate_content, certificate_filename, report_details,
+                      report_statistics, spc_summary)
+from .schema import display_frame
+
+PAGE_SIZE = (8.27, 11.69)  # A4 in inches
+MARGIN = 0.8
+LINE = 0.22
+
+# The PDF standard Helvetica needs no font embedding, which is most of the write time
+PDF_STYLE = {"pdf.use14corefonts": True, "font.weight": "medium"}
+
+
+class PdfLayout:
+    """Flows headings, paragraphs and tables down A4 pages
+
+    A page is written to the PDF as soon as it is full and then dropped.
+    """
+    def __init__(self, pages):
+        self.pages = pages
+        self.figure = None
+        self.y = 0
+        self.width = PAGE_SIZE[0] - 2 * MARGIN
+
+    def new_page(self):
+        self.finish_page()
+        self.figure = Figure(figsize=PAGE_SIZE)
+        self.y = PAGE_SIZE[1] - MARGIN
+
+    def finish_page(self):
+        if self.figure is not None:
+            self.pages.savefig(self.figure)
+            self.figure = None
+
+    def ensure_space(self, height):
+        """Start a new page unless `height` inches still fit on this one, returns True if it did"""
+        if self.figure is None or self.y - height < MARGIN:
+            self.new_page()
+            return True
+        return False
+
+    def text(self, x, value, size=10, align="left", **style):
+        self.figure.text(x / PAGE_SIZE[0], self.y / PAGE_SIZE[1], value, fontsize=size,
+                         ha=align, va="top", **style)
+
+    def heading(self, value, size=14):
+        self.ensure_space(3 * LINE)
+        self.y -= LINE / 2
+        self.text(MARGIN, value, size=size, fontweight="bold")
+        self.y -= size / 72 * 1.8
+
+    def paragraph(self, value, size=10, align="left", **style):
+        chars = int(self.width * 72 / (size * 0.5))
+        x = {"left": MARGIN, "center": PAGE_SIZE[0] / 2}[align]
+        for line in value.split("\n"):
+            for wrapped in textwrap.wrap(line, chars) or [""]:
+                self.ensure_space(LINE)
+                self.text(x, wrapped, size=size, align=align, **style)
+                self.y -= LINE * size / 10
+
+    def table(self, header, rows, widths=None, size=8):
+        """Table of string cells, `rows` can be any iterable and is consumed page by page
+
+        The header row, if any, is repeated at the top of every page the table runs onto.
+        Tables without a header need their column widths.
+        """
+        widths = widths or [self.width / len(header)] * len(header)
+        height = LINE * size / 9
+
+        def draw(cells, **style):
+            x = MARGIN
+            for cell, width in zip(cells, widths):
+                chars = max(3, int(width * 72 / (size * 0.62)))
+                value = str(cell)
+                if len(value) > chars:
+                    value = value[:chars - 3] + "..."
+                self.text(x, value, size=size, **style)
+                x += width
+            self.y -= height
+
+        def draw_header():
+            if header is not None:
+                draw(header, fontweight="bold")
+                self.figure.add_artist(self.rule())
+
+        self.ensure_space(2 * height)
+        draw_header()
+        for cells in rows:
+            if self.ensure_space(height):
+                draw_header()
+            draw(cells)
+        self.y -= LINE / 2
+
+    def rule(self):
+        y = (self.y + LINE / 4) / PAGE_SIZE[1]
+        return Line2D([MARGIN / PAGE_SIZE[0], 1 - MARGIN / PAGE_SIZE[0]], [y, y], linewidth=0.5, color="black")
+
+
+def certificate_pdf(ic, product_name, product_code, supplier, item_type, units, sample_size,
+                    status, major_defects, minor_defects, inspector, comments, inspection_level=None,
+                    folder=CERTIFICATE_FOLDER):
+    """Write the inspection certificate of a lot as PDF and return its path"""
+    issued = datetime.now()
+    number, details, results = certificate_content(ic, product_name, product_code, supplier, item_type, units,
+                                                   sample_size, status, major_defects, minor_defects, issued,
+                                                   inspection_level)
+    os.makedirs(folder, exist_ok=True)
+    filename = certificate_filename(ic, issued, folder, extension=".pdf")
+
+    with rc_context(PDF_STYLE), PdfPages(filename) as pages:
+        layout = PdfLayout(pages)
+        layout.new_page()
+        layout.text(PAGE_SIZE[0] / 2, "RAW MATERIAL INSPECTION CERTIFICATE", size=18, align="center",
+                    fontweight="bold")
+        layout.y -= 3 * LINE
+        layout.paragraph("Company Name: Your Company Name Here\nAddress: 123 Company Address, City, Country",
+                         align="center")
+        layout.y -= LINE
+        layout.paragraph(f"Certificate No: {number}\nDate: {issued.strftime('%Y-%m-%d')}", align="center")
+        layout.paragraph("_" * 50, align="center")
+        layout.y -= LINE
+
+        label_widths = [2, layout.width - 2]
+        layout.table(None, details, widths=label_widths, size=10)
+        layout.heading("Inspection Results", size=13)
+        layout.table(None, results, widths=label_widths, size=10)
+        layout.heading("Comments", size=13)
+        layout.paragraph(comments or "-")
+        layout.heading("Approval", size=13)
+        layout.table(None, [("Inspector:", inspector), ("Date:", issued.strftime('%Y-%m-%d'))],
+                     widths=label_widths, size=10)
+        layout.y -= 2 * LINE
+        layout.paragraph("This certificate is generated based on AQL inspection results.", align="center",
+                         fontstyle="italic")
+        layout.finish_page()
+    count_write(filename)
+    return filename
+
+
+def render_certificate(job):
+    """Process pool entry point: (fields, folder) -> path"""
+    fields, folder = job
+    return certificate_pdf(folder=folder, **fields)
+
+
+@instrumented()
+def render_certificate_pdfs(certificates, folder=CERTIFICATE_FOLDER, workers=None):
+    """Render many certificates (dicts of certificate_pdf arguments) over a process pool
+
+    Returns the paths in the order given.
+    """
+    jobs = [(fields, folder) for fields in certificates]
+    if not jobs:
+        return []
+    if workers == 1 or len(jobs) == 1:
+        return [render_certificate(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        return list(pool.map(render_certificate, jobs, chunksize=chunksize))
+
+
+def certificates_to_pdf(path=INSPECTION_FILE, folder=CERTIFICATE_FOLDER, workers=None):
+    """PDF certificates of every inspected lot in the inspection records"""
+    return render_certificate_pdfs(inspected_lots(read_inspection_records(path)), folder, workers)
+
+
+@instrumented()
+def write_report_pdf(filepath, df, db_key, date_range, stats, spc=None):
+    """Water QC report of loaded results as PDF, same sections as build_word_report"""
+    count(rows=len(df))
+    test_type, data_type, date_from, date_to = report_details(db_key, date_range)
+
+    with rc_context(PDF_STYLE), PdfPages(filepath) as pages:
+        layout = PdfLayout(pages)
+        layout.new_page()
+        layout.text(PAGE_SIZE[0] / 2, "Water QC Report", size=16, align="center", fontweight="bold")
+        layout.y -= 2 * LINE
+        layout.paragraph(f"Test Type: {test_type}\nData Type: {data_type}\nDate Range: {date_from} to {date_to}",
+                         fontweight="bold")
+
+        layout.heading("Summary Statistics", size=13)
+        stats = report_statistics(stats, data_type)
+        layout.table(["Point"] + list(stats.columns), (
+            [str(index)] + [str(int(value)) if col in ('Samples', 'Non-Conform')
+                            else "-" if pd.isna(value) else f"{value:.2f}"
+                            for col, value in row.items()]
+            for index, row in stats.iterrows()
+        ))
+
+        layout.heading("Statistical Process Control", size=13)
+        if spc is not None and not spc.empty:
+            summary = spc_summary(spc)
+            layout.table(["Point"] + list(summary.columns), (
+                [str(index)] + [("-" if pd.isna(value) else f"{value:.2f}") if col == 'UCL' else str(int(value))
+                                for col, value in row.items()]
+                for index, row in summary.iterrows()
+            ))
+            layout.paragraph(SPC_NOTE, size=9)
+        else:
+            layout.paragraph("Not enough numeric results for SPC in this period.")
+
+        layout.heading("Non-Conforming Results", size=13)
+        non_conforming = df[df['Status'].astype(str).str.contains('Non-Conform')]
+        if len(non_conforming) > 0:
+            shown = display_frame(non_conforming)
+            layout.table(list(shown.columns), shown.itertuples(index=False, name=None), size=7)
+        else:
+            layout.paragraph("No non-conforming results found in this period.")
+        layout.finish_page()
+    count_write(filepath)
+    return filepath
@@ -0,0 +1,318 @@
+"""Certificates, trend figures and Word reports"""
+
+import os
+from datetime import datetime
+from io import BytesIO
+
+import matplotlib.dates as mdates
+import pandas as pd
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Inches
+from matplotlib.figure import Figure
+
+from .aql import AQL_ENGINE
+from .metrics import count, count_write, instrumented
+from .schema import display_frame
+
+
+def certificate_content(ic, product_name, product_code, supplier, item_type, units, sample_size,
+                        status, major_defects, minor_defects, issued, inspection_level=None):
+    """Certificate number, lot details and inspection results shown on a certificate
+
+    Shared by the Word and PDF certificates so both show the same values.
+    """
+    number = f"RM-{ic}-{issued.strftime('%Y%m%d')}"
+    details = [
+        ("Internal Code:", ic),
+        ("Product Name:", product_name),
+        ("Product Code:", product_code),
+        ("Supplier:", supplier),
+        ("Material Type:", item_type),
+        ("Batch Quantity:", units),
+        ("Sample Size:", sample_size),
+        ("Inspection Date:", issued.strftime("%Y-%m-%d"))
+    ]
+    results = [
+        ("Status:", status),
+        ("Major Defects Found:", str(major_defects)),
+        ("Minor Defects Found:", str(minor_defects)),
+        ("AQL Level:", aql_level_text(inspection_level))
+    ]
+    return number, details, results
+
+
+def aql_level_text(inspection_level):
+    """Inspection level as shown on certificates, e.g. Level II (General Inspection Level)"""
+    if not inspection_level:
+        return "Not recorded"
+    try:
+        level = AQL_ENGINE.level(inspection_level)
+    except ValueError:
+        return inspection_level
+    return f"Level {level} ({AQL_ENGINE.level_names[level]})"
+
+
+def certificate_filename(ic, issued, folder="Certificates", extension=".docx"):
+    return os.path.join(folder, f"RM_Certificate_{ic}_{issued.strftime('%Y%m%d')}{extension}")
+
+
+@instrumented()
+def generate_certificate(ic, product_name, product_code, supplier, item_type, units, sample_size,
+                         status, major_defects, minor_defects, inspector, comments, inspection_level=None,
+                         folder="Certificates"):
+    """Write the raw material inspection certificate of a lot and return its path"""
+    issued = datetime.now()
+    number, data, results_data = certificate_content(ic, product_name, product_code, supplier, item_type, units,
+                                                     sample_size, status, major_defects, minor_defects, issued,
+                                                     inspection_level)
+    doc = Document()
+    
+    # Add title
+    title = doc.add_heading('RAW MATERIAL INSPECTION CERTIFICATE', level=0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Add company info
+    company = doc.add_paragraph()
+    company.add_run("Company Name: ").bold = True
+    company.add_run("Your Company Name Here\n")
+    company.add_run("Address: ").bold = True
+    company.add_run("123 Company Address, City, Country\n")
+    company.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Add certificate number and date
+    cert_info = doc.add_paragraph()
+    cert_info.add_run(f"Certificate No: {number}\n")
+    cert_info.add_run(f"Date: {issued.strftime('%Y-%m-%d')}\n")
+    cert_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Add horizontal line
+    doc.add_paragraph("_"*50).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Add basic info table
+    table = doc.add_table(rows=8, cols=2)
+    table.style = 'Light Shading Accent 1'
+    
+    # Set column widths
+    for row in table.rows:
+        row.cells[0].width = Inches(2)
+        row.cells[1].width = Inches(4)
+    
+    # Fill table
+    for i, (label, value) in enumerate(data):
+        table.cell(i, 0).text = label
+        table.cell(i, 1).text = value
+    
+    # Add inspection results
+    doc.add_heading('Inspection Results', level=1)
+    
+    results_table = doc.add_table(rows=4, cols=2)
+    for i, (label, value) in enumerate(results_data):
+        results_table.cell(i, 0).text = label
+        results_table.cell(i, 1).text = value
+    
+    # Add comments
+    doc.add_heading('Comments', level=1)
+    doc.add_paragraph(comments)
+    
+    # Add approval section
+    doc.add_heading('Approval', level=1)
+    approval_table = doc.add_table(rows=2, cols=2)
+    approval_table.cell(0, 0).text = "Inspector:"
+    approval_table.cell(0, 1).text = inspector
+    approval_table.cell(1, 0).text = "Date:"
+    approval_table.cell(1, 1).text = issued.strftime('%Y-%m-%d')
+    
+    # Add footer
+    doc.add_paragraph("\n\n")
+    footer = doc.add_paragraph()
+    footer.add_run("This certificate is generated based on AQL inspection results.").italic = True
+    footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Save the document
+    os.makedirs(folder, exist_ok=True)
+    filename = certificate_filename(ic, issued, folder)
+    doc.save(filename)
+    count_write(filename)
+    
+    return filename
+
+
+def build_trend_figure(df, data_type, spc=None, fig=None):
+    """Trend figure of the loaded data with SPC limits/signals
+
+    Draws into ``fig`` (cleared first) when given, so a displayed figure can
+    be reused instead of creating a new one per load.
+    """
+    count(rows=len(df))
+    # Create figure
+    if fig is None:
+        fig = Figure(figsize=(8, 4), dpi=100)
+    else:
+        fig.clear()
+    ax = fig.add_subplot(111)
+    
+    # Values to plot, invalid entries are drawn as 0 like before
+    column = 'Total Count' if data_type == "Microbiology" else 'Conductivity'
+    values = df[column].astype('float64').fillna(0)
+    
+    for point, point_data in df.groupby('Point', sort=False, observed=True):
+        line, = ax.plot(point_data['Date'], values[point_data.index], 'o-', label=point)
+        
+        # Upper control limit of the point in the same color
+        if spc is not None:
+            point_spc = spc[spc['Point'] == str(point)]
+            ax.plot(point_spc['Date'], point_spc['UCL'], '--', color=line.get_color(), alpha=0.5, linewidth=1)
+    
+    # Mark every result that triggered an SPC rule
+    if spc is not None and spc['Signal'].any():
+        signals = spc[spc['Signal']]
+        ax.plot(signals['Date'], signals['Value'], 'x', color='red', markersize=9, label='SPC signal')
+    
+    if data_type == "Microbiology":
+        ax.set_ylabel('CFU/mL')
+        ax.set_title('Microbiology Results Over Time')
+    else:
+        ax.set_ylabel('Conductivity (µS/cm)')
+        ax.set_title('Chemistry Results Over Time')
+    
+    # Format x-axis
+    days = max(1, (df['Date'].max() - df['Date'].min()).days)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+    ax.xaxis.set_major_locator(mdates.DayLocator(interval=max(1, days//5)))
+    fig.autofmt_xdate()
+    
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(True)
+    
+    return fig
+
+
+SPC_NOTE = ("Limits are the rolling mean ± 3 sigma of the previous 20 results of each point. "
+            "Rules 1-4 are the Western Electric rules; EWMA and CUSUM flag sustained shifts.")
+
+
+def report_details(db_key, date_range):
+    """(test type, data type, from, to) shown at the top of a report"""
+    source = db_key.split("_")[0]
+    test_type = "After Sanitization" if source == "Sanitization" else source
+    data_type = "Microbiology" if db_key.endswith("Micro") else "Chemistry"
+    return test_type, data_type, date_range[0].strftime('%Y-%m-%d'), date_range[1].strftime('%Y-%m-%d')
+
+
+def report_statistics(stats, data_type):
+    """Per-point statistics with the report's column titles"""
+    unit = "CFU/mL" if data_type == "Microbiology" else "Conductivity"
+    return stats.set_axis(['Samples', f'Average {unit}', f'Std Dev {unit}', f'Max {unit}', 'Non-Conform'], axis=1)
+
+
+def spc_summary(spc):
+    """Signals per rule and latest UCL of each point"""
+    rule_columns = ['Rule 1', 'Rule 2', 'Rule 3', 'Rule 4', 'EWMA Signal', 'CUSUM Signal']
+    return spc.groupby('Point', sort=True).agg(
+        Results=('Value', 'size'),
+        **{col: (col, 'sum') for col in rule_columns},
+        UCL=('UCL', 'last')
+    )
+
+
+def build_word_report(df, db_key, date_range, stats, spc=None, charts=None):
+    """Water QC report document for loaded results
+
+    ``stats`` is the per-point summary from SummaryCache.summarize and
+    ``spc`` the SPC signals of the same rows. With a ChartRenderer as
+    ``charts`` the report also gets a trend chart per point.
+    """
+    count(rows=len(df))
+    # Create document
+    doc = Document()
+    
+    # Add title
+    title = doc.add_heading('Water QC Report', level=1)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Add report details
+    test_type, data_type, date_from, date_to = report_details(db_key, date_range)
+    
+    details = doc.add_paragraph()
+    details.add_run(f"Test Type: {test_type}\n").bold = True
+    details.add_run(f"Data Type: {data_type}\n").bold = True
+    details.add_run(f"Date Range: {date_from} to {date_to}\n").bold = True
+    details.add_run("\n")
+    
+    # Add summary statistics
+    doc.add_heading('Summary Statistics', level=2)
+    
+    stats = report_statistics(stats, data_type)
+    
+    # Add statistics table to document
+    table = doc.add_table(stats.shape[0]+1, stats.shape[1]+1)
+    
+    # Header row
+    hdr_cells = table.rows[0].cells
+    hdr_cells[0].text = "Point"
+    for i, col in enumerate(stats.columns, 1):
+        hdr_cells[i].text = col
+    
+    # Data rows
+    for i, (index, row) in enumerate(stats.iterrows(), 1):
+        row_cells = table.rows[i].cells
+        row_cells[0].text = str(index)
+        for j, (col, value) in enumerate(row.items(), 1):
+            if col in ('Samples', 'Non-Conform'):
+                row_cells[j].text = str(int(value))
+            else:
+                row_cells[j].text = "-" if pd.isna(value) else f"{value:.2f}"
+    
+    # Add SPC section
+    doc.add_heading('Statistical Process Control', level=2)
+    if spc is not None and not spc.empty:
+        summary = spc_summary(spc)
+        
+        table = doc.add_table(summary.shape[0]+1, summary.shape[1]+1)
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = "Point"
+        for i, col in enumerate(summary.columns, 1):
+            hdr_cells[i].text = col
+        
+        for i, (index, row) in enumerate(summary.iterrows(), 1):
+            row_cells = table.rows[i].cells
+            row_cells[0].text = str(index)
+            for j, (col, value) in enumerate(row.items(), 1):
+                if col == 'UCL':
+                    row_cells[j].text = "-" if pd.isna(value) else f"{value:.2f}"
+                else:
+                    row_cells[j].text = str(int(value))
+        
+        doc.add_paragraph(SPC_NOTE)
+    else:
+        doc.add_paragraph("Not enough numeric results for SPC in this period.")
+    
+    # Add trend charts
+    if charts is not None and len(df) > 0:
+        doc.add_heading('Trends', level=2)
+        doc.add_paragraph(charts.caption)
+        for point, png in charts.report_charts(db_key, date_range, df, spc):
+            doc.add_picture(BytesIO(png), width=Inches(6.5))
+    
+    # Add non-conforming results section
+    doc.add_heading('Non-Conforming Results', level=2)
+    non_conforming = display_frame(df[df['Status'].astype(str).str.contains('Non-Conform')])
+    
+    if len(non_conforming) > 0:
+        table = doc.add_table(non_conforming.shape[0]+1, non_conforming.shape[1])
+        
+        # Header row
+        hdr_cells = table.rows[0].cells
+        for i, col in enumerate(non_conforming.columns):
+            hdr_cells[i].text = col
+        
+        # Data rows
+        for i, row in enumerate(non_conforming.itertuples(index=False, name=None), 1):
+            row_cells = table.rows[i].cells
+            for j, value in enumerate(row):
+                row_cells[j].text = str(value)
+    else:
+        doc.add_paragraph("No non-conforming results found in this period.")
+    
+    return doc
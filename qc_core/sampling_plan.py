@@ -0,0 +1,36 @@
+"""Sampling plan for a date range from the water schedule
+
+    python -m qc_core.sampling_plan --from 2025-04-01 --to 2025-04-30 -o april_plan.csv
+"""
+
+import argparse
+import csv
+from datetime import date
+
+from .schedule import SCHEDULE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print or save the sampling plan for a date range")
+    parser.add_argument("--from", dest="date_from", required=True, type=date.fromisoformat)
+    parser.add_argument("--to", dest="date_to", required=True, type=date.fromisoformat)
+    parser.add_argument("--sanitized", nargs="*", default=[], type=date.fromisoformat,
+                        help="dates of sanitizations, adds the after-sanitization tests")
+    parser.add_argument("-o", "--output", help="CSV file to write (default: print)")
+    args = parser.parse_args()
+
+    rows = SCHEDULE.plan(args.date_from, args.date_to, args.sanitized)
+    columns = ["Date", "Day", "Test Type", "Kind", "Point"]
+    if args.output:
+        with open(args.output, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"{len(rows)} tests written to {args.output}")
+    else:
+        for row in rows:
+            print("  ".join(str(row[c]) for c in columns))
+
+
+if __name__ == "__main__":
+    main()
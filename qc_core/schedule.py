@@ -0,0 +1,125 @@
+"""Sampling schedule of the water system, compiled from water_schedule.json
+
+The schedule file lists the points, their limits and which points are
+tested daily (per weekday), monthly and after a sanitization. It is read
+once and compiled into read-only lookup tables, so the UI and the planner
+look answers up instead of rebuilding point sets on every event.
+"""
+
+import json
+import os
+from datetime import timedelta
+from types import MappingProxyType
+
+SCHEDULE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "water_schedule.json")
+
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def frozen(mapping):
+    return MappingProxyType(dict(mapping))
+
+
+class WaterSchedule:
+    """Read-only lookups compiled from a schedule config"""
+    def __init__(self, config):
+        self.points = tuple(config["points"])
+        known = set(self.points)
+
+        limits = config["limits"]
+        self.default_cfu = limits["default_cfu"]
+        self.default_conductivity = limits["default_conductivity"]
+        self.cfu_limits = frozen(limits["cfu"])
+        self.conductivity_limits = frozen(limits["conductivity"])
+        self.cl_allowed_points = frozenset(limits["cl_allowed_points"])
+
+        daily = config["daily"]
+        self.daily_micro = frozen((day, tuple(points)) for day, points in daily["micro"].items())
+        self.daily_chem = frozen((day, tuple(points)) for day, points in daily["chem"].items())
+        self.working_days = tuple(dict.fromkeys(list(self.daily_micro) + list(self.daily_chem)))
+
+        # Points of each day's plan, and the remaining points offered as additional ones
+        self.daily_used = frozen(
+            (day, frozenset(self.daily_micro.get(day, ()) + self.daily_chem.get(day, ())))
+            for day in self.working_days
+        )
+        self.daily_extra = frozen(
+            (day, tuple(p for p in self.points if p not in self.daily_used[day]))
+            for day in self.working_days
+        )
+
+        monthly = config["monthly"]
+        self.monthly_micro = tuple(monthly["micro"])
+        self.monthly_chem = tuple(monthly["chem"])
+
+        sanitization = config["sanitization"]
+        self.sanitization_micro = self.points if sanitization["micro"] == "all" else tuple(sanitization["micro"])
+        self.sanitization_chem = self.points if sanitization["chem"] == "all" else tuple(sanitization["chem"])
+
+        self.plans = frozen({
+            "Monthly": (self.monthly_micro, self.monthly_chem),
+            "After Sanitization": (self.sanitization_micro, self.sanitization_chem)
+        })
+
+        listed = (set(self.cfu_limits) | set(self.conductivity_limits) | self.cl_allowed_points
+                  | set(self.monthly_micro) | set(self.monthly_chem)
+                  | {p for points in self.daily_micro.values() for p in points}
+                  | {p for points in self.daily_chem.values() for p in points})
+        unknown = listed - known
+        if unknown:
+            raise ValueError(f"Schedule refers to unknown points: {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def load(cls, path=SCHEDULE_FILE):
+        with open(path, encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def points_for(self, test_type, day=None):
+        """(micro points, chem points) tested for a test type, on a weekday for daily tests"""
+        if test_type == "Daily":
+            return self.daily_micro.get(day, ()), self.daily_chem.get(day, ())
+        return self.plans.get(test_type, ((), ()))
+
+    def extra_points(self, day, taken=()):
+        """Points that can be added to a day's daily plan, minus any already added"""
+        extra = self.daily_extra.get(day, self.points)
+        if not taken:
+            return extra
+        return tuple(p for p in extra if p not in taken)
+
+    def is_monthly_day(self, day):
+        """Monthly tests are due on the first working day of each month"""
+        first = day.replace(day=1)
+        while WEEKDAY_NAMES[first.weekday()] not in self.working_days:
+            first += timedelta(days=1)
+        return day == first
+
+    def due_on(self, day, sanitized=False):
+        """(test type, "Micro"/"Chem", point) of every test due on a date"""
+        weekday = WEEKDAY_NAMES[day.weekday()]
+        due = []
+        plans = [("Daily", self.points_for("Daily", weekday))]
+        if self.is_monthly_day(day):
+            plans.append(("Monthly", self.plans["Monthly"]))
+        if sanitized:
+            plans.append(("After Sanitization", self.plans["After Sanitization"]))
+        for test_type, (micro, chem) in plans:
+            due.extend((test_type, "Micro", point) for point in micro)
+            due.extend((test_type, "Chem", point) for point in chem)
+        return due
+
+    def plan(self, date_from, date_to, sanitization_dates=()):
+        """Sampling plan rows (Date, Day, Test Type, Kind, Point) for a date range"""
+        sanitized = set(sanitization_dates)
+        rows = []
+        day = date_from
+        while day <= date_to:
+            weekday = WEEKDAY_NAMES[day.weekday()]
+            for test_type, kind, point in self.due_on(day, day in sanitized):
+                rows.append({"Date": day.isoformat(), "Day": weekday, "Test Type": test_type,
+                             "Kind": kind, "Point": point})
+            day += timedelta(days=1)
+        return rows
+
+
+SCHEDULE = WaterSchedule.load()
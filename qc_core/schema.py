@@ -0,0 +1,132 @@
+"""Typed schema of the water QC database files
+
+The CSVs store everything as text. Loaded results use compact, typed
+columns instead:
+
+    Date                      datetime64
+    Test Type, Day, Point,    categorical
+    Status
+    Total Count, Conductivity,  nullable Float64, plus a boolean
+    Cl Test                   "<column> Invalid" mask for text that is not a number
+    Coliforms, Pseudomonas    nullable boolean, True = Present
+    Oxidizable                nullable boolean, True = Color change
+    Comments                  text
+
+New rows go through storage_row() before they are written, so the files
+only ever hold values this schema can read back.
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from .water import ALL_POINTS
+
+TEST_TYPES = ["Daily", "Monthly", "After Sanitization"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Known categories come first so codes are stable, anything else found in a file is appended
+CATEGORY_COLUMNS = {
+    "Test Type": TEST_TYPES,
+    "Day": WEEKDAYS,
+    "Point": ALL_POINTS,
+    "Status": ["Conform", "Warning", "Non-Conform", "Non-Conform (Microbial)", "Invalid Input", "Incomplete data"]
+}
+NUMERIC_COLUMNS = ["Total Count", "Conductivity", "Cl Test"]
+FLAG_COLUMNS = {
+    "Coliforms": {"Present": True, "Absent": False},
+    "Pseudomonas": {"Present": True, "Absent": False},
+    "Oxidizable": {"Color change": True, "No color change": False}
+}
+
+
+def invalid_column(column):
+    return f"{column} Invalid"
+
+
+def category_dtype(column, values):
+    known = CATEGORY_COLUMNS[column]
+    extra = sorted(set(values.unique()) - set(known))
+    return pd.CategoricalDtype(list(known) + extra)
+
+
+def apply_schema(raw):
+    """Typed frame from a frame of raw CSV text (read with dtype=str, keep_default_na=False)"""
+    df = pd.DataFrame(index=raw.index)
+    for column in raw.columns:
+        values = raw[column]
+        if column == "Date":
+            df[column] = pd.to_datetime(values, errors="coerce")
+        elif column in CATEGORY_COLUMNS:
+            df[column] = values.astype(category_dtype(column, values))
+        elif column in NUMERIC_COLUMNS:
+            text = values.str.strip()
+            numbers = pd.to_numeric(text, errors="coerce")
+            df[column] = numbers.astype("Float64")
+            df[invalid_column(column)] = numbers.isna().to_numpy() & (text != "").to_numpy()
+        elif column in FLAG_COLUMNS:
+            df[column] = values.map(FLAG_COLUMNS[column]).astype("boolean")
+        else:
+            df[column] = values
+    return df
+
+
+def read_raw(filepath, **kwargs):
+    """Database file as text, exactly as stored"""
+    return pd.read_csv(filepath, dtype=str, keep_default_na=False, **kwargs)
+
+
+def read_results(filepath):
+    """Database file as a typed frame"""
+    return apply_schema(read_raw(filepath))
+
+
+def display_frame(df):
+    """Text version of a typed frame for tables, CSV exports and reports
+
+    Flags are shown with their original wording and invalid numbers as
+    "Invalid"; the mask columns are dropped.
+    """
+    shown = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        if column.endswith(" Invalid") and column[:-len(" Invalid")] in NUMERIC_COLUMNS:
+            continue
+        values = df[column]
+        if column == "Date":
+            shown[column] = values.dt.strftime("%Y-%m-%d")
+        elif column in NUMERIC_COLUMNS:
+            text = values.astype("float64").map(lambda v: "" if pd.isna(v) else f"{v:g}")
+            if invalid_column(column) in df.columns:
+                text = text.mask(df[invalid_column(column)], "Invalid")
+            shown[column] = text
+        elif column in FLAG_COLUMNS:
+            labels = {flag: label for label, flag in FLAG_COLUMNS[column].items()}
+            shown[column] = values.map(labels).astype(object)
+        else:
+            shown[column] = values.astype(object)
+    return shown.fillna("")
+
+
+def storage_row(record, columns):
+    """Validate an entered record and return its CSV row
+
+    Raises ValueError if a value does not fit the schema.
+    """
+    row = {}
+    for column in columns:
+        value = str(record.get(column, "") or "").strip()
+        if column == "Date":
+            try:
+                value = date.fromisoformat(value).isoformat()
+            except ValueError:
+                raise ValueError(f"Invalid date: {value!r}")
+        elif column == "Test Type" and value not in TEST_TYPES:
+            raise ValueError(f"Unknown test type: {value!r}")
+        elif column == "Day" and value and value not in WEEKDAYS:
+            raise ValueError(f"Unknown day: {value!r}")
+        elif column == "Point" and value not in ALL_POINTS:
+            raise ValueError(f"Unknown point: {value!r}")
+        elif column in FLAG_COLUMNS and value and value not in FLAG_COLUMNS[column]:
+            raise ValueError(f"{column} must be one of {', '.join(FLAG_COLUMNS[column])}")
+        row[column] = value
+    return row
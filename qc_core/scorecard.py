@@ -0,0 +1,208 @@
+"""Supplier scorecard: running quality aggregates per supplier and item type
+
+Each inspected lot contributes the result of its latest inspected attempt
+once, keyed by Internal Code, to the totals of its supplier and of its
+(supplier, item type). A new result replaces the lot's previous one. The totals, the lots and their
+order are saved to supplier_scorecard.json, so the scorecard is available
+without reading inspection_results.csv. A rebuild from the raw records
+gives exactly the same numbers.
+
+Defect rates are defects per 100 sampled units. The rolling window is the
+latest WINDOW_LOTS lots of a supplier or item type.
+"""
+
+import json
+import os
+from bisect import insort
+
+import pandas as pd
+
+from .inspections import INSPECTION_FILE, read_inspection_records
+
+SCORECARD_FILE = "supplier_scorecard.json"
+WINDOW_LOTS = 20
+
+
+def lot_entry(row):
+    """Contribution of one inspection record, or None if it has no conformity result"""
+    if not row.get("Status"):
+        return None
+    return {
+        "attempt": row["Attempt"],
+        "time": row["Timestamp"],
+        "supplier": row["Supplier"],
+        "item": row["Item Type"],
+        "rejected": row["Status"] != "Conform",
+        "major": row["Major Found"] or 0,
+        "minor": row["Minor Found"] or 0,
+        "sampled": row["Sample Size"] or 0
+    }
+
+
+def empty_totals():
+    return {"Lots": 0, "Rejects": 0, "Major": 0, "Minor": 0, "Sampled": 0}
+
+
+class SupplierScorecard:
+    """Incrementally maintained lot totals and rolling windows"""
+    def __init__(self, path=INSPECTION_FILE, scorecard_path=SCORECARD_FILE, window=WINDOW_LOTS):
+        self.path = path
+        self.scorecard_path = scorecard_path
+        self.window = window
+        self.lots = {}
+        self.totals = {}
+        self.order = {}
+        self.source = None
+        self.load()
+
+    def source_signature(self):
+        """Modification time and size of the inspection file, used to detect outside edits"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def load(self):
+        """Load the saved scorecard, rebuilding it if the records changed since it was saved"""
+        try:
+            with open(self.scorecard_path, encoding="utf-8") as file:
+                saved = json.load(file)
+            self.source = saved["source"]
+            for ic, entry in saved["lots"].items():
+                self.add_entry(ic, entry)
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.clear()
+
+        if self.source != self.source_signature():
+            self.rebuild()
+            self.save()
+
+    def save(self):
+        temp_path = self.scorecard_path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump({"source": self.source, "window": self.window, "lots": self.lots}, file)
+        os.replace(temp_path, self.scorecard_path)
+
+    def clear(self):
+        self.lots = {}
+        self.totals = {}
+        self.order = {}
+        self.source = None
+
+    def rebuild(self):
+        """Recompute everything from the raw inspection records"""
+        self.clear()
+        try:
+            records = read_inspection_records(self.path)
+        except FileNotFoundError:
+            records = []
+        for row in records:
+            self.update_lot(row)
+        self.source = self.source_signature()
+
+    def keys(self, entry):
+        return [(entry["supplier"], None), (entry["supplier"], entry["item"])]
+
+    def add_entry(self, ic, entry):
+        self.lots[ic] = entry
+        for key in self.keys(entry):
+            totals = self.totals.setdefault(key, empty_totals())
+            totals["Lots"] += 1
+            totals["Rejects"] += entry["rejected"]
+            totals["Major"] += entry["major"]
+            totals["Minor"] += entry["minor"]
+            totals["Sampled"] += entry["sampled"]
+            insort(self.order.setdefault(key, []), (entry["time"], ic))
+
+    def remove_entry(self, ic):
+        entry = self.lots.pop(ic)
+        for key in self.keys(entry):
+            totals = self.totals[key]
+            totals["Lots"] -= 1
+            totals["Rejects"] -= entry["rejected"]
+            totals["Major"] -= entry["major"]
+            totals["Minor"] -= entry["minor"]
+            totals["Sampled"] -= entry["sampled"]
+            self.order[key].remove((entry["time"], ic))
+            if not totals["Lots"]:
+                del self.totals[key]
+                del self.order[key]
+
+    def update_lot(self, row):
+        """Replace the contribution of a lot with an inspected attempt, unless a later one counts already"""
+        entry = lot_entry(row)
+        if entry is None:
+            return
+        ic = row["Internal Code"]
+        if ic in self.lots:
+            if self.lots[ic]["attempt"] > entry["attempt"]:
+                return
+            self.remove_entry(ic)
+        self.add_entry(ic, entry)
+
+    def ensure_current(self):
+        """Rebuild if the inspection file was edited outside the app"""
+        if self.source != self.source_signature():
+            self.rebuild()
+            self.save()
+
+    def mark_synced(self):
+        self.source = self.source_signature()
+
+    def window_totals(self, key):
+        totals = empty_totals()
+        for _, ic in self.order[key][-self.window:]:
+            entry = self.lots[ic]
+            totals["Lots"] += 1
+            totals["Rejects"] += entry["rejected"]
+            totals["Major"] += entry["major"]
+            totals["Minor"] += entry["minor"]
+            totals["Sampled"] += entry["sampled"]
+        return totals
+
+    @staticmethod
+    def rates(totals):
+        lots, sampled = totals["Lots"], totals["Sampled"]
+        return (100 * totals["Rejects"] / lots if lots else float("nan"),
+                100 * totals["Major"] / sampled if sampled else float("nan"),
+                100 * totals["Minor"] / sampled if sampled else float("nan"))
+
+    def table(self, by_item=False):
+        """Scorecard rows, worst recent reject rate first
+
+        Trend is the window reject rate minus the overall one, in points;
+        a positive trend means the supplier is getting worse.
+        """
+        rows = []
+        for key, totals in self.totals.items():
+            if (key[1] is not None) != by_item:
+                continue
+            recent = self.window_totals(key)
+            reject_rate, major_rate, minor_rate = self.rates(totals)
+            recent_reject, recent_major, recent_minor = self.rates(recent)
+            rows.append({
+                "Supplier": key[0], **({"Item Type": key[1]} if by_item else {}),
+                "Lots": totals["Lots"], "Rejects": totals["Rejects"], "Reject %": reject_rate,
+                "Major/100": major_rate, "Minor/100": minor_rate,
+                "Window Lots": recent["Lots"], "Window Reject %": recent_reject,
+                "Window Major/100": recent_major, "Window Minor/100": recent_minor,
+                "Trend": recent_reject - reject_rate
+            })
+        columns = ["Supplier"] + (["Item Type"] if by_item else []) + [
+            "Lots", "Rejects", "Reject %", "Major/100", "Minor/100",
+            "Window Lots", "Window Reject %", "Window Major/100", "Window Minor/100", "Trend"]
+        df = pd.DataFrame(rows, columns=columns)
+        return df.sort_values(["Window Reject %", "Trend"], ascending=False, kind="stable").reset_index(drop=True)
+
+    def supplier(self, supplier):
+        """Totals and window of one supplier, None if it has no inspected lots"""
+        key = (supplier, None)
+        if key not in self.totals:
+            return None
+        return {"totals": dict(self.totals[key]), "window": self.window_totals(key)}
+
+    def snapshot(self):
+        """Every total and window, comparable between an incremental and a rebuilt scorecard"""
+        return {key: (self.totals[key], self.window_totals(key)) for key in sorted(
+            self.totals, key=lambda k: (k[0], k[1] or ""))}
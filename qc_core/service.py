@@ -0,0 +1,260 @@
+"""Local HTTP/JSON read service over the inspection and water QC stores
+
+    python -m qc_core.service --host 127.0.0.1 --port 8765
+
+Endpoints (GET, JSON):
+    /inspections?ic=&product=&from=YYYY-MM-DD&to=YYYY-MM-DD
+    /water/results?db=Daily_Micro&point=PW1&point=PW2&from=&to=
+    /water/summary?db=Daily_Micro&from=&to=
+    /changes?since=SEQ&limit=&store=Daily_Micro
+
+Store files are held in memory and reloaded only when their modification
+time or size changes. They are only ever read: an inspection file of an
+older schema version is reported as an error instead of being migrated,
+and the summary partials are kept in memory. Every response carries an
+ETag built from the store signatures and the query, so pollers sending
+If-None-Match get a 304 without the query being run again.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+from .changes import ChangeFeed
+from .inspections import INSPECTION_FILE, read_inspection_records, filter_inspection_records
+from .schema import read_results
+from .water import DB_FILES, DB_FOLDER
+from .water_store import SummaryCache
+
+
+def file_signature(path):
+    """Modification time and size of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class StoreCache:
+    """In-memory copies of store files, reloaded when the file changes"""
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, path, loader):
+        signature = file_signature(path)
+        if signature is None:
+            raise FileNotFoundError(path)
+        cached = self.entries.get(path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, loader(path))
+            self.entries[path] = cached
+        return cached[1]
+
+
+def load_water_db(path):
+    df = read_results(path)
+    return df.sort_values("Date", kind="stable").reset_index(drop=True)
+
+
+def parse_day(value):
+    return date.fromisoformat(value) if value else None
+
+
+class QCService:
+    """Request routing and query execution, independent of the HTTP layer"""
+    def __init__(self, inspection_file=INSPECTION_FILE, db_files=DB_FILES, folder=DB_FOLDER, max_responses=256,
+                 change_feed=None):
+        self.inspection_file = inspection_file
+        self.change_feed = change_feed or ChangeFeed()
+        self.db_files = db_files
+        self.folder = folder
+        self.stores = StoreCache()
+        self.summary_cache = None
+        self.responses = OrderedDict()
+        self.max_responses = max_responses
+        self.routes = {
+            "/inspections": (self.inspection_sources, self.inspections),
+            "/water/results": (self.water_sources, self.water_results),
+            "/water/summary": (self.water_sources, self.water_summary),
+            "/changes": (self.change_sources, self.changes),
+        }
+
+    def db_path(self, query):
+        db_key = query.get("db", [""])[0]
+        if db_key not in self.db_files:
+            raise ValueError(f"db must be one of: {', '.join(self.db_files)}")
+        return db_key, os.path.join(self.folder, self.db_files[db_key])
+
+    # Files each endpoint reads, their signatures make up the ETag
+    def inspection_sources(self, query):
+        return [self.inspection_file]
+
+    def water_sources(self, query):
+        return [self.db_path(query)[1]]
+
+    def change_sources(self, query):
+        return [path for first_seq, path in self.change_feed.segments()[-1:]]
+
+    def inspections(self, query):
+        rows = self.stores.get(self.inspection_file, lambda path: read_inspection_records(path, migrate=False))
+        return filter_inspection_records(
+            rows,
+            query.get("ic", [""])[0],
+            query.get("product", [""])[0],
+            query.get("from", [""])[0],
+            query.get("to", [""])[0]
+        )
+
+    def water_results(self, query):
+        db_key, path = self.db_path(query)
+        df = self.stores.get(path, load_water_db)
+        mask = pd.Series(True, index=df.index)
+        if query.get("point"):
+            mask &= df["Point"].isin(query["point"])
+        date_from = parse_day(query.get("from", [""])[0])
+        date_to = parse_day(query.get("to", [""])[0])
+        if date_from:
+            mask &= df["Date"] >= pd.to_datetime(date_from)
+        if date_to:
+            mask &= df["Date"] <= pd.to_datetime(date_to)
+        result = df[mask]
+        result = result.assign(Date=result["Date"].dt.strftime("%Y-%m-%d"))
+        return json.loads(result.to_json(orient="records"))
+
+    def water_summary(self, query):
+        db_key, path = self.db_path(query)
+        df = self.stores.get(path, load_water_db)
+        if df.empty:
+            return {"db": db_key, "from": None, "to": None, "points": []}
+        date_from = parse_day(query.get("from", [""])[0]) or df["Date"].min().date()
+        date_to = parse_day(query.get("to", [""])[0]) or df["Date"].max().date()
+        if self.summary_cache is None:
+            self.summary_cache = SummaryCache(self.db_files, self.folder, persist=False)
+        in_range = df[(df["Date"] >= pd.to_datetime(date_from)) & (df["Date"] <= pd.to_datetime(date_to))]
+        stats = self.summary_cache.summarize(db_key, date_from, date_to, df=in_range)
+        return {
+            "db": db_key,
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "points": json.loads(stats.reset_index().to_json(orient="records"))
+        }
+
+    def changes(self, query):
+        try:
+            since = int(query.get("since", ["0"])[0])
+            limit = int(query.get("limit", ["10000"])[0])
+        except ValueError:
+            raise ValueError("since and limit must be integers")
+        entries = self.change_feed.read(since, limit, query.get("store"))
+        return {
+            "since": since,
+            "next": entries[-1]["seq"] if entries else since,
+            "changes": entries
+        }
+
+    def etag(self, path, query, sources):
+        signatures = [(source, file_signature(source)) for source in sources]
+        key = json.dumps([path, sorted(query.items()), signatures], default=str)
+        return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+    def handle(self, target, if_none_match=None):
+        """Return (status, body bytes, etag) for a GET target"""
+        url = urlsplit(target)
+        route = self.routes.get(url.path.rstrip("/") or "/")
+        if route is None:
+            body = {"endpoints": sorted(self.routes)}
+            return HTTPStatus.NOT_FOUND if url.path not in ("", "/") else HTTPStatus.OK, json.dumps(body).encode(), None
+
+        sources, query_func = route
+        query = parse_qs(url.query)
+        try:
+            etag = self.etag(url.path, query, sources(query))
+            if if_none_match == etag:
+                return HTTPStatus.NOT_MODIFIED, b"", etag
+            body = self.responses.get(etag)
+            if body is None:
+                body = json.dumps(query_func(query)).encode("utf-8")
+                self.responses[etag] = body
+                while len(self.responses) > self.max_responses:
+                    self.responses.popitem(last=False)
+            else:
+                self.responses.move_to_end(etag)
+            return HTTPStatus.OK, body, etag
+        except FileNotFoundError as e:
+            return HTTPStatus.NOT_FOUND, json.dumps({"error": f"No data file: {e}"}).encode(), None
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, json.dumps({"error": str(e)}).encode(), None
+
+
+async def handle_connection(service, lock, reader, writer):
+    """Serve one HTTP/1.1 request and close the connection"""
+    try:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        parts = request_line.split(" ")
+        if len(parts) != 3:
+            status, body, etag = HTTPStatus.BAD_REQUEST, b"", None
+        elif parts[0] != "GET":
+            status, body, etag = HTTPStatus.METHOD_NOT_ALLOWED, b"", None
+        else:
+            # Queries run in a worker thread so slow loads don't block other clients;
+            # the lock keeps the shared caches consistent
+            loop = asyncio.get_running_loop()
+            async with lock:
+                status, body, etag = await loop.run_in_executor(
+                    None, service.handle, parts[1], headers.get("if-none-match"))
+
+        head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        if etag:
+            head.append(f"ETag: {etag}")
+            head.append("Cache-Control: no-cache")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, service=None):
+    service = service or QCService()
+    lock = asyncio.Lock()
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, lock, reader, writer), host, port)
+    print(f"QC service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON query service over the QC stores")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--inspection-file", default=INSPECTION_FILE)
+    parser.add_argument("--folder", default=DB_FOLDER, help="folder holding the QC database files")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, QCService(args.inspection_file, DB_FILES, args.folder)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
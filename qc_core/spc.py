@@ -0,0 +1,63 @@
+"""Statistical process control over water QC results"""
+
+import numpy as np
+import pandas as pd
+
+
+def compute_spc(df, column, window=20, min_periods=8, ewma_lambda=0.2, cusum_k=0.5, cusum_h=5.0):
+    """Statistical process control signals per point for a results DataFrame
+
+    Each result is judged against the rolling mean and sigma of the previous
+    ``window`` results of the same point (Shewhart limits at 3 sigma). Adds
+    the four Western Electric rules, an EWMA chart and a tabular CUSUM, all
+    computed with grouped rolling/cumulative operations instead of loops.
+    """
+    data = pd.DataFrame({
+        "Date": pd.to_datetime(df["Date"]),
+        "Point": df["Point"].astype(str),
+        "Value": pd.to_numeric(df[column], errors="coerce").astype("float64")
+    }).dropna(subset=["Value"])
+    data = data.sort_values(["Point", "Date"], kind="stable").reset_index(drop=True)
+
+    # Grouped by integer codes of the points, factorizing the names once instead of in every groupby
+    point = pd.Series(pd.factorize(data["Point"])[0], index=data.index)
+    groups = data.groupby(point, sort=False)
+
+    def per_point(series, op, n):
+        rolled = getattr(series.groupby(point, sort=False).rolling(n, min_periods=min(n, min_periods)), op)()
+        return rolled.reset_index(level=0, drop=True).sort_index()
+
+    # Baseline from the results before each one, so a point never sets its own limits
+    data["Mean"] = per_point(data["Value"], "mean", window).groupby(point).shift()
+    data["Sigma"] = per_point(data["Value"], "std", window).groupby(point).shift()
+    data["UCL"] = data["Mean"] + 3 * data["Sigma"]
+    data["LCL"] = (data["Mean"] - 3 * data["Sigma"]).clip(lower=0)
+
+    sigma = data["Sigma"].where(data["Sigma"] > 0)
+    z = (data["Value"] - data["Mean"]) / sigma
+
+    def run_count(flags, n):
+        return per_point(flags.astype(float), "sum", n)
+
+    # Western Electric rules
+    data["Rule 1"] = z.abs() > 3
+    data["Rule 2"] = (run_count(z > 2, 3) >= 2) | (run_count(z < -2, 3) >= 2)
+    data["Rule 3"] = (run_count(z > 1, 5) >= 4) | (run_count(z < -1, 5) >= 4)
+    data["Rule 4"] = (run_count(z > 0, 8) >= 8) | (run_count(z < 0, 8) >= 8)
+
+    # EWMA of the results with its steady-state limits around the baseline
+    data["EWMA"] = groups["Value"].transform(lambda s: s.ewm(alpha=ewma_lambda, adjust=False).mean())
+    spread = 3 * data["Sigma"] * np.sqrt(ewma_lambda / (2 - ewma_lambda))
+    data["EWMA Signal"] = (data["EWMA"] > data["Mean"] + spread) | (data["EWMA"] < data["Mean"] - spread)
+
+    # Tabular CUSUM: C_i = max(0, C_i-1 + z_i - k) equals S_i - min(0, min S_j)
+    # for the cumulative sum S, so it reduces to a grouped cumsum and cummin
+    for name, steps in (("CUSUM High", z.fillna(0) - cusum_k), ("CUSUM Low", -z.fillna(0) - cusum_k)):
+        cumulative = steps.groupby(point).cumsum()
+        data[name] = cumulative - cumulative.groupby(point).cummin().clip(upper=0)
+    data["CUSUM Signal"] = (data["CUSUM High"] > cusum_h) | (data["CUSUM Low"] > cusum_h)
+
+    rules = ["Rule 1", "Rule 2", "Rule 3", "Rule 4", "EWMA Signal", "CUSUM Signal"]
+    data[rules] = data[rules].fillna(False).astype(bool)
+    data["Signal"] = data[rules].any(axis=1)
+    return data
@@ -0,0 +1,42 @@
+"""Supplier scorecard from the command line
+
+    python -m qc_core.supplier_report                 # scorecard per supplier
+    python -m qc_core.supplier_report --by-item -o scorecard.csv
+    python -m qc_core.supplier_report --rebuild       # recompute from inspection_results.csv
+"""
+
+import argparse
+
+from .inspections import INSPECTION_FILE
+from .scorecard import SCORECARD_FILE, SupplierScorecard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print or save the supplier scorecard")
+    parser.add_argument("--inspection-file", default=INSPECTION_FILE)
+    parser.add_argument("--scorecard-file", default=SCORECARD_FILE)
+    parser.add_argument("--by-item", action="store_true", help="one row per supplier and item type")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="recompute from the raw records and check it matches the saved scorecard")
+    parser.add_argument("-o", "--output", help="CSV file to write (default: print)")
+    args = parser.parse_args()
+
+    scorecard = SupplierScorecard(args.inspection_file, args.scorecard_file)
+    if args.rebuild:
+        saved = scorecard.snapshot()
+        scorecard.rebuild()
+        scorecard.save()
+        rebuilt = scorecard.snapshot()
+        print("Rebuilt scorecard matches the saved one" if saved == rebuilt
+              else "Rebuilt scorecard differs from the saved one, the saved one was replaced")
+
+    df = scorecard.table(by_item=args.by_item)
+    if args.output:
+        df.to_csv(args.output, index=False, float_format="%.2f")
+        print(f"{len(df)} rows written to {args.output}")
+    else:
+        print(df.to_string(index=False, float_format="%.2f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""ISO 2859-1 switching between normal, tightened and reduced inspection
+
+A supplier's severity is replayed from its inspection history in time
+order, lot by lot:
+
+    Normal -> Tightened   2 of the last 5 or fewer lots not accepted
+    Tightened -> Normal   5 consecutive lots accepted
+    Normal -> Reduced     switching score reaches 30 (if reduced inspection is allowed)
+    Reduced -> Normal     a lot not accepted
+
+The switching score counts accepted lots under normal inspection: +3 if the
+lot would also have passed at the next tighter AQL (acceptance numbers of 2
+or more), +2 for an accepted lot with acceptance number 0 or 1, and back to
+0 otherwise. Five lots not accepted while on tightened inspection mean
+inspection of the supplier should be discontinued until it has improved.
+
+SupplierSwitching keeps every supplier's state up to date as results are
+saved, so a plan does not replay the whole history.
+"""
+
+import json
+import os
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+
+from .aql import AQL_ENGINE
+from .inspections import INSPECTION_FILE, read_inspection_records
+
+SWITCHING_FILE = "supplier_switching.json"
+
+
+class SwitchingState:
+    """Severity of one supplier and the counters the switching rules need"""
+    def __init__(self, rules=AQL_ENGINE.switching):
+        self.rules = rules
+        self.severity = "Normal"
+        self.recent = deque(maxlen=rules["tighten_window"])
+        self.accepted_run = 0
+        self.score = 0
+        self.tightened_rejects = 0
+        self.discontinued = False
+        self.lots = 0
+
+    def record(self, accepted, score_points=0):
+        """Apply the rules to the result of one lot inspected at the current severity"""
+        self.lots += 1
+        rules = self.rules
+        if self.severity == "Normal":
+            self.recent.append(accepted)
+            self.score = self.score + score_points if accepted and score_points else 0
+            if list(self.recent).count(False) >= rules["tighten_rejects"]:
+                self.switch("Tightened")
+            elif rules["reduced_allowed"] and self.score >= rules["reduce_score"]:
+                self.switch("Reduced")
+        elif self.severity == "Tightened":
+            if accepted:
+                self.accepted_run += 1
+                if self.accepted_run >= rules["normal_after_accepts"]:
+                    self.switch("Normal")
+            else:
+                self.accepted_run = 0
+                self.tightened_rejects += 1
+                if self.tightened_rejects >= rules["discontinue_rejects"]:
+                    self.discontinued = True
+        elif not accepted:
+            self.switch("Normal")
+
+    def as_dict(self):
+        return {"severity": self.severity, "recent": list(self.recent), "accepted_run": self.accepted_run,
+                "score": self.score, "tightened_rejects": self.tightened_rejects,
+                "discontinued": self.discontinued, "lots": self.lots}
+
+    @classmethod
+    def from_dict(cls, saved, rules=AQL_ENGINE.switching):
+        state = cls(rules)
+        state.severity = saved["severity"]
+        state.recent.extend(saved["recent"])
+        state.accepted_run = saved["accepted_run"]
+        state.score = saved["score"]
+        state.tightened_rejects = saved["tightened_rejects"]
+        state.discontinued = saved["discontinued"]
+        state.lots = saved["lots"]
+        return state
+
+    def switch(self, severity):
+        self.severity = severity
+        self.recent.clear()
+        self.accepted_run = 0
+        self.score = 0
+        if severity != "Tightened":
+            self.tightened_rejects = 0
+            self.discontinued = False
+
+
+def lot_time(row):
+    try:
+        return datetime.strptime(row["Timestamp"], "%Y-%m-%d %H:%M:%S")
+    except (KeyError, ValueError):
+        return datetime.min
+
+
+def lot_entry(row):
+    """What the switching rules need of one inspection record, or None if it has no conformity result"""
+    if not row.get("Status"):
+        return None
+    return {
+        "time": lot_time(row).strftime("%Y-%m-%d %H:%M:%S"),
+        "ic": row["Internal Code"],
+        "attempt": row["Attempt"],
+        "accepted": row["Status"] == "Conform",
+        "units": row["Units"],
+        "level": row["Inspection Level"],
+        "major": row["Major Found"] or 0,
+        "minor": row["Minor Found"] or 0
+    }
+
+
+def score_points(units, level, severity, major_defects, minor_defects, engine=AQL_ENGINE):
+    """Switching score points of an accepted lot under normal inspection
+
+    A lot without a plan, or without one at the tighter AQL, scores 0.
+    """
+    aqls = (engine.defaults["major_aql"], engine.defaults["minor_aql"])
+    plans = engine.common_plans(units, level, aqls, severity)
+    tighter = engine.common_plans(units, level, [engine.tighter_aql(aql) for aql in aqls], severity)
+    if plans is None:
+        return 0
+    points = 3
+    for index, defects in enumerate((major_defects, minor_defects)):
+        if plans[index].ac < 2:
+            points = min(points, 2)
+        elif tighter is None or defects > tighter[index].ac:
+            return 0
+    return points
+
+
+def replay_switching(records, engine=AQL_ENGINE):
+    """Switching state of every supplier from inspection records
+
+    Only lots with a conformity status count, in the order they were
+    planned. Lots whose size or level no longer resolve to a plan are
+    skipped.
+    """
+    states = {}
+    inspected = [(row["Supplier"], lot_entry(row)) for row in records if row.get("Status")]
+    for supplier, entry in sorted(inspected, key=lambda lot: lot[1]["time"]):
+        apply_lot(states.setdefault(supplier, SwitchingState(engine.switching)), entry, engine)
+    return states
+
+
+def apply_lot(state, entry, engine=AQL_ENGINE):
+    """Record one lot_entry on a supplier's state"""
+    points = 0
+    if entry["accepted"] and state.severity == "Normal":
+        try:
+            points = score_points(entry["units"], entry["level"], state.severity, entry["major"], entry["minor"], engine)
+        except (ValueError, TypeError):
+            points = 0  # Lot no longer resolves to a plan, it still counts as accepted
+    state.record(entry["accepted"], points)
+
+
+def supplier_switching(supplier, path=INSPECTION_FILE):
+    """Current SwitchingState of a supplier, normal inspection if it has no history"""
+    try:
+        records = read_inspection_records(path)
+    except FileNotFoundError:
+        records = []
+    history = [row for row in records if row["Supplier"] == supplier]
+    return replay_switching(history).get(supplier, SwitchingState())
+
+
+class SupplierSwitching:
+    """Switching state of every supplier, updated with every saved result
+
+    The lots of each supplier, in time order, and its state are saved to
+    supplier_switching.json. A result for the supplier's latest lot is
+    applied to the saved state; a result for an earlier lot, or a new
+    result of a lot already counted, replays that supplier's lots from
+    memory. The inspection file is only replayed when it was changed
+    outside the app, which gives the same states as replay_switching.
+    """
+    def __init__(self, path=INSPECTION_FILE, switching_path=SWITCHING_FILE, engine=AQL_ENGINE):
+        self.path = path
+        self.switching_path = switching_path
+        self.engine = engine
+        self.lots = {}
+        self.states = {}
+        self.source = None
+        self.load()
+
+    def source_signature(self):
+        """Modification time and size of the inspection file, used to detect outside edits"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def load(self):
+        """Load the saved states, rebuilding them if the records changed since they were saved"""
+        try:
+            with open(self.switching_path, encoding="utf-8") as file:
+                saved = json.load(file)
+            self.source = saved["source"]
+            self.lots = saved["lots"]
+            self.states = {supplier: SwitchingState.from_dict(state, self.engine.switching)
+                           for supplier, state in saved["states"].items()}
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.clear()
+        self.ensure_current()
+
+    def save(self):
+        temp_path = self.switching_path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump({"source": self.source, "lots": self.lots,
+                       "states": {supplier: state.as_dict() for supplier, state in self.states.items()}}, file)
+        os.replace(temp_path, self.switching_path)
+
+    def clear(self):
+        self.lots = {}
+        self.states = {}
+        self.source = None
+
+    def rebuild(self):
+        """Replay every supplier from the raw inspection records"""
+        self.clear()
+        try:
+            records = read_inspection_records(self.path)
+        except FileNotFoundError:
+            records = []
+        for row in records:
+            entry = lot_entry(row)
+            if entry is not None:
+                self.lots.setdefault(row["Supplier"], []).append(entry)
+        for supplier, lots in self.lots.items():
+            lots.sort(key=lambda entry: entry["time"])
+            self.replay(supplier)
+        self.source = self.source_signature()
+
+    def replay(self, supplier):
+        state = self.states[supplier] = SwitchingState(self.engine.switching)
+        for entry in self.lots[supplier]:
+            apply_lot(state, entry, self.engine)
+
+    def update_lot(self, row):
+        """Count the result of an inspection record, replacing an earlier result of the same attempt"""
+        entry = lot_entry(row)
+        if entry is None:
+            return
+        supplier = row["Supplier"]
+        lots = self.lots.setdefault(supplier, [])
+        counted = [i for i, lot in enumerate(lots) if lot["ic"] == entry["ic"] and lot["attempt"] == entry["attempt"]]
+        for i in reversed(counted):
+            del lots[i]
+        position = bisect_right([lot["time"] for lot in lots], entry["time"])
+        lots.insert(position, entry)
+        if counted or position < len(lots) - 1:
+            self.replay(supplier)
+        else:
+            apply_lot(self.states.setdefault(supplier, SwitchingState(self.engine.switching)), entry, self.engine)
+
+    def ensure_current(self):
+        """Rebuild if the inspection file was edited outside the app"""
+        if self.source != self.source_signature():
+            self.rebuild()
+            self.save()
+
+    def mark_synced(self):
+        self.source = self.source_signature()
+
+    def supplier(self, supplier):
+        """A copy of a supplier's SwitchingState, normal inspection if it has no history"""
+        state = self.states.get(supplier)
+        if state is None:
+            return SwitchingState(self.engine.switching)
+        return SwitchingState.from_dict(state.as_dict(), self.engine.switching)
@@ -0,0 +1,97 @@
+"""Scheduled samples that are missing from the QC databases
+
+The schedule is expanded over a date range and anti-joined against the
+recorded results on (period, test type, kind, point), with pandas' hash
+merge instead of looking each planned sample up in the records. Daily and
+after-sanitization samples are matched on their date, monthly samples on
+their month, so a monthly sample taken any day of the month counts.
+"""
+
+import os
+from datetime import date
+
+import pandas as pd
+
+from .schedule import SCHEDULE
+from .water import DB_FILES, DB_FOLDER
+from .water_store import read_filtered
+
+SOURCES = {"Daily": "Daily", "Monthly": "Monthly", "After Sanitization": "Sanitization"}
+KEYS = ["Period", "Test Type", "Kind", "Point"]
+
+
+def with_period(df):
+    """Add the matching period: the month for monthly tests, the date otherwise"""
+    dates = pd.to_datetime(df["Date"])
+    period = dates.dt.strftime("%Y-%m-%d")
+    monthly = df["Test Type"] == "Monthly"
+    period[monthly] = dates[monthly].dt.strftime("%Y-%m")
+    return df.assign(Period=period)
+
+
+def recorded_samples(date_from, date_to, db_files=DB_FILES, folder=DB_FOLDER):
+    """(Date, Test Type, Kind, Point) of every result recorded in the range"""
+    parts = []
+    for test_type, source in SOURCES.items():
+        for kind in ("Micro", "Chem"):
+            filepath = os.path.join(folder, db_files[f"{source}_{kind}"])
+            if not os.path.exists(filepath):
+                continue
+            part = read_filtered(filepath, [], None, date_from, date_to)
+            part = part.dropna(subset=["Date"])
+            parts.append(pd.DataFrame({
+                "Date": part["Date"],
+                "Test Type": test_type,
+                "Kind": kind,
+                "Point": part["Point"].astype(str)
+            }))
+    if not parts:
+        return pd.DataFrame({"Date": pd.Series(dtype="datetime64[ns]"), "Test Type": pd.Series(dtype=str),
+                             "Kind": pd.Series(dtype=str), "Point": pd.Series(dtype=str)})
+    return pd.concat(parts, ignore_index=True)
+
+
+def find_missing_samples(date_from, date_to, sanitization_dates=None, today=None,
+                         db_files=DB_FILES, folder=DB_FOLDER, schedule=SCHEDULE):
+    """Scheduled samples of a date range with no recorded result
+
+    Sanitization dates default to the dates that have any after-sanitization
+    result. Returns (missing, per_point): one row per missing sample with
+    its state ("Overdue" once its date or month has passed, "Due" otherwise)
+    and a per-point summary of scheduled, recorded and missing samples.
+    """
+    today = today or date.today()
+    recorded = recorded_samples(date_from, date_to, db_files, folder)
+
+    if sanitization_dates is None:
+        sanitized = recorded.loc[recorded["Test Type"] == "After Sanitization", "Date"]
+        sanitization_dates = set(sanitized.dt.date)
+
+    planned = pd.DataFrame(schedule.plan(date_from, date_to, sanitization_dates),
+                           columns=["Date", "Day", "Test Type", "Kind", "Point"])
+    planned = with_period(planned)
+    done = with_period(recorded)[KEYS].drop_duplicates()
+
+    # Hash anti-join: planned samples without a matching recorded key
+    joined = planned.merge(done, on=KEYS, how="left", indicator=True)
+    missing = joined[joined["_merge"] == "left_only"].drop(columns="_merge")
+
+    due = pd.to_datetime(missing["Date"])
+    month_end = due + pd.offsets.MonthEnd(0)
+    deadline = due.where(missing["Test Type"] != "Monthly", month_end)
+    missing = missing.assign(
+        State=["Overdue" if d.date() < today else "Due" for d in deadline],
+        **{"Days Overdue": [max(0, (today - d.date()).days) for d in deadline]}
+    ).drop(columns="Period").reset_index(drop=True)
+
+    per_point = pd.DataFrame({
+        "Scheduled": planned.groupby("Point").size(),
+        "Missing": missing.groupby("Point").size(),
+        "Overdue": missing[missing["State"] == "Overdue"].groupby("Point").size(),
+        "Oldest Missing": missing.groupby("Point")["Date"].min()
+    })
+    per_point[["Missing", "Overdue"]] = per_point[["Missing", "Overdue"]].fillna(0).astype(int)
+    per_point = per_point.fillna({"Oldest Missing": ""})
+    per_point.insert(1, "Recorded", per_point["Scheduled"] - per_point["Missing"])
+    per_point.index.name = "Point"
+    return missing, per_point.sort_values(["Overdue", "Missing"], ascending=False)
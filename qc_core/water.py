@@ -0,0 +1,109 @@
+"""Water sampling points, limits and result evaluation"""
+
+from .schedule import SCHEDULE
+
+DB_FOLDER = "QC_Databases"
+
+DB_FILES = {
+    "Daily_Micro": "daily_microbiology.csv",
+    "Daily_Chem": "daily_chemistry.csv",
+    "Monthly_Micro": "monthly_microbiology.csv",
+    "Monthly_Chem": "monthly_chemistry.csv",
+    "Sanitization_Micro": "sanitization_microbiology.csv",
+    "Sanitization_Chem": "sanitization_chemistry.csv"
+}
+
+MICRO_COLUMNS = [
+    "Date", "Test Type", "Day", "Point",
+    "Total Count", "Coliforms", "Pseudomonas",
+    "Status", "Comments"
+]
+
+CHEM_COLUMNS = [
+    "Date", "Test Type", "Day", "Point",
+    "Conductivity", "Oxidizable", "Cl Test",
+    "Status", "Comments"
+]
+
+# Points, limits and test plans come from water_schedule.json
+ALL_POINTS = SCHEDULE.points
+CFU_LIMITS = SCHEDULE.cfu_limits
+CHEM_LIMITS = {
+    "Conductivity": SCHEDULE.conductivity_limits,
+    "Cl_Allowed_Points": SCHEDULE.cl_allowed_points
+}
+DAILY_MICRO_POINTS = SCHEDULE.daily_micro
+DAILY_CHEM_POINTS = SCHEDULE.daily_chem
+MONTHLY_CHEM = SCHEDULE.monthly_chem
+MONTHLY_MICRO = SCHEDULE.monthly_micro
+
+
+def db_key_for(test_type, is_micro):
+    """Database holding results of a test type ("Daily", "Monthly" or "After Sanitization")"""
+    source = "Sanitization" if test_type == "After Sanitization" else test_type
+    return f"{source}_{'Micro' if is_micro else 'Chem'}"
+
+
+def evaluate_micro(point, count, coliforms, pseudomonas):
+    """Status of a microbiology result against the point's CFU limit"""
+    # Get the specific limit for this point
+    limit = CFU_LIMITS.get(point, SCHEDULE.default_cfu)
+
+    # Validation
+    status = "Conform"
+    if count.isdigit():
+        count_int = int(count)
+        if count_int > limit:
+            status = "Non-Conform"
+        elif count_int > 0.4 * limit:
+            status = "Warning"
+    else:
+        status = "Invalid Input"
+
+    if coliforms == "Present" or pseudomonas == "Present":
+        status = "Non-Conform (Microbial)"
+
+    return status
+
+
+def evaluate_chem(point, conductivity, oxidizable, cl_test):
+    """Status and list of issues of a chemistry result against the point's limits"""
+    issues = []
+
+    # Check conductivity
+    if conductivity:
+        try:
+            cond_value = float(conductivity)
+            limit = CHEM_LIMITS["Conductivity"].get(point, SCHEDULE.default_conductivity)  # Default PW limit
+            if cond_value > limit:
+                issues.append(f"Conductivity > {limit} µS/cm")
+        except ValueError:
+            issues.append("Invalid conductivity value")
+
+    # Check oxidizable substances
+    if oxidizable == "Color change":
+        issues.append("Oxidizable substances detected")
+
+    # Check chloride test
+    if cl_test:
+        try:
+            cl_value = float(cl_test)
+            # Special points where >0.5 is acceptable (conform)
+            if point in CHEM_LIMITS["Cl_Allowed_Points"]:
+                if cl_value <= 0.5:  # Only non-conform if ≤ 0.5 for these points
+                    issues.append("Chloride ≤ 0.5 ppm (needs to be > 0.5 for this point)")
+            else:
+                # For all other points, any chloride is non-conform
+                if cl_value > 0:
+                    issues.append("Chloride detected (should be 0)")
+        except ValueError:
+            issues.append("Invalid chloride value")
+
+    # Determine final status
+    status = "Conform"
+    if issues:
+        status = "Non-Conform: " + ", ".join(issues)
+    elif not conductivity and not cl_test:
+        status = "Incomplete data"
+
+    return status, issues
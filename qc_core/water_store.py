@@ -0,0 +1,457 @@
+"""Water QC database files: export, loading, trend queries and summary cache"""
+
+import csv
+import json
+import os
+from contextlib import nullcontext
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+
+from .column_store import ColumnStore, csv_chunk_rows
+from .metrics import count_read, count_write, file_size
+from .schema import apply_schema, read_raw, storage_row
+from .water import DB_FILES, DB_FOLDER, MICRO_COLUMNS, CHEM_COLUMNS, db_key_for
+from .writer import RejectedRecord, run_after_save
+
+
+def initialize_databases(db_files=DB_FILES, folder=DB_FOLDER):
+    """Create database files with headers in the databases folder"""
+    os.makedirs(folder, exist_ok=True)
+
+    for db_key, filename in db_files.items():
+        filepath = os.path.join(folder, filename)
+        if not os.path.exists(filepath):
+            columns = MICRO_COLUMNS if "Micro" in db_key else CHEM_COLUMNS
+            pd.DataFrame(columns=columns).to_csv(filepath, index=False)
+
+
+class SummaryCache:
+    """Running per-month aggregates for each QC database
+
+    Partials are kept per (database, point, month) and updated as records are
+    exported, so reports over any date range combine month partials instead
+    of rescanning raw rows. Sums are held as Decimal so combining partials
+    gives exactly the same numbers as a full recompute. Without persist the
+    saved partials are read but never written back, for readers running
+    next to the app.
+    """
+    def __init__(self, db_files=DB_FILES, folder=DB_FOLDER, persist=True):
+        self.db_files = db_files
+        self.folder = folder
+        self.cache_path = os.path.join(folder, "summary_cache.json")
+        self.persist = persist
+        self.partials = {}
+        self.sources = {}
+        self.load()
+
+    @staticmethod
+    def value_column(db_key):
+        """Result column the statistics are computed over"""
+        return "Total Count" if "Micro" in db_key else "Conductivity"
+
+    @staticmethod
+    def parse_value(db_key, raw):
+        """Numeric result of a raw cell, or None if it is not a valid result"""
+        try:
+            value = Decimal(str(raw).strip())
+        except InvalidOperation:
+            return None
+        if not value.is_finite():
+            return None
+        # Counts are whole CFU numbers, anything else was an invalid input
+        if "Micro" in db_key and (value < 0 or value != value.to_integral_value()):
+            return None
+        return value
+
+    @staticmethod
+    def empty_partial():
+        return {"Samples": 0, "Count": 0, "Sum": Decimal(0), "SumSq": Decimal(0),
+                "Max": None, "NonConform": 0}
+
+    @staticmethod
+    def merge_partial(target, part):
+        """Fold one partial into another"""
+        target["Samples"] += part["Samples"]
+        target["Count"] += part["Count"]
+        target["Sum"] += part["Sum"]
+        target["SumSq"] += part["SumSq"]
+        target["NonConform"] += part["NonConform"]
+        if part["Max"] is not None and (target["Max"] is None or part["Max"] > target["Max"]):
+            target["Max"] = part["Max"]
+
+    @classmethod
+    def summarize_rows(cls, db_key, rows):
+        """Build month partials from raw record dicts"""
+        partials = {}
+        column = cls.value_column(db_key)
+        for row in rows:
+            key = (db_key, str(row["Point"]), str(row["Date"])[:7])
+            part = partials.setdefault(key, cls.empty_partial())
+            part["Samples"] += 1
+            if "Non-Conform" in str(row.get("Status", "")):
+                part["NonConform"] += 1
+            value = cls.parse_value(db_key, row.get(column))
+            if value is not None:
+                part["Count"] += 1
+                part["Sum"] += value
+                part["SumSq"] += value * value
+                if part["Max"] is None or value > part["Max"]:
+                    part["Max"] = value
+        return partials
+
+    def source_path(self, db_key):
+        return os.path.join(self.folder, self.db_files[db_key])
+
+    def source_signature(self, db_key):
+        """Modification time and size of a database file, used to detect outside edits"""
+        try:
+            stat = os.stat(self.source_path(db_key))
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def load(self):
+        """Load saved partials and rebuild any database changed since they were saved"""
+        try:
+            with open(self.cache_path, encoding="utf-8") as file:
+                saved = json.load(file)
+            self.sources = saved.get("sources", {})
+            for db_key, point, month, samples, count, total, total_sq, maximum, non_conform in saved.get("partials", []):
+                self.partials[(db_key, point, month)] = {
+                    "Samples": samples, "Count": count,
+                    "Sum": Decimal(total), "SumSq": Decimal(total_sq),
+                    "Max": Decimal(maximum) if maximum is not None else None,
+                    "NonConform": non_conform
+                }
+        except (FileNotFoundError, ValueError, TypeError):
+            self.partials = {}
+            self.sources = {}
+
+        stale = [db_key for db_key in self.db_files if not self.is_current(db_key)]
+        for db_key in stale:
+            self.rebuild(db_key)
+        if stale:
+            self.save()
+
+    def save(self):
+        if not self.persist:
+            return
+        partials = [
+            [db_key, point, month, part["Samples"], part["Count"], str(part["Sum"]),
+             str(part["SumSq"]), str(part["Max"]) if part["Max"] is not None else None,
+             part["NonConform"]]
+            for (db_key, point, month), part in sorted(self.partials.items())
+        ]
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump({"sources": self.sources, "partials": partials}, file)
+        os.replace(temp_path, self.cache_path)
+
+    def is_current(self, db_key):
+        return self.sources.get(db_key) == self.source_signature(db_key)
+
+    def ensure_current(self, db_key):
+        """Rebuild a database's partials if its file was edited outside the app"""
+        if not self.is_current(db_key):
+            self.rebuild(db_key)
+            self.save()
+
+    def rebuild(self, db_key):
+        """Recompute every partial of one database from its raw rows, a chunk at a time"""
+        self.partials = {key: part for key, part in self.partials.items() if key[0] != db_key}
+        filepath = self.source_path(db_key)
+        if os.path.exists(filepath):
+            rows = 0
+            for chunk in read_raw(filepath, chunksize=csv_chunk_rows()):
+                for key, part in self.summarize_rows(db_key, chunk.to_dict("records")).items():
+                    self.merge_partial(self.partials.setdefault(key, self.empty_partial()), part)
+                rows += len(chunk)
+            count_read(filepath, rows=rows)
+        self.sources[db_key] = self.source_signature(db_key)
+
+    def add_record(self, db_key, record):
+        """Fold a newly exported record into its month partial"""
+        for key, part in self.summarize_rows(db_key, [record]).items():
+            self.merge_partial(self.partials.setdefault(key, self.empty_partial()), part)
+
+    def mark_synced(self, db_key):
+        """Record that the partials reflect the database file as it is now"""
+        self.sources[db_key] = self.source_signature(db_key)
+
+    def summarize(self, db_key, date_from, date_to, df=None):
+        """Per-point statistics for a date range
+
+        Whole months come from the cached partials. Months only partly covered
+        by the range are computed from ``df`` (the loaded rows of the range),
+        or from a chunked scan of the database file when not given.
+        """
+        self.ensure_current(db_key)
+
+        first_full = date_from if date_from.day == 1 else (date_from.replace(day=28) + timedelta(days=4)).replace(day=1)
+        last_full = date_to if (date_to + timedelta(days=1)).day == 1 else date_to.replace(day=1) - timedelta(days=1)
+        first_full, last_full = first_full.strftime("%Y-%m"), last_full.strftime("%Y-%m")
+
+        totals = {}
+        for (key_db, point, month), part in self.partials.items():
+            if key_db == db_key and first_full <= month <= last_full:
+                self.merge_partial(totals.setdefault(point, self.empty_partial()), part)
+
+        edge_months = {date_from.strftime("%Y-%m"), date_to.strftime("%Y-%m")}
+        edge_months = {m for m in edge_months if not first_full <= m <= last_full}
+        if edge_months:
+            if df is None:
+                chunks = read_raw(self.source_path(db_key), chunksize=csv_chunk_rows())
+                count_read(self.source_path(db_key))
+            else:
+                chunks = [df]
+            for chunk in chunks:
+                dates = pd.to_datetime(chunk["Date"])
+                in_range = (dates >= pd.to_datetime(date_from)) & (dates <= pd.to_datetime(date_to))
+                edge_rows = chunk[in_range & dates.dt.strftime("%Y-%m").isin(edge_months)].to_dict("records")
+                for (_, point, _), part in self.summarize_rows(db_key, edge_rows).items():
+                    self.merge_partial(totals.setdefault(point, self.empty_partial()), part)
+
+        records = []
+        for point, part in sorted(totals.items()):
+            n = part["Count"]
+            mean = float(part["Sum"] / n) if n else float("nan")
+            std = float("nan")
+            if n > 1:
+                variance = (part["SumSq"] - part["Sum"] * part["Sum"] / n) / (n - 1)
+                std = float(variance.sqrt()) if variance > 0 else 0.0
+            maximum = float(part["Max"]) if part["Max"] is not None else float("nan")
+            records.append((point, part["Samples"], mean, std, maximum, part["NonConform"]))
+
+        return pd.DataFrame(records, columns=["Point", "Samples", "Mean", "Std", "Max", "Non-Conform"]).set_index("Point")
+
+
+def read_filtered(filepath, columns, points=None, date_from=None, date_to=None, chunksize=None):
+    """Read only the wanted columns and rows of a database file as a typed frame
+
+    Columns are pushed down to the CSV parser and the point/date filters are
+    applied chunk by chunk, so rows outside the query are never kept.
+    Chunks are sized to the memory limit by default.
+    """
+    wanted = set(["Date", "Point"] + list(columns))
+    point_set = set(points) if points is not None else None
+    start = pd.to_datetime(date_from) if date_from is not None else None
+    end = pd.to_datetime(date_to) if date_to is not None else None
+
+    chunks = []
+    for chunk in read_raw(filepath, usecols=lambda c: c in wanted, chunksize=chunksize or csv_chunk_rows()):
+        dates = pd.to_datetime(chunk["Date"], errors="coerce")
+        mask = pd.Series(True, index=chunk.index)
+        if point_set is not None:
+            mask &= chunk["Point"].isin(point_set)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates <= end
+        chunks.append(chunk[mask])
+    count_read(filepath, rows=sum(len(chunk) for chunk in chunks))
+
+    # Types are applied once to the kept rows so every chunk shares the same categories
+    if not chunks:
+        return apply_schema(pd.DataFrame(columns=sorted(wanted), dtype=str))
+    return apply_schema(pd.concat(chunks, ignore_index=True))
+
+
+def query_point_trends(db_files=DB_FILES, points=None, date_from=None, date_to=None,
+                       sources=("Daily", "Monthly", "Sanitization"),
+                       micro_columns=("Total Count", "Coliforms", "Pseudomonas", "Status"),
+                       chem_columns=("Conductivity", "Oxidizable", "Cl Test", "Status"),
+                       folder=DB_FOLDER):
+    """Union Daily, Monthly and Sanitization data into one time series per point
+
+    Micro and chem results of the same point, date and source are joined on
+    one row; columns both share (Status, Comments) get a Micro/Chem prefix.
+    Returns a dict of point -> DataFrame indexed by Date.
+    """
+    frames = {}
+    for kind, columns in (("Micro", micro_columns), ("Chem", chem_columns)):
+        parts = []
+        for source in sources:
+            filepath = os.path.join(folder, db_files[f"{source}_{kind}"])
+            if not columns or not os.path.exists(filepath):
+                continue
+            part = read_filtered(filepath, columns, points, date_from, date_to)
+            part["Source"] = source
+            parts.append(part)
+        if parts:
+            frame = pd.concat(parts, ignore_index=True)
+            frames[kind] = frame.rename(columns={c: f"{kind} {c}" for c in ("Status", "Comments") if c in frame.columns})
+
+    keys = ["Point", "Date", "Source"]
+    if len(frames) == 2:
+        combined = frames["Micro"].merge(frames["Chem"], on=keys, how="outer")
+    elif frames:
+        combined = next(iter(frames.values()))
+    else:
+        return {}
+
+    combined = combined.sort_values(["Point", "Date"], kind="stable")
+    return {point: group.drop(columns="Point").set_index("Date")
+            for point, group in combined.groupby("Point", sort=False, observed=True)}
+
+
+def load_results(filepath, date_from, date_to, data_type, column_store=None, lock=None):
+    """Typed rows of a date range of a database file, sorted by date, with their SPC signals
+
+    Only the rows of the range are read, from the file's ColumnStore (opened
+    if not given), so the file itself never has to fit in memory. Raises
+    ValueError if the range holds more rows than the memory limit allows.
+    lock, the writer's, is only held while the store is brought up to date
+    and the rows selected; the rows are read while records are appended.
+    """
+    store = column_store or ColumnStore(filepath)
+    with lock or nullcontext():
+        store.ensure_current()
+        rows = store.select(date_from=date_from, date_to=date_to)
+    filtered_df = store.frame(rows).sort_values('Date', kind='stable').reset_index(drop=True)
+    
+    # SPC baselines use each point's whole history, not just the selected range
+    column = 'Total Count' if data_type == "Microbiology" else 'Conductivity'
+    spc = store.spc(column, date_from, date_to, points=filtered_df['Point'].astype(str).unique())
+    return filtered_df, spc
+
+
+def check_for_duplicates(df, new_record):
+    """Check if a record with same date, point and test type already exists"""
+    mask = (
+        (df['Date'] == new_record['Date']) & 
+        (df['Point'] == new_record['Point']) & 
+        (df['Test Type'] == new_record['Test Type'])
+    )
+    return df[mask].empty
+
+
+def is_duplicate(filepath, new_row, column_store=None):
+    """Whether a database file already has a record of the row's date, point and test type
+
+    Uses the column store if given, otherwise scans the three columns a chunk at a time.
+    """
+    if column_store is not None:
+        return column_store.contains(new_row['Date'], new_row['Point'], new_row['Test Type'])
+    if not os.path.exists(filepath):
+        return False
+    for chunk in read_raw(filepath, usecols=['Date', 'Point', 'Test Type'], chunksize=csv_chunk_rows()):
+        if not check_for_duplicates(chunk, new_row):
+            return True
+    return False
+
+
+def append_row(filepath, row, columns):
+    """Append one row to a database file, creating it with a header if needed
+
+    Rows already in the file are not read or written again.
+    """
+    header = None
+    ends_with_newline = True
+    if os.path.exists(filepath) and os.path.getsize(filepath):
+        with open(filepath, mode="r", newline="", encoding="utf-8") as file:
+            header = next(csv.reader(file))
+        with open(filepath, mode="rb") as file:
+            file.seek(-1, os.SEEK_END)
+            ends_with_newline = file.read(1) in (b"\n", b"\r")
+    
+    # Same line endings as the files pandas writes
+    with open(filepath, mode="a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, lineterminator=os.linesep)
+        if header is None:
+            header = columns
+            writer.writerow(header)
+        elif not ends_with_newline:
+            file.write(os.linesep)
+        writer.writerow([row.get(column, "") for column in header])
+
+
+def append_record(record, db_files=DB_FILES, summary_cache=None, folder=DB_FOLDER, column_cache=None):
+    """Append one entered record to its database file and the summary cache, without saving the cache
+
+    Returns the file written and its change feed entry. Raises
+    RejectedRecord if the record is invalid or already in the database; any other error
+    leaves the file as it was, so the record can be saved again. With a
+    ColumnCache the duplicate check uses the database's column store, which
+    is kept up to date.
+    """
+    test_type = record["Test Type"]
+    is_micro = record["Tab"] == "Microbiology"
+    
+    # Determine which database file to use
+    db_key = db_key_for(test_type, is_micro)
+    filename = db_files[db_key]
+    filepath = os.path.join(folder, filename)
+    
+    # Prepare new row, rejecting values the typed loader could not read back
+    try:
+        new_row = storage_row(record, MICRO_COLUMNS if is_micro else CHEM_COLUMNS)
+    except ValueError as e:
+        raise RejectedRecord(f"Invalid entry for {record['Point']}: {e}")
+    
+    # Check for duplicates
+    column_store = column_cache.store(db_key) if column_cache is not None else None
+    if is_duplicate(filepath, new_row, column_store):
+        raise RejectedRecord(f"Duplicate entry for {record['Point']} on {record['Date']}")
+    
+    # Append the row to the file and fold it into the summary cache and column store
+    if summary_cache is not None:
+        summary_cache.ensure_current(db_key)
+    size_before = file_size(filepath)
+    append_row(filepath, new_row, MICRO_COLUMNS if is_micro else CHEM_COLUMNS)
+    count_write(filepath, size_before, rows=1)
+    if summary_cache is not None:
+        summary_cache.add_record(db_key, new_row)
+        summary_cache.mark_synced(db_key)
+    if column_store is not None:
+        try:
+            column_store.append(new_row)
+        except OSError:
+            pass  # The record is saved, the store converts it from the CSV on its next use
+    return filepath, (db_key, "insert", {"Date": new_row["Date"], "Point": new_row["Point"]}, new_row)
+
+
+def export_record(record, db_files=DB_FILES, summary_cache=None, folder=DB_FOLDER, change_feed=None,
+                  column_cache=None):
+    """Append one entered record to its database file, see append_record()
+
+    Raises PartlySaved if the record was written but saving the summary
+    cache or the change feed entry failed.
+    """
+    filepath, change = append_record(record, db_files, summary_cache, folder, column_cache)
+    steps = []
+    if summary_cache is not None:
+        steps.append(summary_cache.save)
+    if change_feed is not None:
+        steps.append(lambda: change_feed.append([change]))
+    run_after_save(steps)
+    return filepath
+
+
+def export_records(records, db_files=DB_FILES, summary_cache=None, folder=DB_FOLDER, change_feed=None,
+                   column_cache=None):
+    """Append entered records to their database files
+
+    Returns the set of files written and a list of error messages.
+    """
+    exported_files = set()
+    errors = []
+    changes = []
+    
+    for record in records:
+        try:
+            filepath, change = append_record(record, db_files, summary_cache, folder, column_cache)
+            exported_files.add(filepath)
+            changes.append(change)
+        except RejectedRecord as e:
+            errors.append(str(e))
+        except Exception as e:
+            errors.append(f"Error saving {record['Point']}: {str(e)}")
+    
+    if exported_files and summary_cache is not None:
+        summary_cache.save()
+    if changes and change_feed is not None:
+        change_feed.append(changes)
+    
+    return exported_files, errors
@@ -0,0 +1,210 @@
+"""Background writer for the apps' saves
+
+Saves are queued and run one at a time on a worker thread, so the UI does
+not wait on file writes and no two writes to a store overlap. The apps poll
+finished() from the Tk loop (Tk must only be touched from its own thread)
+and confirm saves in their status bar instead of a dialog.
+
+A job that raises RejectedRecord was rejected (invalid or duplicate input)
+and is reported, not retried. Any other error, such as a file kept open in
+Excel or a file that can't be decoded, is retried after each of
+RETRY_DELAYS seconds while the jobs behind it wait, so saves still land in
+the order they were made. A job that still fails after the last delay goes
+to the retry queue until retry_failed(). Saves still failing when the app
+closes are kept in unsaved_saves.jsonl.
+
+A record must not be written twice, so a job whose record is written but
+whose follow-up updates (caches, change feed, certificate) fail raises
+PartlySaved from run_after_save(); its retries only run the updates that
+did not happen.
+"""
+
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+RETRY_DELAYS = (2, 10, 30)
+RECOVERY_FILE = "unsaved_saves.jsonl"
+
+
+class RejectedRecord(ValueError):
+    """A save refused because of what was entered, saving it again would not help"""
+
+
+class PartlySaved(Exception):
+    """The record of a job was written, the updates in steps (the failed one first) were not
+
+    result is what the call would have returned, for callers that add
+    steps of their own.
+    """
+    def __init__(self, error, steps, result=None):
+        super().__init__(f"{error} (the record itself was saved)")
+        self.error = error
+        self.steps = steps
+        self.result = result
+
+
+def run_after_save(steps):
+    """Run the updates that follow a record's write in order, returns the result of the last
+
+    Raises PartlySaved with the failed update and the ones after it.
+    """
+    result = None
+    for i, step in enumerate(steps):
+        try:
+            result = step()
+        except Exception as e:
+            raise PartlySaved(e, list(steps[i:])) from e
+    return result
+
+
+class WriteJob:
+    """One queued save: a description for the status bar and the call to make"""
+    def __init__(self, description, function, args, kwargs):
+        self.description = description
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.tries = 0
+        self.result = None
+        self.error = None
+        self.remaining = None  # Updates still to run once the record is written
+
+    def call(self):
+        if self.remaining is not None:
+            return run_after_save(self.remaining)
+        return self.function(*self.args, **self.kwargs)
+
+
+class BackgroundWriter:
+    """Queue of saves run by one worker thread
+
+    lock is held while a job runs; hold it to read stores the jobs write.
+    """
+    def __init__(self, retry_delays=RETRY_DELAYS):
+        self.retry_delays = retry_delays
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        self.failed = []
+        self.failed_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="background-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, description, function, *args, **kwargs):
+        """Queue function(*args, **kwargs), returns the job"""
+        job = WriteJob(description, function, args, kwargs)
+        self.jobs.put(job)
+        return job
+
+    def pending(self):
+        """Jobs queued or running"""
+        return self.jobs.unfinished_tasks
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            try:
+                self.attempt(job)
+            finally:
+                self.jobs.task_done()
+
+    def attempt(self, job):
+        delays = list(self.retry_delays)
+        while True:
+            job.tries += 1
+            try:
+                with self.lock:
+                    job.result = job.call()
+            except RejectedRecord as e:
+                job.error = e
+                self.events.put(("rejected", job))
+                return
+            except Exception as e:
+                if isinstance(e, PartlySaved):
+                    job.remaining = e.steps
+                job.error = e
+                if not delays or self.stopping.is_set():
+                    with self.failed_lock:
+                        self.failed.append(job)
+                    self.events.put(("failed", job))
+                    return
+                delay = delays.pop(0)
+                self.events.put(("retrying", job))
+                self.stopping.wait(delay)
+            else:
+                job.error = None
+                self.events.put(("done", job))
+                return
+
+    def finished(self):
+        """(state, job) of everything that happened since the last call, without waiting
+
+        state is "done", "rejected", "retrying" or "failed".
+        """
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def retry_failed(self):
+        """Queue the jobs of the retry queue again, returns how many"""
+        with self.failed_lock:
+            jobs, self.failed = self.failed, []
+        for job in jobs:
+            job.tries = 0
+            self.jobs.put(job)
+        return len(jobs)
+
+    def status_text(self, state, job):
+        """Status bar line of a finished() event
+
+        A job returning a string reports it as its confirmation.
+        """
+        if state == "done":
+            return job.result if isinstance(job.result, str) else f"Saved {job.description}"
+        if state == "rejected":
+            return f"Not saved: {job.error}"
+        if state == "retrying":
+            return f"Could not save {job.description} ({job.error}), trying again"
+        return f"Could not save {job.description}: {job.error}"
+
+    def unsaved_text(self, jobs, limit=20):
+        """Lines listing jobs that could not be saved, for a dialog"""
+        lines = [f"{job.description}: {job.error}" for job in jobs[:limit]]
+        if len(jobs) > limit:
+            lines.append(f"... and {len(jobs) - limit} more")
+        return "\n".join(lines)
+
+    def close(self):
+        """Run the jobs still queued, without waiting between retries, and stop
+
+        Returns the jobs that could not be saved.
+        """
+        self.stopping.set()
+        self.jobs.put(None)
+        self.thread.join()
+        return self.failed
+
+
+def write_recovery_file(jobs, path=RECOVERY_FILE):
+    """Append the jobs that could not be saved to a JSON lines file, returns its full path
+
+    Each line holds the description, the error and the arguments of the
+    save, enough to enter the record again, and whether the record itself
+    was written and only its follow-up updates are missing.
+    """
+    closed = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(path, mode="a", encoding="utf-8") as file:
+        for job in jobs:
+            file.write(json.dumps({"closed": closed, "description": job.description, "error": str(job.error),
+                                   "args": job.args, "saved": job.remaining is not None}, default=str) + "\n")
+    return os.path.abspath(path)
@@ -0,0 +1,93 @@
+"""Plans of the engine against published cells of ISO 2859-1 tables 1, 2-A, 2-B and 2-C"""
+
+import pytest
+
+from qc_core import AQL_ENGINE, get_aql_values, build_inspection_plan
+from qc_core.switching import score_points
+
+
+# (lot size, level, AQL, severity) -> (code letter, sample, Ac, Re)
+PUBLISHED = [
+    (500, "II", 1.0, "Normal", ("H", 50, 1, 2)),
+    (500, "II", 2.5, "Normal", ("H", 50, 3, 4)),
+    (500, "II", 4.0, "Normal", ("H", 50, 5, 6)),
+    (500, "II", 0.65, "Normal", ("J", 80, 1, 2)),
+    (1000, "II", 2.5, "Normal", ("J", 80, 5, 6)),
+    (1000, "II", 4.0, "Normal", ("J", 80, 7, 8)),
+    (2000, "II", 10, "Normal", ("K", 125, 21, 22)),
+    (5000, "II", 10, "Normal", ("K", 125, 21, 22)),
+    (5000, "II", 6.5, "Normal", ("L", 200, 21, 22)),
+    (50000, "II", 0.65, "Normal", ("N", 500, 7, 8)),
+    (50000, "II", 1.0, "Normal", ("N", 500, 10, 11)),
+    (50000, "II", 4.0, "Normal", ("M", 315, 21, 22)),
+    (200000, "II", 1.0, "Normal", ("P", 800, 14, 15)),
+    (200000, "II", 2.5, "Normal", ("N", 500, 21, 22)),
+    (200000, "II", 4.0, "Normal", ("M", 315, 21, 22)),
+    (1000, "II", 2.5, "Tightened", ("J", 80, 3, 4)),
+    (1000, "II", 4.0, "Tightened", ("J", 80, 5, 6)),
+    (10000, "II", 4.0, "Tightened", ("L", 200, 12, 13)),
+    (50000, "II", 4.0, "Tightened", ("M", 315, 18, 19)),
+    (50000, "II", 2.5, "Tightened", ("N", 500, 18, 19)),
+    (1000, "II", 2.5, "Reduced", ("J", 32, 2, 3)),
+    (10000, "II", 10, "Reduced", ("K", 50, 10, 11)),
+    (50000, "II", 10, "Reduced", ("K", 50, 10, 11)),
+    (50000, "II", 4.0, "Reduced", ("M", 125, 10, 11)),
+]
+
+
+@pytest.mark.parametrize("units, level, aql, severity, expected", PUBLISHED)
+def test_published_plans(units, level, aql, severity, expected):
+    assert tuple(AQL_ENGINE.plan(units, level, aql, severity)) == expected
+
+
+@pytest.mark.parametrize("severity, largest", [("Normal", 21), ("Tightened", 18), ("Reduced", 10)])
+def test_accept_numbers_up_to_aql_10_stop_at_largest_plan(severity, largest):
+    for level in AQL_ENGINE.levels:
+        for aql in AQL_ENGINE.aql_values:
+            if aql > 10:
+                continue
+            for units in AQL_ENGINE.lot_bounds:
+                plan = AQL_ENGINE.plan(units, level, aql, severity)
+                assert plan is None or plan.ac <= largest
+
+
+def test_larger_aql_keeps_longer_diagonals():
+    assert tuple(AQL_ENGINE.plan(8, "II", 100)) == ("A", 2, 5, 6)
+    assert tuple(AQL_ENGINE.plan(40, "II", 100)) == ("D", 8, 14, 15)
+    assert tuple(AQL_ENGINE.plan(500, "II", 100)) == ("G", 32, 44, 45)
+    assert tuple(AQL_ENGINE.plan(2000, "II", 1000)) == ("B", 3, 44, 45)
+
+
+@pytest.mark.parametrize("units, level, aql", [(5, "II", 10), (20, "S-1", 10)])
+def test_arrow_off_the_table_has_no_plan(units, level, aql):
+    assert AQL_ENGINE.plan(units, level, aql) is None
+
+
+def test_switching_score():
+    # n=80: major 2.5 is 5/6 (1.5 is 3/4), minor 4.0 is 7/8 (2.5 is 5/6)
+    assert score_points(1000, "II", "Normal", 3, 5) == 3
+    assert score_points(1000, "II", "Normal", 4, 5) == 0
+    # n=5: both classes accept 0 defects, accepted lots score 2
+    assert score_points(60, "I", "Normal", 0, 0) == 2
+
+
+def test_lot_without_plan_is_reported_not_raised():
+    assert get_aql_values(5, "II", major_aql=10) == (None, None, None)
+    assert get_aql_values(20, "S-1", minor_aql=10) == (None, None, None)
+
+
+def test_both_classes_use_the_common_sample():
+    # Major 2.5 points down to F (n=20); minor 4.0 at F is 2/3, not the 1/2 of E (n=13)
+    assert get_aql_values(60, "II") == (20, 1, 2)
+    plan = build_inspection_plan("IC1", "", "", "Sam", "Acme", 60, "bottle", "II")
+    assert (plan["code_letter"], plan["sample"]) == ("F", 20)
+    assert (plan["major"], plan["major_re"], plan["minor"], plan["minor_re"]) == (1, 2, 2, 3)
+
+
+def test_class_without_plan_at_common_letter_keeps_its_own():
+    # Major 2.5 is at N (n=500); minor 4.0 has no plan at N and keeps 21/22
+    assert get_aql_values(200000, "II") == (500, 21, 21)
+
+
+def test_sample_is_the_whole_lot_when_larger():
+    assert tuple(AQL_ENGINE.plan(5, "II", 1.0)) == ("E", 5, 0, 1)
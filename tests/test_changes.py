@@ -0,0 +1,15 @@
+"""Change feed segments"""
+
+from qc_core import ChangeFeed
+
+
+def test_append_after_a_partial_line(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "Change_Feed"))
+    feed.append([("inspections", "insert", {"Internal Code": "IC1"}, {"Status": ""})])
+    (path,) = [path for _, path in feed.segments()]
+    with open(path, mode="ab") as file:
+        file.write(b'{"seq": 2, "time": "2024-01-01 08:00:00", "sto')
+
+    assert feed.append([("inspections", "update", {"Internal Code": "IC1"}, {"Status": "Conform"})]) == 2
+    entries = feed.read()
+    assert [(entry["seq"], entry["op"]) for entry in entries] == [(1, "insert"), (2, "update")]
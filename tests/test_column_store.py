@@ -0,0 +1,47 @@
+"""Column store kept in step with a database file"""
+
+import os
+
+import pandas as pd
+
+from qc_core import ColumnCache, export_record, initialize_databases, read_results
+from qc_core.column_store import ColumnStore
+
+
+def micro_record(day, point):
+    return {"Tab": "Microbiology", "Test Type": "Daily", "Date": f"2024-01-{day:02d}", "Day": "Sunday",
+            "Point": point, "Total Count": str(day), "Coliforms": "Absent", "Pseudomonas": "Absent",
+            "Status": "Conform", "Comments": f"day {day}"}
+
+
+def test_failed_append_is_cut_back_and_caught_up(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    initialize_databases(folder=folder)
+    cache = ColumnCache(folder=folder)
+    for day in (1, 2):
+        export_record(micro_record(day, "PW1"), folder=folder, column_cache=cache)
+    store = cache.store("Daily_Micro")
+
+    # The second column file written fails, the first already has the row
+    write = ColumnStore.write
+    written = []
+
+    def failing_write(self, column, kind, values):
+        written.append(column)
+        if len(written) == 2:
+            raise OSError("disk full")
+        write(self, column, kind, values)
+
+    # The record is saved all the same
+    monkeypatch.setattr(ColumnStore, "write", failing_write)
+    export_record(micro_record(3, "PW2"), folder=folder, column_cache=cache)
+    monkeypatch.setattr(ColumnStore, "write", write)
+    assert store.rows == 2
+    assert store.files_complete()
+
+    # The next save catches up the row already in the CSV instead of adding to misaligned files
+    export_record(micro_record(4, "PW1"), folder=folder, column_cache=cache)
+    path = os.path.join(folder, "daily_microbiology.csv")
+    expected = read_results(path)
+    pd.testing.assert_frame_equal(store.frame(store.select()), expected)
+    assert store.contains("2024-01-03", "PW2", "Daily")
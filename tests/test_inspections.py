@@ -0,0 +1,90 @@
+"""Inspection records written through the index"""
+
+import csv
+from datetime import datetime
+
+import pytest
+
+from qc_core import (InspectionIndex, append_inspection_record, build_inspection_plan, read_inspection_records,
+                     search_inspection_records, update_conformity_record)
+from qc_core import inspections
+
+
+def plan_lots(path, index, count):
+    for lot in range(count):
+        plan = build_inspection_plan(f"IC{lot}", "", "", "Sam", "Acme", 1000, "bottle", "II")
+        append_inspection_record(plan, datetime(2024, 1, 1, 8, lot), path, index=index)
+
+
+def test_results_supersede_their_attempt(tmp_path):
+    path = str(tmp_path / "inspection_results.csv")
+    index = InspectionIndex(path, str(tmp_path / "inspection_index.json"))
+    plan_lots(path, index, 3)
+    update_conformity_record("IC1", "", "", "Conform", "Ina", "", 1, 2, path, index=index)
+    update_conformity_record("IC1", "", "", "Non-Conform", "Ina", "again", 9, 2, path, index=index)
+
+    records = read_inspection_records(path)
+    assert [record["Internal Code"] for record in records] == ["IC0", "IC1", "IC2"]
+    assert (records[1]["Status"], records[1]["Major Found"]) == ("Non-Conform", 9)
+    latest, = search_inspection_records("IC1", path=path, latest_only=True, index=index)
+    assert latest == records[1]
+
+    # A scan of the file finds the same newest version
+    rebuilt = InspectionIndex(path, index_path=None)
+    assert (rebuilt.offsets, rebuilt.attempts) == (index.offsets, index.attempts)
+    assert rebuilt.superseded() == 2
+
+
+def test_compaction_keeps_the_latest_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(inspections, "COMPACT_MIN_RECORDS", 4)
+    path = str(tmp_path / "inspection_results.csv")
+    index = InspectionIndex(path, index_path=None)
+    plan_lots(path, index, 4)
+    for lot in (3, 0, 2, 1):
+        update_conformity_record(f"IC{lot}", "", "", "Conform", "Ina", "", lot, 0, path, index=index)
+
+    assert index.superseded() == 0
+    assert len(index.offsets) == 5
+    records = read_inspection_records(path)
+    assert [(record["Internal Code"], record["Major Found"]) for record in records] == [
+        ("IC0", 0), ("IC1", 1), ("IC2", 2), ("IC3", 3)]
+
+
+def test_append_overwrites_a_record_cut_off_by_a_crash(tmp_path):
+    path = str(tmp_path / "inspection_results.csv")
+    plan_lots(path, None, 2)
+    with open(path, mode="ab") as file:
+        file.write(b"2024-01-01 09:00:00,IC9,1,half a rec")
+    index = InspectionIndex(path, index_path=None)
+    assert index.find("IC9") is None
+    update_conformity_record("IC0", "", "", "Conform", "Ina", "", 0, 0, path, index=index)
+
+    records = read_inspection_records(path)
+    assert [(record["Internal Code"], record["Status"]) for record in records] == [("IC0", "Conform"), ("IC1", "")]
+
+
+def test_reading_leaves_out_a_record_cut_off_by_a_crash(tmp_path):
+    path = str(tmp_path / "inspection_results.csv")
+    plan_lots(path, None, 2)
+    update_conformity_record("IC1", "", "", "Conform", "Ina", "line one\nline two", 0, 0, path)
+    with open(path, mode="ab") as file:
+        file.write(b'2024-01-01 09:00:00,IC1,1,,,Sam,Acme,1000,bottle,II,"half a quoted\nfield')
+
+    records = read_inspection_records(path)
+    assert [(record["Internal Code"], record["Comments"]) for record in records] == [
+        ("IC0", ""), ("IC1", "line one\nline two")]
+    assert search_inspection_records("IC1", path=path) == records[1:]
+
+
+def test_reading_without_migrate_leaves_an_old_file_alone(tmp_path):
+    path = str(tmp_path / "inspection_results.csv")
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerow(inspections.INSPECTION_SCHEMAS[2])
+    with open(path, mode="rb") as file:
+        before = file.read()
+
+    with pytest.raises(ValueError, match="schema version 2"):
+        read_inspection_records(path, migrate=False)
+    with open(path, mode="rb") as file:
+        assert file.read() == before
+    assert read_inspection_records(path) == []
@@ -0,0 +1,60 @@
+"""Typed schema of the water QC database files"""
+
+import csv
+
+import pandas as pd
+import pytest
+
+from qc_core import CHEM_COLUMNS, MICRO_COLUMNS, display_frame, read_results, storage_row
+
+
+def write_rows(path, columns, records):
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(storage_row(record, columns))
+
+
+def test_stored_rows_read_back_as_entered(tmp_path):
+    path = str(tmp_path / "daily_chemistry.csv")
+    records = [
+        {"Date": "2024-01-02", "Test Type": "Daily", "Day": "Tuesday", "Point": "PW1", "Conductivity": "0.8",
+         "Oxidizable": "No color change", "Cl Test": "", "Status": "Conform", "Comments": "a, \"quoted\" note"},
+        {"Date": "2024-01-03", "Test Type": "Daily", "Day": "", "Point": "PW2", "Conductivity": "12",
+         "Oxidizable": "Color change", "Cl Test": "0.4", "Status": "Non-Conform", "Comments": ""},
+    ]
+    write_rows(path, CHEM_COLUMNS, records)
+
+    df = read_results(path)
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+    assert isinstance(df["Point"].dtype, pd.CategoricalDtype)
+    assert df["Conductivity"].tolist() == [0.8, 12.0]
+    assert df["Oxidizable"].tolist() == [False, True]
+    assert df["Cl Test"].isna().tolist() == [True, False]
+    assert display_frame(df)[CHEM_COLUMNS].to_dict("records") == records
+
+
+def test_text_that_is_not_a_number_reads_back_as_invalid(tmp_path):
+    path = str(tmp_path / "daily_microbiology.csv")
+    record = {"Date": "2024-01-02", "Test Type": "Daily", "Day": "", "Point": "PW1", "Total Count": "lots",
+              "Coliforms": "Present", "Pseudomonas": "", "Status": "Invalid Input", "Comments": ""}
+    write_rows(path, MICRO_COLUMNS, [record])
+
+    df = read_results(path)
+    assert df["Total Count"].isna().all() and df["Total Count Invalid"].all()
+    assert df["Pseudomonas"].isna().all()
+    shown = display_frame(df)
+    assert "Total Count Invalid" not in shown.columns
+    assert shown.loc[0, "Total Count"] == "Invalid"
+    assert shown.loc[0, "Coliforms"] == "Present"
+
+
+@pytest.mark.parametrize("column, value", [
+    ("Date", "02/01/2024"), ("Test Type", "Weekly"), ("Day", "Funday"), ("Point", "XX9"), ("Coliforms", "Maybe")])
+def test_values_outside_the_schema_are_not_stored(column, value):
+    record = {"Date": "2024-01-02", "Test Type": "Daily", "Day": "", "Point": "PW1", "Total Count": "3",
+              "Coliforms": "Absent", "Pseudomonas": "Absent", "Status": "Conform", "Comments": ""}
+    record[column] = value
+    with pytest.raises(ValueError):
+        storage_row(record, MICRO_COLUMNS)
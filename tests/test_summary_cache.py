@@ -0,0 +1,49 @@
+"""Month partials of the summary cache kept up to date as records are exported"""
+
+import os
+from datetime import date
+
+import pandas as pd
+
+from qc_core import SummaryCache, export_record, initialize_databases
+
+
+def micro_record(day, point, total, status="Conform"):
+    return {"Tab": "Microbiology", "Test Type": "Daily", "Date": day, "Day": "", "Point": point,
+            "Total Count": str(total), "Coliforms": "Absent", "Pseudomonas": "Absent", "Status": status,
+            "Comments": ""}
+
+
+def test_exports_update_the_partials_like_a_rebuild(tmp_path):
+    folder = str(tmp_path)
+    initialize_databases(folder=folder)
+    cache = SummaryCache(folder=folder)
+    for record in (micro_record("2024-01-10", "PW1", 10), micro_record("2024-01-20", "PW1", 30),
+                   micro_record("2024-02-05", "PW1", 20, "Non-Conform"), micro_record("2024-02-05", "PW2", 4)):
+        export_record(record, folder=folder, summary_cache=cache)
+
+    stats = cache.summarize("Daily_Micro", date(2024, 1, 1), date(2024, 2, 29))
+    assert stats.loc["PW1", ["Samples", "Mean", "Max", "Non-Conform"]].tolist() == [3, 20.0, 30.0, 1]
+    assert stats.loc["PW1", "Std"] == 10.0
+    # Half a month is computed from the file rows
+    stats = cache.summarize("Daily_Micro", date(2024, 1, 15), date(2024, 2, 29))
+    assert stats.loc["PW1", ["Samples", "Mean"]].tolist() == [2, 25.0]
+
+    os.remove(cache.cache_path)
+    rebuilt = SummaryCache(folder=folder)
+    assert rebuilt.partials == cache.partials
+    pd.testing.assert_frame_equal(rebuilt.summarize("Daily_Micro", date(2024, 1, 15), date(2024, 2, 29)), stats)
+
+
+def test_a_file_edited_outside_the_app_is_rebuilt(tmp_path):
+    folder = str(tmp_path)
+    initialize_databases(folder=folder)
+    cache = SummaryCache(folder=folder)
+    export_record(micro_record("2024-03-01", "PW1", 5), folder=folder, summary_cache=cache)
+
+    path = os.path.join(folder, "daily_microbiology.csv")
+    df = pd.read_csv(path, dtype=str)
+    df.loc[0, "Total Count"] = "7"
+    df.to_csv(path, index=False)
+    stats = cache.summarize("Daily_Micro", date(2024, 3, 1), date(2024, 3, 31))
+    assert stats.loc["PW1", "Mean"] == 7.0
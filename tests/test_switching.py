@@ -0,0 +1,53 @@
+"""Incrementally maintained switching states against a replay of the records"""
+
+import random
+from datetime import datetime, timedelta
+
+from qc_core import (SupplierSwitching, append_inspection_record, build_inspection_plan, read_inspection_records,
+                     replay_switching, update_conformity_record)
+
+
+def snapshot(states):
+    return {supplier: state.as_dict() for supplier, state in states.items()}
+
+
+def test_incremental_states_match_replay(tmp_path):
+    path = str(tmp_path / "inspection_results.csv")
+    switching = SupplierSwitching(path, str(tmp_path / "supplier_switching.json"))
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    planned = []
+    for lot in range(300):
+        supplier = rng.choice(["Acme", "Globex", "Initech"])
+        plan = build_inspection_plan(f"IC{lot % 240}", "", "", "Sam", supplier, rng.choice([60, 1000, 50000]),
+                                     "bottle", "II", switching.supplier(supplier).severity)
+        append_inspection_record(plan, start + timedelta(hours=lot), path, switching=switching)
+        planned.append(plan["ic"])
+        # Results mostly come in order, some late and some saved again
+        if rng.random() < 0.8:
+            ic = planned.pop(rng.randrange(len(planned)) if rng.random() < 0.2 else -1)
+            status = "Conform" if rng.random() < 0.8 else "Non-Conform"
+            update_conformity_record(ic, "", "", status, "Ina", "", rng.randrange(3), rng.randrange(6), path,
+                                     switching=switching)
+
+    assert snapshot(switching.states) == snapshot(replay_switching(read_inspection_records(path)))
+    assert any(state.severity != "Normal" for state in switching.states.values())
+
+    # Saved states are used as they are, without replaying the file
+    reloaded = SupplierSwitching(path, str(tmp_path / "supplier_switching.json"))
+    assert reloaded.source == switching.source
+    assert snapshot(reloaded.states) == snapshot(switching.states)
+
+
+def test_outside_edit_rebuilds(tmp_path):
+    path = str(tmp_path / "inspection_results.csv")
+    switching_path = str(tmp_path / "supplier_switching.json")
+    switching = SupplierSwitching(path, switching_path)
+    plan = build_inspection_plan("IC1", "", "", "Sam", "Acme", 1000, "bottle", "II")
+    append_inspection_record(plan, datetime(2024, 1, 1), path)
+    update_conformity_record("IC1", "", "", "Non-Conform", "Ina", "", 9, 9, path)
+
+    assert "Acme" not in switching.states
+    switching.ensure_current()
+    assert switching.supplier("Acme").recent == switching.states["Acme"].recent
+    assert list(switching.states["Acme"].recent) == [False]
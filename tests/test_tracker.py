@@ -0,0 +1,54 @@
+"""Scheduled samples missing from the QC databases"""
+
+import csv
+import os
+from datetime import date
+
+from qc_core import DB_FILES, MICRO_COLUMNS, find_missing_samples, initialize_databases
+from qc_core.schedule import WaterSchedule
+
+SCHEDULE = WaterSchedule({
+    "points": ["city", "feed_water"],
+    "limits": {"default_cfu": 100, "default_conductivity": 1.3, "cfu": {}, "conductivity": {},
+               "cl_allowed_points": []},
+    "daily": {"micro": {"Monday": ["city"], "Tuesday": ["city"]}, "chem": {"Monday": ["feed_water"]}},
+    "monthly": {"micro": ["feed_water"], "chem": []},
+    "sanitization": {"micro": ["city"], "chem": []}
+})
+
+
+def write_results(folder, db_key, results):
+    with open(os.path.join(folder, DB_FILES[db_key]), mode="a", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=MICRO_COLUMNS)
+        for day, test_type, point in results:
+            writer.writerow({"Date": day, "Test Type": test_type, "Day": "", "Point": point, "Total Count": "1",
+                             "Coliforms": "Absent", "Pseudomonas": "Absent", "Status": "Conform", "Comments": ""})
+
+
+def test_only_unrecorded_samples_are_missing(tmp_path):
+    folder = str(tmp_path)
+    initialize_databases(folder=folder)
+    # 2024-01-01 is a Monday, the first working day of the month
+    write_results(folder, "Daily_Micro", [("2024-01-01", "Daily", "city"), ("2024-01-03", "Daily", "city")])
+    # A monthly sample counts on any day of its month
+    write_results(folder, "Monthly_Micro", [("2024-01-02", "Monthly", "feed_water")])
+    write_results(folder, "Sanitization_Micro", [("2024-01-02", "After Sanitization", "city")])
+
+    missing, per_point = find_missing_samples(date(2024, 1, 1), date(2024, 1, 3), today=date(2024, 1, 2),
+                                              folder=folder, schedule=SCHEDULE)
+    assert missing[["Date", "Test Type", "Kind", "Point", "State", "Days Overdue"]].values.tolist() == [
+        ["2024-01-01", "Daily", "Chem", "feed_water", "Overdue", 1],
+        ["2024-01-02", "Daily", "Micro", "city", "Due", 0]]
+    assert per_point.loc["city", ["Scheduled", "Recorded", "Missing", "Overdue"]].tolist() == [3, 2, 1, 0]
+    assert per_point.loc["feed_water", ["Scheduled", "Recorded", "Missing", "Overdue"]].tolist() == [2, 1, 1, 1]
+
+
+def test_a_monthly_sample_of_another_month_does_not_count(tmp_path):
+    folder = str(tmp_path)
+    initialize_databases(folder=folder)
+    write_results(folder, "Monthly_Micro", [("2023-12-29", "Monthly", "feed_water")])
+
+    missing, per_point = find_missing_samples(date(2023, 12, 29), date(2024, 1, 1), sanitization_dates=[],
+                                              today=date(2024, 2, 1), folder=folder, schedule=SCHEDULE)
+    monthly = missing[missing["Test Type"] == "Monthly"]
+    assert monthly[["Date", "Point", "Days Overdue"]].values.tolist() == [["2024-01-01", "feed_water", 1]]
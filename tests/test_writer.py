@@ -0,0 +1,114 @@
+"""Background writer: rejected records against failed saves"""
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from qc_core import (BackgroundWriter, ChangeFeed, ColumnCache, EntryGrid, RejectedRecord, SummaryCache,
+                     append_inspection_record, build_inspection_plan, export_record, initialize_databases,
+                     read_inspection_records, read_results, write_recovery_file)
+
+
+def reject():
+    raise RejectedRecord("Duplicate entry for Tank on 2024-01-01")
+
+
+def broken_file():
+    json.loads("{")  # JSONDecodeError is a ValueError, but not a rejection
+
+
+def test_only_rejected_records_are_dropped():
+    writer = BackgroundWriter(retry_delays=())
+    rejected = writer.submit("rejected", reject)
+    failed = writer.submit("failed", broken_file)
+    assert writer.close() == [failed]
+    states = {job.description: state for state, job in writer.finished()}
+    assert states == {"rejected": "rejected", "failed": "failed"}
+    assert isinstance(rejected.error, RejectedRecord)
+
+
+def test_unsaved_jobs_are_kept_for_recovery(tmp_path):
+    writer = BackgroundWriter(retry_delays=())
+    record = {"Point": "Tank", "Date": "2024-01-01", "Conductivity": "0.8"}
+    writer.submit("Tank Chemistry (2024-01-01)", broken_file_with, record)
+    unsaved = writer.close()
+    path = write_recovery_file(unsaved, str(tmp_path / "unsaved.jsonl"))
+    with open(path, encoding="utf-8") as file:
+        saved, = [json.loads(line) for line in file]
+    assert saved["description"] == "Tank Chemistry (2024-01-01)"
+    assert saved["args"] == [record]
+    assert "Tank Chemistry" in writer.unsaved_text(unsaved)
+
+
+def broken_file_with(record):
+    broken_file()
+
+
+def test_rejected_record_goes_back_to_its_row():
+    grid = EntryGrid("Chemistry", ["Tank"])
+    context = {"Date": "2024-01-01", "Test Type": "Daily", "Day": "Sunday"}
+    grid.set("Tank", "Conductivity", "0.8", context)
+    record, = grid.take_records()
+    grid.rows["Tank"] = dict(grid.defaults)
+
+    assert grid.restore(record)
+    assert grid.take_records() == [record]
+
+    # A row edited again after the record was taken keeps the new values
+    grid.set("Tank", "Conductivity", "0.9", context)
+    assert not grid.restore(record)
+    assert grid.rows["Tank"]["Conductivity"] == "0.9"
+
+
+@pytest.fixture
+def feed_fails_once(monkeypatch):
+    append = ChangeFeed.append
+    calls = []
+
+    def failing_append(self, changes):
+        calls.append(changes)
+        if len(calls) == 1:
+            raise OSError("Change_Feed is locked by another program")
+        return append(self, changes)
+
+    monkeypatch.setattr(ChangeFeed, "append", failing_append)
+    return calls
+
+
+def test_export_retry_does_not_write_the_record_twice(tmp_path, feed_fails_once):
+    folder = str(tmp_path)
+    initialize_databases(folder=folder)
+    feed = ChangeFeed(str(tmp_path / "Change_Feed"))
+    record = {"Tab": "Microbiology", "Test Type": "Daily", "Date": "2024-01-01", "Day": "Monday",
+              "Point": "PW1", "Total Count": "3", "Coliforms": "Absent", "Pseudomonas": "Absent",
+              "Status": "Conform", "Comments": ""}
+
+    writer = BackgroundWriter(retry_delays=(0,))
+    job = writer.submit("PW1 Microbiology (2024-01-01)", export_record, record, folder=folder,
+                        summary_cache=SummaryCache(folder=folder), change_feed=feed,
+                        column_cache=ColumnCache(folder=folder))
+    writer.jobs.join()
+    assert writer.close() == []
+    assert [state for state, _ in writer.finished()] == ["retrying", "done"]
+    assert job.error is None
+
+    assert len(read_results(os.path.join(folder, "daily_microbiology.csv"))) == 1
+    assert [(entry["op"], entry["key"]["Point"]) for entry in feed.read()] == [("insert", "PW1")]
+
+
+def test_plan_retry_does_not_add_an_attempt(tmp_path, feed_fails_once):
+    path = str(tmp_path / "inspection_results.csv")
+    feed = ChangeFeed(str(tmp_path / "Change_Feed"))
+    plan = build_inspection_plan("IC1", "", "", "Sam", "Acme", 1000, "bottle", "II")
+
+    writer = BackgroundWriter(retry_delays=(0,))
+    writer.submit("inspection plan of IC1", append_inspection_record, plan, datetime(2024, 1, 1), path,
+                  change_feed=feed)
+    writer.jobs.join()
+    assert writer.close() == []
+    assert [state for state, _ in writer.finished()] == ["retrying", "done"]
+
+    assert [record["Attempt"] for record in read_inspection_records(path)] == [1]
+    assert [entry["key"]["Attempt"] for entry in feed.read()] == [1]